@@ -0,0 +1,286 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+A synthetic AWS Organization, served by in-process stubs of the AWS APIs a scan calls: STS (GetCallerIdentity,
+AssumeRole), Organizations (DescribeOrganization, ListAccounts), account (ListRegions) and OpenSearch Service
+(ListDomainNames, DescribeDomains).
+
+The stubs answer botocore's `before-send` event with a canned HTTP response, so requests are signed, retried and
+parsed by botocore as usual, but never leave the process: a scan of thousands of accounts needs no network, no
+local server and no AWS account. Every API call can be delayed by a fixed `latency`, and with a `rate_limit` each
+(service, region) accepts at most that many requests per second and throttles the others, like the real services.
+
+The organization is generated from a seed: whether an account uses a region (popular regions first) and how many
+domains it has there (a heavy tailed Pareto distribution) are derived from the (account, region) pair, so every
+process serving the same seed serves the same organization without keeping it in memory.
+"""
+
+import json
+import time
+import random
+import asyncio
+import threading
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+
+import botocore.session
+from botocore.awsrequest import AWSResponse
+
+from opensearch_stub import RegionRateLimit, get_region
+
+BENCHMARK_ACCESS_KEY = 'AKIDBENCHMARK'
+PAYER_ACCOUNT = '100000000000'
+# Assumed role credentials carry the account in their access key, so the stubs know which account is calling
+ASSUMED_ROLE_KEY_PREFIX = 'ASIABENCH'
+LIST_ACCOUNTS_PAGE_SIZE = 20
+
+# (engine version, weight) - most domains run versions in extended support, as in organizations that need this tool
+ENGINE_VERSIONS = [('Elasticsearch_6.8', 3), ('Elasticsearch_7.10', 8), ('Elasticsearch_7.9', 2), ('Elasticsearch_7.4', 3),
+                   ('Elasticsearch_6.5', 3), ('Elasticsearch_5.6', 2), ('Elasticsearch_2.3', 1), ('OpenSearch_1.3', 4),
+                   ('OpenSearch_1.2', 3), ('OpenSearch_2.5', 4), ('OpenSearch_2.9', 3), ('OpenSearch_2.11', 6),
+                   ('OpenSearch_2.13', 5)]
+DATA_INSTANCE_TYPES = ['t3.medium.search', 'm6g.large.search', 'm6g.xlarge.search', 'r6g.large.search', 'r6g.xlarge.search',
+                       'r6g.2xlarge.search', 'r6g.4xlarge.search', 'c6g.2xlarge.search', 'i3.2xlarge.search', 'or1.xlarge.search']
+MASTER_INSTANCE_TYPES = ['m6g.large.search', 'r6g.large.search', 'r6g.xlarge.search']
+
+
+class SyntheticOrg:
+    """
+    A payer account and `accounts - 1` member accounts, using `regions`
+    """
+
+    def __init__(self, accounts, regions, seed=0, region_usage=0.6, domains_alpha=1.6, max_domains=200):
+        self.accounts = [f'{int(PAYER_ACCOUNT) + i}' for i in range(accounts)]
+        self.regions = list(regions)
+        self.seed = seed
+        self.domains_alpha = domains_alpha
+        self.max_domains = max_domains
+        # Probability that an account uses a region, decreasing with the popularity rank of the region
+        self.region_usage = {region: region_usage / (rank + 1) ** 0.8 for rank, region in enumerate(self.regions)}
+        self._versions, self._version_weights = zip(*ENGINE_VERSIONS)
+
+    def _rng(self, *key):
+        return random.Random(zlib.crc32('/'.join(map(str, (self.seed,) + key)).encode()))
+
+    def domain_count(self, account, region):
+        rng = self._rng(account, region)
+        if rng.random() >= self.region_usage.get(region, 0):
+            return 0
+        return min(self.max_domains, int(rng.paretovariate(self.domains_alpha)))
+
+    def domain_names(self, account, region):
+        return [f'{region[:2]}-search-{i:03d}' for i in range(self.domain_count(account, region))]
+
+    def total_domains(self):
+        return sum(self.domain_count(account, region) for account in self.accounts for region in self.regions)
+
+    def domain_status(self, account, region, domain_name):
+        """
+        Return the DescribeDomains payload of a domain, with the fields and sizes of a real one
+        """
+        rng = self._rng(account, region, domain_name)
+        version = rng.choices(self._versions, self._version_weights)[0]
+        data_count = rng.choice([1, 2, 3, 3, 4, 6, 6, 9, 12, 20])
+        zone_awareness = data_count > 1 and rng.random() < 0.7
+        cluster_config = {
+            'InstanceType': rng.choice(DATA_INSTANCE_TYPES),
+            'InstanceCount': data_count,
+            'DedicatedMasterEnabled': data_count >= 3,
+            'ZoneAwarenessEnabled': zone_awareness,
+            'WarmEnabled': False,
+            'ColdStorageOptions': {'Enabled': False},
+            'MultiAZWithStandbyEnabled': False,
+        }
+        if zone_awareness:
+            cluster_config['ZoneAwarenessConfig'] = {'AvailabilityZoneCount': rng.choice([2, 3])}
+        if data_count >= 3:
+            cluster_config['DedicatedMasterType'] = rng.choice(MASTER_INSTANCE_TYPES)
+            cluster_config['DedicatedMasterCount'] = 3
+        if data_count >= 6 and rng.random() < 0.3:
+            cluster_config.update(WarmEnabled=True, WarmType='ultrawarm1.medium.search', WarmCount=rng.choice([2, 3, 4]))
+        if version.startswith('OpenSearch_2') and rng.random() < 0.1:
+            cluster_config['NodeOptions'] = [{'NodeType': 'coordinator', 'NodeConfig': {
+                'Enabled': True, 'Type': 'm6g.large.search', 'Count': rng.choice([2, 3])}}]
+
+        domain_id = f'{account}/{domain_name}'
+        created = datetime(2018, 1, 1, tzinfo=timezone.utc) + timedelta(days=rng.randrange(2500))
+        return {
+            'DomainId': domain_id,
+            'DomainName': domain_name,
+            'ARN': f'arn:aws:es:{region}:{account}:domain/{domain_name}',
+            'Created': True,
+            'Deleted': False,
+            'Endpoints': {'vpc': f'vpc-{domain_name}-{rng.getrandbits(64):016x}.{region}.es.amazonaws.com'},
+            'DomainEndpointV2HostedZoneId': 'Z1234567890ABC',
+            'Processing': False,
+            'UpgradeProcessing': False,
+            'EngineVersion': version,
+            'ClusterConfig': cluster_config,
+            'EBSOptions': {'EBSEnabled': True, 'VolumeType': 'gp3', 'VolumeSize': rng.choice([20, 100, 512, 1024]),
+                           'Iops': 3000, 'Throughput': 125},
+            'AccessPolicies': json.dumps({'Version': '2012-10-17', 'Statement': [{
+                'Effect': 'Allow', 'Principal': {'AWS': f'arn:aws:iam::{account}:root'}, 'Action': 'es:*',
+                'Resource': f'arn:aws:es:{region}:{account}:domain/{domain_name}/*'}]}),
+            'IPAddressType': 'ipv4',
+            'SnapshotOptions': {'AutomatedSnapshotStartHour': 0},
+            'VPCOptions': {'VPCId': f'vpc-{rng.getrandbits(32):08x}', 'SubnetIds': [f'subnet-{rng.getrandbits(32):08x}' for _ in range(2)],
+                           'AvailabilityZones': [f'{region}a', f'{region}b'], 'SecurityGroupIds': [f'sg-{rng.getrandbits(32):08x}']},
+            'CognitoOptions': {'Enabled': False},
+            'EncryptionAtRestOptions': {'Enabled': True, 'KmsKeyId': f'arn:aws:kms:{region}:{account}:key/{rng.getrandbits(128):032x}'},
+            'NodeToNodeEncryptionOptions': {'Enabled': True},
+            'AdvancedOptions': {'indices.fielddata.cache.size': '20', 'indices.query.bool.max_clause_count': '1024',
+                                'override_main_response_version': 'false', 'rest.action.multi.allow_explicit_index': 'true'},
+            'ServiceSoftwareOptions': {'CurrentVersion': 'R20240520-P2', 'NewVersion': '', 'UpdateAvailable': False,
+                                       'Cancellable': False, 'UpdateStatus': 'COMPLETED', 'Description': 'There is no software update available for this domain.',
+                                       'AutomatedUpdateDate': 0, 'OptionalDeployment': True},
+            'DomainEndpointOptions': {'EnforceHTTPS': True, 'TLSSecurityPolicy': 'Policy-Min-TLS-1-2-2019-07', 'CustomEndpointEnabled': False},
+            'AdvancedSecurityOptions': {'Enabled': True, 'InternalUserDatabaseEnabled': False, 'AnonymousAuthEnabled': False},
+            'AutoTuneOptions': {'State': 'ENABLED', 'UseOffPeakWindow': False},
+            'ChangeProgressDetails': {'ChangeId': f'{rng.getrandbits(128):032x}', 'ConfigChangeStatus': 'Completed',
+                                      'InitiatedBy': 'CUSTOMER', 'StartTime': created.timestamp(), 'LastUpdatedTime': created.timestamp()},
+            'OffPeakWindowOptions': {'Enabled': True, 'OffPeakWindow': {'WindowStartTime': {'Hours': 22, 'Minutes': 0}}},
+            'SoftwareUpdateOptions': {'AutoSoftwareUpdateEnabled': False},
+            'DomainProcessingStatus': 'Active',
+            'ModifyingProperties': [],
+        }
+
+
+class _Body:
+    """
+    Raw body of a stubbed response, readable by botocore (`stream`) and aiobotocore (`read`)
+    """
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def stream(self, **kwargs):
+        yield self.payload
+
+    async def read(self):
+        return self.payload
+
+
+class AwsStubs:
+    """
+    Serve a SyntheticOrg to every botocore (and aiobotocore) session created after `install`.
+    `calls` and `throttled` count the requests per (service, operation).
+    """
+
+    def __init__(self, org, latency=0.0, rate_limit=None):
+        self.org = org
+        self.latency = latency
+        self.rate_limit = RegionRateLimit(rate_limit) if rate_limit else None
+        self.calls = Counter()
+        self.throttled = Counter()
+        self._lock = threading.Lock()
+
+    def install(self):
+        """
+        Register the stubs on every botocore session created from now on, including the default boto3 session
+        """
+        stubs = self
+        init = botocore.session.Session.__init__
+
+        def stubbed_init(session, *args, **kwargs):
+            init(session, *args, **kwargs)
+            is_async = type(session).__module__.startswith('aiobotocore')
+            session.register('before-send', stubs._before_send_async if is_async else stubs._before_send)
+
+        botocore.session.Session.__init__ = stubbed_init
+        return self
+
+    def _before_send(self, request, event_name, **kwargs):
+        time.sleep(self.latency)
+        status, headers, body = self._respond(request, event_name)
+        return AWSResponse(request.url, status, headers, _Body(body))
+
+    async def _before_send_async(self, request, event_name, **kwargs):
+        # Only needed by the async engine, so keep it out of module import time
+        from aiobotocore.awsrequest import AioAWSResponse
+
+        await asyncio.sleep(self.latency)
+        status, headers, body = self._respond(request, event_name)
+        return AioAWSResponse(request.url, status, headers, _Body(body))
+
+    def _respond(self, request, event_name):
+        """
+        Return the (status, headers, body) of the response to a request
+        """
+        _, service, operation = event_name.split('.', 2)
+        authorization = request.headers.get('Authorization', b'')
+        authorization = authorization.decode() if isinstance(authorization, bytes) else authorization
+        region = get_region(authorization)
+        access_key = authorization.split('Credential=')[1].split('/')[0] if 'Credential=' in authorization else ''
+        account = access_key[len(ASSUMED_ROLE_KEY_PREFIX):] if access_key.startswith(ASSUMED_ROLE_KEY_PREFIX) else PAYER_ACCOUNT
+        body = request.body or b''
+        body = body.decode() if isinstance(body, bytes) else body
+
+        with self._lock:
+            self.calls[(service, operation)] += 1
+        if self.rate_limit is not None and not self.rate_limit.allow(f'{service}/{region}'):
+            with self._lock:
+                self.throttled[(service, operation)] += 1
+            return self._throttle(service)
+
+        handler = getattr(self, f'_{service.replace("-", "_")}_{operation}', None)
+        if handler is None:
+            raise RuntimeError(f'No stub for {service} {operation}')
+        return handler(account, region, body)
+
+    @staticmethod
+    def _json(body, content_type='application/json'):
+        return 200, {'Content-Type': content_type}, json.dumps(body).encode()
+
+    @staticmethod
+    def _xml(body):
+        return 200, {'Content-Type': 'text/xml'}, body.encode()
+
+    @staticmethod
+    def _throttle(service):
+        if service == 'sts':
+            return 400, {'Content-Type': 'text/xml'}, (b'<ErrorResponse><Error><Type>Sender</Type><Code>Throttling</Code>'
+                                                       b'<Message>Rate exceeded</Message></Error><RequestId>1</RequestId></ErrorResponse>')
+        if service == 'organizations':
+            return 400, {'Content-Type': 'application/x-amz-json-1.1'}, b'{"__type": "TooManyRequestsException", "Message": "Rate exceeded"}'
+        error = 'ThrottlingException' if service == 'opensearch' else 'TooManyRequestsException'
+        return 429, {'Content-Type': 'application/json', 'x-amzn-ErrorType': error}, b'{"message": "Rate exceeded"}'
+
+    def _sts_GetCallerIdentity(self, account, region, body):
+        return self._xml(f'<GetCallerIdentityResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/"><GetCallerIdentityResult>'
+                         f'<Arn>arn:aws:iam::{account}:user/benchmark</Arn><UserId>AIDABENCHMARK</UserId><Account>{account}</Account>'
+                         f'</GetCallerIdentityResult></GetCallerIdentityResponse>')
+
+    def _sts_AssumeRole(self, account, region, body):
+        role_account = body.split('RoleArn=')[1].split('&')[0].split('%3A')[4]
+        expiration = (datetime.now(timezone.utc) + timedelta(hours=1)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        return self._xml(f'<AssumeRoleResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/"><AssumeRoleResult><Credentials>'
+                         f'<AccessKeyId>{ASSUMED_ROLE_KEY_PREFIX}{role_account}</AccessKeyId><SecretAccessKey>benchmark</SecretAccessKey>'
+                         f'<SessionToken>benchmark</SessionToken><Expiration>{expiration}</Expiration></Credentials>'
+                         f'<AssumedRoleUser><Arn>arn:aws:sts::{role_account}:assumed-role/benchmark/session</Arn>'
+                         f'<AssumedRoleId>AROABENCHMARK:session</AssumedRoleId></AssumedRoleUser></AssumeRoleResult></AssumeRoleResponse>')
+
+    def _organizations_DescribeOrganization(self, account, region, body):
+        return self._json({'Organization': {'Id': 'o-benchmark', 'Arn': f'arn:aws:organizations::{PAYER_ACCOUNT}:organization/o-benchmark',
+                                            'MasterAccountId': PAYER_ACCOUNT, 'FeatureSet': 'ALL'}}, 'application/x-amz-json-1.1')
+
+    def _organizations_ListAccounts(self, account, region, body):
+        start = int(json.loads(body or '{}').get('NextToken') or 0)
+        page = self.org.accounts[start:start + LIST_ACCOUNTS_PAGE_SIZE]
+        response = {'Accounts': [{'Id': account_id, 'Arn': f'arn:aws:organizations::{PAYER_ACCOUNT}:account/o-benchmark/{account_id}',
+                                  'Email': f'{account_id}@example.com', 'Name': f'account-{account_id}', 'Status': 'ACTIVE',
+                                  'JoinedMethod': 'CREATED', 'JoinedTimestamp': 1600000000} for account_id in page]}
+        if start + LIST_ACCOUNTS_PAGE_SIZE < len(self.org.accounts):
+            response['NextToken'] = str(start + LIST_ACCOUNTS_PAGE_SIZE)
+        return self._json(response, 'application/x-amz-json-1.1')
+
+    def _account_ListRegions(self, account, region, body):
+        return self._json({'Regions': [{'RegionName': name, 'RegionOptStatus': 'ENABLED_BY_DEFAULT'} for name in self.org.regions]})
+
+    def _opensearch_ListDomainNames(self, account, region, body):
+        return self._json({'DomainNames': [{'DomainName': name, 'EngineType': 'OpenSearch'} for name in self.org.domain_names(account, region)]})
+
+    def _opensearch_DescribeDomains(self, account, region, body):
+        names = json.loads(body)['DomainNames']
+        return self._json({'DomainStatusList': [self.org.domain_status(account, region, name) for name in names]})
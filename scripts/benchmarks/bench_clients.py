@@ -0,0 +1,168 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Compare the CPU time, peak RSS and connections opened by a thread engine scan when every (account, region)
+unit builds its own boto3 client ("per-unit", the previous behaviour) and when clients come from the client
+factory (see utils/client_factory.py), against a local HTTPS stub of the OpenSearch API.
+
+The stub uses a self-signed certificate made with the `openssl` command, trusted through a CA bundle of the
+certifi CAs plus that certificate, so that loading the CA bundle and the TLS handshakes of new connections
+cost what they cost against the real endpoints. Without `openssl` the stub falls back to plain HTTP.
+
+    python benchmarks/bench_clients.py --accounts 1000 --regions 3
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import resource
+import tempfile
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+STUB_PRICE_PER_NIH = 0.0065
+BENCHMARK_REGIONS = ['us-east-1', 'eu-west-1', 'ap-southeast-2', 'us-west-2', 'eu-central-1', 'ap-northeast-1',
+                     'ca-central-1', 'sa-east-1', 'eu-north-1', 'ap-south-1']
+
+
+class PerUnitClients:
+    """
+    The previous behaviour of the scanner: a new client, from the default session, for every call
+    """
+
+    def get_client(self, service_name, region_name=None, account_id=None, credentials=None):
+        import boto3
+        from utils.rate_limiter import RATE_LIMITER, CLIENT_CONFIG
+        return RATE_LIMITER.instrument(boto3.client(service_name, region_name=region_name, config=CLIENT_CONFIG, **(credentials or {})))
+
+
+def run_child(args):
+    """
+    Scan with one client mode and print a JSON summary on stdout
+    """
+    os.chdir(args.workdir)
+    import find_aos_extended_support_instances as scanner
+    from utils.scheduler import ScanScheduler
+    from utils.result_writer import ResultWriter
+
+    if args.child == 'per-unit':
+        scanner.CLIENT_FACTORY = PerUnitClients()
+    else:
+        scanner.CLIENT_FACTORY.max_pool_connections = args.max_workers
+
+    regions = BENCHMARK_REGIONS[:args.regions]
+    scanner.SCANNER.regions = {region: region for region in regions}
+    scanner.SCANNER.pricing = {region: {'price_per_nih': STUB_PRICE_PER_NIH} for region in regions}
+    scanner.SCANNER.outfile = os.path.join(args.workdir, f'{args.child}.csv')
+
+    accounts = [f'{100000000000 + i}' for i in range(args.accounts)]
+    units = [(account, region) for account in accounts for region in regions]
+    writer = ResultWriter(scanner.SCANNER.outfile, scanner.OUTPUT_COLUMNS, transform=scanner.get_cost_model().price_rows,
+                          csv_formatters=scanner.CSV_FORMATTERS)
+
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    # Every account is scanned as the caller account, with the default credentials, so STS is not involved
+    ScanScheduler(max_workers=args.max_workers, max_per_account=args.max_workers, max_per_region=args.max_workers).run(
+        units, lambda account, region: scanner.get_opensearch_extended_support_instances(account, account, region), writer.submit)
+    writer.close()
+
+    print(json.dumps({
+        'mode': args.child,
+        'units': len(units),
+        'rows': writer.rows_written,
+        'wall_time': time.perf_counter() - start,
+        'cpu_time': time.process_time() - cpu_start,
+        # ru_maxrss is in KB on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'outfile': scanner.SCANNER.outfile,
+    }))
+
+
+def make_certificate(workdir):
+    """
+    Return the (certificate, key) files of a self-signed certificate for 127.0.0.1, and a CA bundle trusting it
+    """
+    openssl = shutil.which('openssl')
+    if openssl is None:
+        return None, None
+    import certifi
+
+    certificate, key = os.path.join(workdir, 'stub.crt'), os.path.join(workdir, 'stub.key')
+    subprocess.run([openssl, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1', '-subj', '/CN=127.0.0.1',
+                    '-addext', 'subjectAltName=IP:127.0.0.1', '-keyout', key, '-out', certificate],
+                   check=True, capture_output=True)
+    ca_bundle = os.path.join(workdir, 'ca-bundle.pem')
+    with open(ca_bundle, 'w', encoding="utf-8") as out:
+        for path in (certifi.where(), certificate):
+            with open(path, encoding="utf-8") as f:
+                out.write(f.read())
+    return (certificate, key), ca_bundle
+
+
+def run_benchmark(args):
+    from opensearch_stub import start_stub_server
+
+    summaries = []
+    with tempfile.TemporaryDirectory() as workdir:
+        certificate, ca_bundle = make_certificate(workdir)
+        if certificate is None:
+            print('openssl not found, the stub serves plain HTTP: TLS costs are not measured')
+        server = start_stub_server(latency=args.latency, domains_per_region=args.domains_per_region, certificate=certificate)
+        scheme = 'https' if certificate else 'http'
+        env = dict(os.environ,
+                   AWS_ENDPOINT_URL_OPENSEARCH=f'{scheme}://127.0.0.1:{server.server_address[1]}',
+                   AWS_ACCESS_KEY_ID='AKIDBENCHMARK', AWS_SECRET_ACCESS_KEY='benchmark', AWS_DEFAULT_REGION='us-east-1')
+        if ca_bundle:
+            env['AWS_CA_BUNDLE'] = ca_bundle
+
+        for mode in ('per-unit', 'factory'):
+            connections_before = server.connections
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', mode, '--workdir', workdir,
+                                     '--accounts', str(args.accounts), '--regions', str(args.regions),
+                                     '--max-workers', str(args.max_workers)],
+                                    env=env, capture_output=True, text=True, check=True).stdout
+            summary = json.loads(output.strip().splitlines()[-1])
+            summary['connections'] = server.connections - connections_before
+            summaries.append(summary)
+
+        outputs = []
+        for summary in summaries:
+            with open(summary['outfile'], encoding="utf-8") as f:
+                outputs.append(sorted(f.readlines()))
+        server.shutdown()
+
+    print(f"{'clients':<9} {'units':>7} {'rows':>7} {'wall time (s)':>14} {'CPU time (s)':>13} {'CPU ms/unit':>12} "
+          f"{'peak RSS (MB)':>14} {'connections':>12}")
+    for summary in summaries:
+        print(f"{summary['mode']:<9} {summary['units']:>7} {summary['rows']:>7} {summary['wall_time']:>14.2f} "
+              f"{summary['cpu_time']:>13.2f} {1000 * summary['cpu_time'] / summary['units']:>12.2f} "
+              f"{summary['peak_rss_mb']:>14.1f} {summary['connections']:>12}")
+    print(f"CSV output identical: {outputs[0] == outputs[1]}")
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--accounts', help='Number of synthetic accounts to scan', type=int, default=100)
+    arg_parser.add_argument('--regions', help='Number of regions scanned in each account', type=int, default=3,
+                            choices=range(1, len(BENCHMARK_REGIONS) + 1), metavar=f'1-{len(BENCHMARK_REGIONS)}')
+    arg_parser.add_argument('--domains-per-region', help='Maximum number of domains in a region', type=int, default=8)
+    arg_parser.add_argument('--latency', help='Latency of each stubbed API call in seconds', type=float, default=0.01)
+    arg_parser.add_argument('--max-workers', help='Worker threads', type=int, default=50)
+    arg_parser.add_argument('--child', help=argparse.SUPPRESS, choices=['per-unit', 'factory'])
+    arg_parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.child:
+        run_child(args)
+    else:
+        run_benchmark(args)
@@ -0,0 +1,125 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Compare peak RSS and wall time of the thread and async scan engines against a local stub of the OpenSearch API.
+
+Each engine runs in its own child process, so that peak RSS is measured per engine. The CSV output
+of both engines is compared to check that they produce the same rows.
+
+    python benchmarks/bench_engines.py --accounts 200 --latency 0.02
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils.constants import DESCRIBE_CONCURRENCY
+
+STUB_PRICE_PER_NIH = 0.0065
+
+
+def run_child(args):
+    """
+    Run one engine against the stub and print a JSON summary on stdout
+    """
+    os.chdir(args.workdir)
+    import find_aos_extended_support_instances as scanner
+    from utils.aos_mappings import get_aos_regions
+    from utils.scheduler import ScanScheduler
+    from utils.async_engine import run_async_scan
+    from utils.result_writer import ResultWriter
+
+    scanner.SCANNER.regions = {region: name for region, name in get_aos_regions(None).items() if not region.startswith('us-gov')}
+    # The pricing page is not part of the benchmark, use a flat stub price for every region
+    scanner.SCANNER.pricing = {name: {'price_per_nih': STUB_PRICE_PER_NIH} for name in scanner.SCANNER.regions.values()}
+    scanner.SCANNER.outfile = os.path.join(args.workdir, f'{args.child}.csv')
+
+    accounts = [f'{100000000000 + i}' for i in range(args.accounts)]
+    units = [(account, region) for account in accounts for region in scanner.SCANNER.regions]
+    writer = ResultWriter(scanner.SCANNER.outfile, scanner.OUTPUT_COLUMNS, transform=scanner.get_cost_model().price_rows,
+                          csv_formatters=scanner.CSV_FORMATTERS)
+
+    start = time.perf_counter()
+    if args.child == 'async':
+        run_async_scan(units, lambda account: {}, scanner.get_extended_support_instance, writer.submit,
+                       max_in_flight=args.max_workers, describe_concurrency=args.describe_concurrency)
+    else:
+        scanner.SCANNER.describe_concurrency = args.describe_concurrency
+        scanner.SCANNER.describe_executor = ThreadPoolExecutor(max_workers=args.max_workers)
+        ScanScheduler(max_workers=args.max_workers, max_per_account=args.max_workers, max_per_region=args.max_workers).run(
+            units, lambda account, region: scanner.get_opensearch_extended_support_instances(account, account, region), writer.submit)
+    writer.close()
+    wall_time = time.perf_counter() - start
+
+    print(json.dumps({
+        'engine': args.child,
+        'units': len(units),
+        'rows': writer.rows_written,
+        'wall_time': wall_time,
+        # ru_maxrss is in KB on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'outfile': scanner.SCANNER.outfile,
+    }))
+
+
+def run_benchmark(args):
+    from opensearch_stub import start_stub_server
+
+    server = start_stub_server(latency=args.latency, domains_per_region=args.domains_per_region, rate_limit=args.service_rate_limit)
+    env = dict(os.environ,
+               AWS_ENDPOINT_URL_OPENSEARCH=f'http://127.0.0.1:{server.server_address[1]}',
+               AWS_ACCESS_KEY_ID='AKIDBENCHMARK', AWS_SECRET_ACCESS_KEY='benchmark', AWS_DEFAULT_REGION='us-east-1')
+
+    summaries = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for engine in ('thread', 'async'):
+            throttled_before = server.rate_limit.throttled if server.rate_limit else 0
+            output = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', engine, '--workdir', workdir,
+                                     '--accounts', str(args.accounts), '--max-workers', str(args.max_workers),
+                                     '--describe-concurrency', str(args.describe_concurrency)],
+                                    env=env, capture_output=True, text=True, check=True).stdout
+            summary = json.loads(output.strip().splitlines()[-1])
+            summary['throttled'] = (server.rate_limit.throttled if server.rate_limit else 0) - throttled_before
+            summaries.append(summary)
+
+        outputs = []
+        for summary in summaries:
+            with open(summary['outfile'], encoding="utf-8") as f:
+                outputs.append(sorted(f.readlines()))
+    server.shutdown()
+
+    print(f"{'engine':<8} {'units':>8} {'rows':>8} {'wall time (s)':>14} {'peak RSS (MB)':>14} {'throttled':>10}")
+    for summary in summaries:
+        print(f"{summary['engine']:<8} {summary['units']:>8} {summary['rows']:>8} {summary['wall_time']:>14.2f} {summary['peak_rss_mb']:>14.1f} {summary['throttled']:>10}")
+    print(f"CSV output identical: {outputs[0] == outputs[1]}")
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--accounts', help='Number of synthetic accounts to scan', type=int, default=100)
+    arg_parser.add_argument('--domains-per-region', help='Maximum number of domains in a region', type=int, default=8)
+    arg_parser.add_argument('--latency', help='Latency of each stubbed API call in seconds', type=float, default=0.02)
+    arg_parser.add_argument('--service-rate-limit', help='Requests per second accepted by the stub in each region, the others are throttled', type=float)
+    arg_parser.add_argument('--max-workers', help='Worker threads (thread engine) or in-flight units (async engine)', type=int, default=100)
+    arg_parser.add_argument('--describe-concurrency', help='DescribeDomains calls in flight for a single (account, region)', type=int, default=DESCRIBE_CONCURRENCY)
+    arg_parser.add_argument('--child', help=argparse.SUPPRESS, choices=['thread', 'async'])
+    arg_parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.child:
+        run_child(args)
+    else:
+        run_benchmark(args)
@@ -0,0 +1,172 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Offline end to end benchmark of a scan of a synthetic AWS Organization.
+
+The scanner's `main` runs with `--all` in a child process, against in-process stubs of STS, Organizations, account
+and OpenSearch Service (see aws_stubs.py), so the whole scan is measured: listing the accounts, assuming roles,
+checking regions, listing and describing domains, costing and writing the results. No AWS account or network is
+needed, so it can run in CI. It reports accounts per second, API calls per operation, throttled calls, peak RSS
+and the size of the output.
+
+    python benchmarks/bench_org.py --accounts 5000 --latency 0.02 --json-out bench_org.json
+    python benchmarks/bench_org.py --accounts 5000 --latency 0.02 --baseline bench_org.json
+
+With `--baseline`, the results are compared with a previous `--json-out` file, and the benchmark exits with an
+error if accounts per second dropped, or peak RSS grew, by more than `--tolerance`.
+"""
+
+import os
+import sys
+import json
+import time
+import shlex
+import argparse
+import resource
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+STUB_PRICE_PER_NIH = 0.0065
+# Regions in rough order of popularity, the most used regions of the synthetic organization come first
+POPULAR_REGIONS = ['us-east-1', 'us-west-2', 'eu-west-1', 'us-east-2', 'eu-central-1', 'ap-northeast-1', 'ap-southeast-2',
+                   'ap-southeast-1', 'eu-west-2', 'ap-south-1', 'ca-central-1', 'ap-northeast-2', 'sa-east-1', 'eu-north-1']
+
+
+def get_benchmark_regions(count):
+    """
+    Return the first `count` commercial regions of the scanner, most popular first
+    """
+    from utils.aos_mappings import get_aos_regions
+
+    regions = [region for region in get_aos_regions(None) if not region.startswith('us-gov')]
+    regions = [region for region in POPULAR_REGIONS if region in regions] + [region for region in regions if region not in POPULAR_REGIONS]
+    return regions[:count]
+
+
+def run_child(args):
+    """
+    Scan the synthetic organization with the scanner's `main` and write a JSON summary to args.summary
+    """
+    from aws_stubs import SyntheticOrg, AwsStubs
+    from utils.aos_mappings import get_aos_regions
+    from utils.pricing_snapshot import PRICING_SNAPSHOT_VERSION
+
+    os.chdir(args.workdir)
+    org = SyntheticOrg(args.accounts, get_benchmark_regions(args.regions), seed=args.seed, domains_alpha=args.domains_alpha)
+    stubs = AwsStubs(org, latency=args.latency, rate_limit=args.service_rate_limit).install()
+
+    with open('regions.csv', 'w', encoding="utf-8") as f:
+        f.writelines(f'{region}\n' for region in org.regions)
+    # The pricing page is not part of the benchmark, use a flat stub price for every region
+    now = datetime.now(timezone.utc).isoformat()
+    with open('pricing_snapshot.json', 'w', encoding="utf-8") as f:
+        json.dump({'version': PRICING_SNAPSHOT_VERSION, 'fetched_at': now, 'checked_at': now,
+                   'price_map': {name: {'price_per_nih': STUB_PRICE_PER_NIH} for name in get_aos_regions(None).values()}}, f)
+
+    import find_aos_extended_support_instances as scanner
+
+    sys.argv = [scanner.__file__, '--all', '--offline', '--pricing-snapshot', 'pricing_snapshot.json',
+                '--regions-file', 'regions.csv'] + shlex.split(args.scan_args)
+    start = time.perf_counter()
+    scanner.main()
+    wall_time = time.perf_counter() - start
+
+    with open(args.summary, 'w', encoding="utf-8") as f:
+        json.dump({
+            'accounts': len(org.accounts),
+            'regions': len(org.regions),
+            'units': len(org.accounts) * len(org.regions),
+            'domains': org.total_domains(),
+            'rows': scanner.SCANNER.writer.rows_written,
+            'wall_time': wall_time,
+            'accounts_per_second': len(org.accounts) / wall_time,
+            'api_calls': {f'{service}.{operation}': count for (service, operation), count in sorted(stubs.calls.items())},
+            'throttled': sum(stubs.throttled.values()),
+            # ru_maxrss is in KB on Linux
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            'output_bytes': os.path.getsize(scanner.SCANNER.outfile),
+        }, f)
+
+
+def compare_with_baseline(summary, baseline, tolerance):
+    """
+    Return the regressions of the summary compared with the baseline, as a list of messages
+    """
+    regressions = []
+    if summary['accounts_per_second'] < baseline['accounts_per_second'] * (1 - tolerance):
+        regressions.append(f"accounts/s dropped from {baseline['accounts_per_second']:.1f} to {summary['accounts_per_second']:.1f}")
+    if summary['peak_rss_mb'] > baseline['peak_rss_mb'] * (1 + tolerance):
+        regressions.append(f"peak RSS grew from {baseline['peak_rss_mb']:.1f} MB to {summary['peak_rss_mb']:.1f} MB")
+    return regressions
+
+
+def run_benchmark(args):
+    env = dict(os.environ, AWS_ACCESS_KEY_ID='AKIDBENCHMARK', AWS_SECRET_ACCESS_KEY='benchmark', AWS_DEFAULT_REGION='us-east-1',
+               AWS_EC2_METADATA_DISABLED='true')
+    with tempfile.TemporaryDirectory() as workdir:
+        summary_file = os.path.join(workdir, 'summary.json')
+        log_file = os.path.join(workdir, 'scan.log')
+        # The scan logs a few lines per (account, region), keep them in a file rather than in memory
+        with open(log_file, 'w', encoding="utf-8") as log:
+            result = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', '--workdir', workdir, '--summary', summary_file,
+                                     '--accounts', str(args.accounts), '--regions', str(args.regions), '--seed', str(args.seed),
+                                     '--domains-alpha', str(args.domains_alpha), '--latency', str(args.latency),
+                                     '--service-rate-limit', str(args.service_rate_limit or 0), f'--scan-args={args.scan_args}'],
+                                    env=env, stdout=log, stderr=subprocess.STDOUT)
+        if result.returncode != 0:
+            with open(log_file, encoding="utf-8") as log:
+                sys.stderr.writelines(log.readlines()[-40:])
+            sys.exit(f'The scan failed with exit code {result.returncode}')
+        with open(summary_file, encoding="utf-8") as f:
+            summary = json.load(f)
+
+    print(f"accounts: {summary['accounts']}, regions: {summary['regions']}, units: {summary['units']}, "
+          f"domains: {summary['domains']}, rows: {summary['rows']}")
+    print(f"wall time: {summary['wall_time']:.1f} s, accounts/s: {summary['accounts_per_second']:.1f}, "
+          f"peak RSS: {summary['peak_rss_mb']:.1f} MB, output: {summary['output_bytes'] / 1024 / 1024:.2f} MB")
+    print(f"API calls: {sum(summary['api_calls'].values())}, throttled: {summary['throttled']}")
+    for operation, count in summary['api_calls'].items():
+        print(f"  {operation:<36} {count:>10}")
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare_with_baseline(summary, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f'Regression: {regression}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regression compared with {args.baseline} (tolerance {args.tolerance:.0%})')
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--accounts', help='Number of accounts of the synthetic organization, including the payer', type=int, default=500)
+    arg_parser.add_argument('--regions', help='Number of regions scanned, most popular first (at most the commercial regions of the scanner)', type=int, default=32)
+    arg_parser.add_argument('--seed', help='Seed of the synthetic organization', type=int, default=0)
+    arg_parser.add_argument('--domains-alpha', help='Shape of the Pareto distribution of domains per used region, lower means more large accounts', type=float, default=1.6)
+    arg_parser.add_argument('--latency', help='Latency of each stubbed API call in seconds', type=float, default=0.02)
+    arg_parser.add_argument('--service-rate-limit', help='Requests per second accepted by each service in each region, the others are throttled', type=float)
+    arg_parser.add_argument('--scan-args', help='Extra arguments of the scan, e.g. "--engine async --max-workers 200"', type=str, default='')
+    arg_parser.add_argument('--json-out', help='Save the results to this JSON file, to be used as a --baseline later', type=str)
+    arg_parser.add_argument('--baseline', help='Results of a previous run (--json-out) to compare with', type=str)
+    arg_parser.add_argument('--tolerance', help='Regression allowed compared with --baseline, as a fraction', type=float, default=0.2)
+    arg_parser.add_argument('--child', help=argparse.SUPPRESS, action='store_true')
+    arg_parser.add_argument('--workdir', help=argparse.SUPPRESS)
+    arg_parser.add_argument('--summary', help=argparse.SUPPRESS)
+    return arg_parser.parse_args()
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    if args.child:
+        run_child(args)
+    else:
+        run_benchmark(args)
@@ -0,0 +1,73 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Measure the startup time of the scanner for each CLI mode that can run without AWS credentials,
+and which of the heavy optional modules (pandas, bs4, requests) each mode imports.
+
+Each mode runs in a fresh interpreter, in a temporary directory, `--repeat` times; the median is reported.
+
+    python benchmarks/bench_startup.py --repeat 5
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = os.path.join(SCRIPTS_DIR, 'find_aos_extended_support_instances.py')
+HEAVY_MODULES = ['pandas', 'bs4', 'requests']
+
+# Runs a CLI mode in-process, then prints which heavy modules ended up imported
+RUNNER = '''
+import sys, json, runpy
+sys.path.insert(0, {scripts_dir!r})
+sys.argv = {argv!r}
+try:
+    if len(sys.argv) > 1:
+        runpy.run_path({script!r}, run_name='__main__')
+    else:
+        import find_aos_extended_support_instances
+except SystemExit:
+    pass
+print(json.dumps([name for name in {heavy_modules!r} if name in sys.modules]))
+'''
+
+MODES = {
+    'import': [],
+    '--help': ['--help'],
+    '--generate-regions-file': ['--generate-regions-file'],
+}
+
+
+def time_mode(argv, workdir):
+    code = RUNNER.format(scripts_dir=SCRIPTS_DIR, script=SCRIPT, argv=[SCRIPT] + argv, heavy_modules=HEAVY_MODULES)
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', code], cwd=workdir, capture_output=True, text=True, check=True).stdout
+    elapsed = time.perf_counter() - start
+    return elapsed, json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    arg_parser = argparse.ArgumentParser()
+    arg_parser.add_argument('--repeat', help='Number of runs per mode', type=int, default=5)
+    args = arg_parser.parse_args()
+
+    print(f"{'mode':<26} {'median (s)':>10} {'min (s)':>8}  heavy modules imported")
+    with tempfile.TemporaryDirectory() as workdir:
+        for mode, argv in MODES.items():
+            timings = []
+            for _ in range(args.repeat):
+                elapsed, imported = time_mode(argv, workdir)
+                timings.append(elapsed)
+            print(f"{mode:<26} {statistics.median(timings):>10.3f} {min(timings):>8.3f}  {', '.join(imported) or '-'}")
+        print(f"files created: {sorted(os.listdir(workdir))}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Local HTTP stub of the two OpenSearch Service APIs used by the scanner (ListDomainNames and DescribeDomains).
+Point boto3/aiobotocore at it with the AWS_ENDPOINT_URL_OPENSEARCH environment variable.
+
+With a `rate_limit`, each region accepts at most that many requests per second (token bucket with a one second
+burst) and throttles the others with a ThrottlingException, like the real service does.
+
+With a `certificate` (certificate file, key file) the stub serves HTTPS, so TLS handshakes are part of the cost
+of each new connection, as they are against the real endpoints.
+"""
+
+import ssl
+import json
+import time
+import zlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ENGINE_VERSIONS = ['Elasticsearch_6.5', 'OpenSearch_2.11', 'Elasticsearch_7.10', 'OpenSearch_1.2', 'Elasticsearch_5.6', 'Elasticsearch_7.8']
+INSTANCE_SIZES = ['medium', 'large', 'xlarge', '2xlarge']
+
+
+def get_region(authorization):
+    """
+    Region is not part of the URL when a custom endpoint is used, so read it from the SigV4 credential scope
+    """
+    try:
+        return authorization.split('Credential=')[1].split('/')[2]
+    except IndexError:
+        return 'us-east-1'
+
+
+def get_domain_count(region, domains_per_region):
+    # Deterministic spread of domains: some regions empty, some with many domains
+    return (zlib.crc32(region.encode()) % 3) * domains_per_region // 2
+
+
+def get_domain_status(region, domain_name):
+    seed = zlib.crc32(f'{region}/{domain_name}'.encode())
+    cluster_config = {
+        'InstanceType': f'r6g.{INSTANCE_SIZES[seed % len(INSTANCE_SIZES)]}.search',
+        'InstanceCount': 1 + seed % 6,
+        'DedicatedMasterEnabled': bool(seed % 2),
+        'WarmEnabled': seed % 3 == 0,
+    }
+    if seed % 2:
+        cluster_config['DedicatedMasterType'] = 'm6g.large.search'
+        cluster_config['DedicatedMasterCount'] = 3
+    if seed % 3 == 0:
+        cluster_config['WarmType'] = 'ultrawarm1.medium.search'
+        cluster_config['WarmCount'] = 2
+    return {
+        'DomainId': f'123456789012/{domain_name}',
+        'DomainName': domain_name,
+        'ARN': f'arn:aws:es:{region}:123456789012:domain/{domain_name}',
+        'EngineVersion': ENGINE_VERSIONS[seed % len(ENGINE_VERSIONS)],
+        'ClusterConfig': cluster_config,
+    }
+
+
+class RegionRateLimit:
+    def __init__(self, rate):
+        self.rate = rate
+        self.throttled = 0
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def allow(self, region):
+        with self._lock:
+            now = time.monotonic()
+            tokens, updated_at = self._buckets.get(region, (self.rate, now))
+            tokens = min(self.rate, tokens + (now - updated_at) * self.rate)
+            allowed = tokens >= 1
+            self._buckets[region] = (tokens - 1 if allowed else tokens, now)
+            if not allowed:
+                self.throttled += 1
+            return allowed
+
+
+def make_handler(latency, domains_per_region, rate_limit):
+    class OpenSearchStubHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+        # Buffer writes so that headers and body go out in a single segment
+        wbufsize = 65536
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, body):
+            payload = json.dumps(body).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            self.wfile.flush()
+
+        def _throttled(self, region):
+            if rate_limit is None or rate_limit.allow(region):
+                return False
+            payload = json.dumps({'message': 'Rate exceeded'}).encode()
+            self.send_response(429)
+            self.send_header('x-amzn-ErrorType', 'ThrottlingException')
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+            self.wfile.flush()
+            return True
+
+        def do_GET(self):
+            time.sleep(latency)
+            region = get_region(self.headers.get('Authorization', ''))
+            if self._throttled(region):
+                return
+            count = get_domain_count(region, domains_per_region)
+            self._send({'DomainNames': [{'DomainName': f'domain-{i:04d}', 'EngineType': 'OpenSearch'} for i in range(count)]})
+
+        def do_POST(self):
+            time.sleep(latency)
+            region = get_region(self.headers.get('Authorization', ''))
+            body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+            if self._throttled(region):
+                return
+            self._send({'DomainStatusList': [get_domain_status(region, name) for name in body.get('DomainNames', [])]})
+
+    return OpenSearchStubHandler
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Both engines open up to a few hundred connections at once
+    request_queue_size = 1024
+    connections = 0
+
+    def get_request(self):
+        request = super().get_request()
+        self.connections += 1
+        return request
+
+
+def start_stub_server(latency=0.02, domains_per_region=8, rate_limit=None, certificate=None):
+    """
+    Start the stub on a free local port in a background thread and return the server.
+    `server.rate_limit.throttled` counts the throttled requests when a `rate_limit` is given,
+    `server.connections` counts the connections opened by the clients.
+    """
+    limit = RegionRateLimit(rate_limit) if rate_limit else None
+    server = StubServer(('127.0.0.1', 0), make_handler(latency, domains_per_region, limit))
+    server.rate_limit = limit
+    if certificate:
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*certificate)
+        # Handshake in the handler thread, on the first read, rather than in the accepting thread
+        server.socket = context.wrap_socket(server.socket, server_side=True, do_handshake_on_connect=False)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
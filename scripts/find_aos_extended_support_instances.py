@@ -3,19 +3,13 @@
 
 import os
 import sys
-import uuid
-import json
-import boto3
 import argparse
-import threading 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 
-import pandas as pd
-
 from utils.utils import (
     is_china_region, 
+    skip_region_on_error,
     validate_if_being_run_by_payer_account, 
     validate_org_accounts,
     get_all_org_accounts,
@@ -25,74 +19,116 @@ from utils.utils import (
 ) 
 
 from utils.utils import ValidationException
-from utils.log import get_logger
-from utils.constants import MEMBER_ACCOUNT_ROLE_NAME
+from utils.log import get_logger, configure_logging, LOG_FORMATS
+from utils.constants import (
+    MEMBER_ACCOUNT_ROLE_NAME,
+    DOMAIN_CACHE_FILE,
+    DOMAIN_CACHE_TTL_HOURS,
+    DESCRIBE_BATCH_SIZE,
+    DESCRIBE_CONCURRENCY,
+    ENABLED_REGIONS_CACHE_FILE
+)
+from utils.credentials import CREDENTIAL_CACHE
+from utils.rate_limiter import RATE_LIMITER
+from utils.client_factory import CLIENT_FACTORY
+from utils.scheduler import ScanScheduler
+from utils.region_discovery import RegionEnablementCache
+from utils.domain_cache import DomainCache
+from utils.describe_batches import describe_domains
+from utils.cost_model import CostModel, NO_NODE_TYPE
+from utils.async_engine import run_async_scan
+from utils.scanner_context import ScannerContext
+from utils.result_writer import ResultWriter, OUTPUT_FORMATS, stream_path
+from utils.results_store import ResultsStore, new_scan_id
+from utils.dead_letter import DeadLetterFile, read_failed_units
+from utils.metrics import METRICS
+from utils.api_archive import API_ARCHIVE
+from utils.sharding import (
+    parse_shard,
+    shard_accounts,
+    shard_path,
+    run_shards,
+    write_shard_manifest,
+    remove_shard_manifests,
+    merge_outputs,
+    SHARD_ACCOUNTS_FILE
+)
+from utils.pricing_snapshot import PRICING_SNAPSHOT_FILE, PRICING_SNAPSHOT_TTL_HOURS
 
 from utils.aos_mappings import (
-    is_extended_support_eligible,
     get_aos_extended_support_mapping,
-    get_aos_instance_mapping,
-    get_opensearch_extended_support_cost,
     get_aos_regions
 )
 
 LOGGER = get_logger(__name__)
 
-''' Build some local caches for -  
-    1. Opensearch Regions
-    2. Opensearch Instance Mapping
-    3. Opensearch Extended Support Versions
-    4. Opensearch Extended Support Pricing
-    5. Cache for storing processed account IDs  
-'''
-REGIONS = {}
-AOS_INSTANCE_MAPPING = {}
-AOS_EXTENDED_SUPPORT_VERSIONS = {}
-AOS_EXTENDED_SUPPORT_PRICING = get_opensearch_extended_support_cost()
-
-processed_accounts = []
-try:
-    # Try to load processed accounts from cache file
-    with open('.tmp_accounts_cache.json', encoding="utf-8") as f:
-        processed_accounts = json.load(f)
-        LOGGER.info(f'Found a previous cache file with {len(processed_accounts)} accounts aready processed. Continuing with remaining accounts...')
-except:
-    pass
-
-# Use a thread lock  
-lock = threading.Lock()
-
-# check if `output` directory exists in current working dir, if not create it.
-if not os.path.isdir('./output'):
-    LOGGER.debug("'output' folder does not exist, creating it now")
-    os.makedirs('./output')
-
-# create a filename using today's date time in YY-MM-DD HH-MM format
-outfile = f'./output/aos_extended_support_instances-{datetime.now().strftime("%Y-%m-%d %H-%M")}.csv'
-LOGGER.info("Outfile name: {}".format(outfile))
-
-
-def get_aos_client(account_id_, payer_account_, region_, assume_role=MEMBER_ACCOUNT_ROLE_NAME):
+# Lazily initialised state of the scan - see ScannerContext
+SCANNER = ScannerContext()
+
+OUTPUT_COLUMNS = ['AccountId', 'Region', 'RegionName', 
+                  'DomainName', 'ARN', 'EngineVersion', 
+                  'DedicatedMasterType', 'DedicatedMasterCount', 'Normalization Factor (Master Nodes)',
+                  'InstanceType', 'InstanceCount', 'Normalization Factor (Data Nodes)', 
+                  'WarmType', 'WarmCount', 'Normalization Factor (Ultrawarm Nodes)',
+                  'CoordinatorNodeType', 'CoordinatorNodeCount', 'Normalization Factor (Coordinator Nodes)',
+                  'Regional Price Per NIH', 'End of Standard Support', 'End of Extended Support', 
+                  'Yearly Extended Support Cost']
+
+COST_COLUMN = 'Yearly Extended Support Cost'
+# Values of these columns are formatted in CSV output only, JSONL and Parquet output keep the raw numbers
+CSV_FORMATTERS = {COST_COLUMN: lambda cost: "${0:,.2f}".format(cost)}
+
+# Types of the numeric columns in Parquet output, all other columns are strings
+OUTPUT_COLUMN_TYPES = {'DedicatedMasterCount': int, 'Normalization Factor (Master Nodes)': float,
+                       'InstanceCount': int, 'Normalization Factor (Data Nodes)': float,
+                       'WarmCount': int, 'Normalization Factor (Ultrawarm Nodes)': float,
+                       'CoordinatorNodeCount': int, 'Normalization Factor (Coordinator Nodes)': float,
+                       'Regional Price Per NIH': float, 'Yearly Extended Support Cost': float}
+
+
+def get_client_credentials(account_id_, payer_account_, assume_role=MEMBER_ACCOUNT_ROLE_NAME):
+    """
+    Return the credential keyword arguments for a boto3 client in the given account.
+    The payer account uses the default credentials, linked accounts use the cached credentials of the custom role.
+    """
+    if account_id_ == payer_account_:
+        return {}
+    credentials = CREDENTIAL_CACHE.get_credentials(account_id_, assume_role)
+    return {
+        'aws_access_key_id': credentials['AccessKeyId'],
+        'aws_secret_access_key': credentials['SecretAccessKey'],
+        'aws_session_token': credentials['SessionToken'],
+    }
+
+def get_boto3_client(service_name, account_id_, payer_account_, region_, assume_role=MEMBER_ACCOUNT_ROLE_NAME):
     if account_id_ == payer_account_:
-        LOGGER.debug("Running for Payer account, returning aos boto3 client")
-        aos_client = boto3.client('opensearch', region_name=region_)
+        LOGGER.debug('Running for Payer account, returning %s boto3 client', service_name)
     else:
-        LOGGER.debug("Running for Linked account, assuming custom role and returning opensearch boto3 client after extracting credentials")
-        sts_client = boto3.client('sts')
-        partition = sts_client.meta.partition
-        assumed_role_object = sts_client.assume_role(
-            RoleArn=f'arn:{partition}:iam::{account_id_}:role/{assume_role}',
-            RoleSessionName=f'AssumeRoleSession{uuid.uuid4()}'
-        )
-        credentials = assumed_role_object['Credentials']
-        aos_client = boto3.client(
-            'opensearch',
-            region_name=region_,
-            aws_access_key_id=credentials['AccessKeyId'],
-            aws_secret_access_key=credentials['SecretAccessKey'],
-            aws_session_token=credentials['SessionToken'],
-        )
-    return aos_client
+        LOGGER.debug('Running for Linked account, using cached credentials of custom role and returning %s boto3 client', service_name)
+    credentials = get_client_credentials(account_id_, payer_account_, assume_role)
+    return CLIENT_FACTORY.get_client(service_name, region_, account_id_, credentials)
+
+def get_aos_client(account_id_, payer_account_, region_, assume_role=MEMBER_ACCOUNT_ROLE_NAME):
+    return get_boto3_client('opensearch', account_id_, payer_account_, region_, assume_role)
+
+def get_enabled_regions(accounts, caller_account, max_workers, check_regions=True, cache_file=ENABLED_REGIONS_CACHE_FILE):
+    """
+    Discovery phase - return a map of account ID to the regions of the scan that are enabled in that account
+    """
+    if not check_regions:
+        return {account: list(SCANNER.regions) for account in accounts}
+
+    regions_cache = RegionEnablementCache(cache_file=cache_file)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {account: executor.submit(regions_cache.get_enabled_regions, account, list(SCANNER.regions),
+                                            lambda account=account: get_boto3_client('account', account, caller_account, None))
+                   for account in accounts}
+        enabled_regions = {account: future.result() for account, future in futures.items()}
+    regions_cache.save()
+
+    skipped = sum(len(SCANNER.regions) - len(regions) for regions in enabled_regions.values())
+    LOGGER.info(f'Region enablement check: skipping {skipped} (account, region) pairs with regions that are not enabled')
+    return enabled_regions
 
 def get_aos_domains(aos_client):
     aos_domains = []
@@ -111,169 +147,272 @@ def get_aos_domains(aos_client):
         raise err
     return aos_domains
 
-def get_opensearch_extended_support_instances(account_id, caller_account):
-    global AOS_INSTANCE_MAPPING
-    global AOS_EXTENDED_SUPPORT_VERSIONS
+def get_extended_support_instance(account_id, region, domain):
+    """
+    Return the inventory row (node types and counts, see cost_model.py) of a domain if its version is eligible
+    for extended support, otherwise None. The row is costed by the result writer, in batches.
+    """
     domain_keys = ['DomainName', 'ARN', 'EngineVersion']
+
+    # Hot path: log with arguments, so that the domain is only formatted if DEBUG is enabled
+    LOGGER.debug('Domain: %s', domain)
+    # Opensearch versions are of the format OpenSearch_X.Y, whereas Elasticsearch versions just return X.Y
+    aos_version = domain['EngineVersion']
+    if aos_version not in SCANNER.eligibility:
+        return None
+
+    shortlist_instance = {}
+    shortlist_instance['AccountId'] = account_id
+    shortlist_instance['Region'] = region
+    shortlist_instance['RegionName'] = SCANNER.regions[region]
+
+    domain_info = {key: domain[key] for key in domain_keys}
+    shortlist_instance.update(domain_info)
+
+    # Master nodes
+    if 'DedicatedMasterType' in domain['ClusterConfig']:
+        shortlist_instance['DedicatedMasterType'] = domain['ClusterConfig']['DedicatedMasterType']
+        shortlist_instance['DedicatedMasterCount'] = domain['ClusterConfig']['DedicatedMasterCount']
+    else:
+        shortlist_instance['DedicatedMasterType'] = NO_NODE_TYPE
+        shortlist_instance['DedicatedMasterCount'] = 0
+
+    # Data nodes
+    shortlist_instance['InstanceType'] = domain['ClusterConfig']['InstanceType']
+    shortlist_instance['InstanceCount'] = domain["ClusterConfig"]['InstanceCount']
+
+    # Ultrawarm nodes
+    if 'WarmType' in domain['ClusterConfig']:
+        shortlist_instance['WarmType'] = domain['ClusterConfig']['WarmType']
+        shortlist_instance['WarmCount'] = domain['ClusterConfig']['WarmCount']
+    else:
+        shortlist_instance['WarmType'] = NO_NODE_TYPE
+        shortlist_instance['WarmCount'] = 0
+
+    # Dedicated Cooridnator nodes
+    shortlist_instance['CoordinatorNodeType'] = NO_NODE_TYPE
+    shortlist_instance['CoordinatorNodeCount'] = 0
+    for option in domain['ClusterConfig'].get('NodeOptions', []):
+        if option['NodeType'] == 'coordinator':
+            shortlist_instance['CoordinatorNodeType'] = option['NodeConfig']['Type']
+            shortlist_instance['CoordinatorNodeCount'] = option['NodeConfig']['Count']
+            break
+        else:
+            LOGGER.debug('Unknown Coordinator NodeType: %s found in NodeOptions', option['NodeType'])
+
+    LOGGER.info('Instance: %s is eligible for extended support as its version is: %s', shortlist_instance['DomainName'], shortlist_instance['EngineVersion'])
+    return shortlist_instance
+
+def get_cost_model():
+    """
+    Return the cost model of the scan, built from the local caches of the scanner context
+    """
+    return CostModel(SCANNER.normalization, SCANNER.eligibility, SCANNER.pricing)
+
+def get_opensearch_extended_support_instances(account_id, caller_account, region):
+    """
+    Return the Opensearch domains eligible for extended support in a single (account, region) unit
+    """
     opensearch_extended_support_instances = []
 
     #### OVERRIDE - FOR TESTING ###
-    #REGIONS = {'us-east-1':'US East (N. Virginia)', 'us-west-2': 'US West (Oregon)', 'eu-west-1': 'Europe (Ireland)'}
+    #SCANNER.regions = {'us-east-1':'US East (N. Virginia)', 'us-west-2': 'US West (Oregon)', 'eu-west-1': 'Europe (Ireland)'}
     #### OVERRIDE - FOR TESTING ###
 
-    for region in REGIONS:
-        LOGGER.info(f'Running for account {account_id} in region {region}')
+    LOGGER.info('Running for account %s in region %s', account_id, region)
+    with METRICS.measure('get_aos_client', account_id, region):
         aos_client = get_aos_client(account_id, caller_account, region)
-        
-        try: 
-            aos_domains = get_aos_domains(aos_client)
-            LOGGER.info(f'Found {len(aos_domains)} OpenSearch domains in account {account_id} in region {region}')
-
-            # Need to chunk in group of 5s otherwise describe_domains API throws an error - 
-            # 'Please provide a maximum of 5 domain names to describe.'
-            LOGGER.debug("Getting domain details in chunks of 5")
-            for i in range(0, len(aos_domains), 5):
-                domain_names = [domain['DomainName'] for domain in aos_domains[i:i+5]]
-                LOGGER.debug(f'Next chunk of 5 Domain names: {domain_names}')
-                domain_details = aos_client.describe_domains(DomainNames=domain_names)
-
-                for domain in domain_details['DomainStatusList']:
-                    LOGGER.debug(f'Domain: {domain}')
-                    # Opensearch versions are of the format OpenSearch_X.Y, whereas Elasticsearch versions just return X.Y
-                    aos_version = domain['EngineVersion']
-                    if is_extended_support_eligible(aos_version):
-                        shortlist_instance = {}
-                        shortlist_instance['AccountId'] = account_id
-                        shortlist_instance['Region'] = region
-                        shortlist_instance['RegionName'] = REGIONS[region]
-
-                        domain_info = {key: domain[key] for key in domain_keys}
-                        shortlist_instance.update(domain_info)
-
-                        # Master nodes
-                        if 'DedicatedMasterType' in domain['ClusterConfig']:
-                            shortlist_instance['DedicatedMasterType'] = domain['ClusterConfig']['DedicatedMasterType']
-                            shortlist_instance['DedicatedMasterCount'] = domain['ClusterConfig']['DedicatedMasterCount']
-
-                            # Handle the case where an opensearch instance type is not found in aos_instance_mapping.json (perhaps its a new family/size added)
-                            # We will just regenrate the entire mapping by scrapping the AWS Documentation HTML page. 
-                            master_instance_size = shortlist_instance['DedicatedMasterType'].split('.')[1]
-                            if master_instance_size not in AOS_INSTANCE_MAPPING:
-                                LOGGER.error(f'Instance type {shortlist_instance["DedicatedMasterType"]} not found in aos_instance_mapping.json. Regenerating json file from AWS documentation')
-                                AOS_INSTANCE_MAPPING = get_aos_instance_mapping()
-                                LOGGER.info(f'Updated AOS Instance Mapping: {AOS_INSTANCE_MAPPING}')
-                            shortlist_instance['Normalization Factor (Master Nodes)'] = AOS_INSTANCE_MAPPING[master_instance_size]
-                        else:
-                            shortlist_instance['DedicatedMasterType'] = 'N/A'
-                            shortlist_instance['DedicatedMasterCount'] = 0
-                            shortlist_instance['Normalization Factor (Master Nodes)'] = 0
-
-                        # Data nodes
-                        shortlist_instance['InstanceType'] = domain['ClusterConfig']['InstanceType']
-                        shortlist_instance['InstanceCount'] = domain["ClusterConfig"]['InstanceCount']
-                        
-                        instance_size = shortlist_instance['InstanceType'].split('.')[1]
-                        if instance_size not in AOS_INSTANCE_MAPPING:
-                            LOGGER.error(f'Instance type {shortlist_instance["InstanceType"]} not found in aos_instance_mapping.json. Regenerating json file from AWS documentation')
-                            AOS_INSTANCE_MAPPING = get_aos_instance_mapping()
-                            LOGGER.info(f'Updated AOS Instance Mapping: {AOS_INSTANCE_MAPPING}')
-                        shortlist_instance['Normalization Factor (Data Nodes)'] = AOS_INSTANCE_MAPPING[instance_size]
-
-                        # Ultrawarm nodes
-                        if 'WarmType' in domain['ClusterConfig']:
-                            shortlist_instance['WarmType'] = domain['ClusterConfig']['WarmType']
-                            shortlist_instance['WarmCount'] = domain['ClusterConfig']['WarmCount']
-                            uw_instance_size = shortlist_instance['WarmType'].split('.')[1]
-                            if uw_instance_size not in AOS_INSTANCE_MAPPING:
-                                LOGGER.error(f'Instance type {shortlist_instance["WarmType"]} not found in aos_instance_mapping.json. Regenerating json file from AWS documentation')
-                                AOS_INSTANCE_MAPPING = get_aos_instance_mapping()
-                                LOGGER.info(f'Updated AOS Instance Mapping: {AOS_INSTANCE_MAPPING}')
-                            shortlist_instance['Normalization Factor (Ultrawarm Nodes)'] = AOS_INSTANCE_MAPPING[uw_instance_size]
-                        else:
-                            shortlist_instance['WarmType'] = 'N/A'
-                            shortlist_instance['WarmCount'] = 0
-                            shortlist_instance['Normalization Factor (Ultrawarm Nodes)'] = 0
-
-                        # Dedicated Cooridnator nodes
-                        if "NodeOptions" in domain['ClusterConfig']:
-                            for option in  domain['ClusterConfig']['NodeOptions']:
-                                if option['NodeType'] == 'coordinator':
-                                    shortlist_instance['CoordinatorNodeType'] = option['NodeConfig']['Type']
-                                    shortlist_instance['CoordinatorNodeCount'] = option['NodeConfig']['Count']
-                                    coordinator_instance_size = shortlist_instance['CoordinatorNodeType'].split('.')[1]
-                                    if coordinator_instance_size not in AOS_INSTANCE_MAPPING:
-                                        LOGGER.error(f'Instance type {shortlist_instance["CoordinatorNodeType"]} not found in aos_instance_mapping.json. Regenerating json file from AWS documentation')
-                                        AOS_INSTANCE_MAPPING = get_aos_instance_mapping()
-                                        LOGGER.info(f'Updated AOS Instance Mapping: {AOS_INSTANCE_MAPPING}')
-                                    shortlist_instance['Normalization Factor (Coordinator Nodes)'] = AOS_INSTANCE_MAPPING[coordinator_instance_size]
-                                    break
-                                else:
-                                    LOGGER.debug(f"Unknown Coordinator NodeType: {option['NodeType']} found in NodeOptions")
-                        else:
-                            shortlist_instance['CoordinatorNodeType'] = 'N/A'
-                            shortlist_instance['CoordinatorNodeCount'] = 0
-                            shortlist_instance['Normalization Factor (Coordinator Nodes)'] = 0
-
-                        price_per_nih = AOS_EXTENDED_SUPPORT_PRICING[REGIONS[region]]['price_per_nih']
-                        shortlist_instance['Regional Price Per NIH'] = price_per_nih
-                        shortlist_instance['End of Standard Support'] = AOS_EXTENDED_SUPPORT_VERSIONS[aos_version]['end_of_standard_support']
-                        shortlist_instance['End of Extended Support'] = AOS_EXTENDED_SUPPORT_VERSIONS[aos_version]['end_of_extended_support']
-                        
-                        
-                        # Calculate the total Extended Support Cost - include Data nodes, Master nodes, Corordiantor nodes & Warm nodes
-                        ''' See this for an example of calculating extended support charges
-                            https://docs.aws.amazon.com/opensearch-service/latest/developerguide/what-is.html#calculating-charges
-                        '''
-                        shortlist_instance['Yearly Extended Support Cost'] = ((shortlist_instance['InstanceCount']        * shortlist_instance['Normalization Factor (Data Nodes)'])        # Data Nodes     
-                                                                            + (shortlist_instance['DedicatedMasterCount'] * shortlist_instance['Normalization Factor (Master Nodes)'])      # Master Nodes
-                                                                            + (shortlist_instance['CoordinatorNodeCount'] * shortlist_instance['Normalization Factor (Coordinator Nodes)']) # Coordinator Nodes
-                                                                            + (shortlist_instance['WarmCount']            * shortlist_instance['Normalization Factor (Ultrawarm Nodes)'])   # Ultrawarm Nodes
-                                                                            ) * (price_per_nih * 24 * 365)      # 24 hours * 365 days
-
-                        opensearch_extended_support_instances.append(shortlist_instance)
-                        LOGGER.info(f"Instance: {shortlist_instance['DomainName']} is eligible for extended support as its version is: {shortlist_instance['EngineVersion']}")
-        except ClientError as e:
-            LOGGER.info("Account: {} | Received Exception - message: {}".format(account_id, e))
-            LOGGER.info("Account: {} | Perhaps Region {} is not enabled for the account. Skipping region ...".format(account_id, region))
-            continue
-        except Exception as e:
-            LOGGER.info("Account: {} | Received Exception: {}".format(account_id, e))
+    
+    try: 
+        aos_domains = get_aos_domains(aos_client)
+        LOGGER.info('Found %d OpenSearch domains in account %s in region %s', len(aos_domains), account_id, region)
+
+        listed_names = [domain['DomainName'] for domain in aos_domains]
+        domain_names = listed_names
+        domains = {}
+        if SCANNER.domain_cache is not None:
+            # Incremental scan - only describe the domains that are new or whose cached description is too old
+            cached_domains, domain_names = SCANNER.domain_cache.split(account_id, region, listed_names)
+            domains.update((domain['DomainName'], domain) for domain in cached_domains)
+
+        # Need to chunk in groups of 5 (--describe-batch-size) otherwise describe_domains API throws an error -
+        # 'Please provide a maximum of 5 domain names to describe.'
+        LOGGER.debug("Getting domain details in chunks of %s", SCANNER.describe_batch_size)
+        for domain_status_list in describe_domains(aos_client, domain_names, SCANNER.describe_batch_size,
+                                                   SCANNER.describe_concurrency, SCANNER.describe_executor):
+            if SCANNER.domain_cache is not None:
+                SCANNER.domain_cache.put(account_id, region, domain_status_list)
+            domains.update((domain['DomainName'], domain) for domain in domain_status_list)
+
+        # Build the rows in the order the domains were listed
+        for domain_name in listed_names:
+            if domain_name in domains:
+                shortlist_instance = get_extended_support_instance(account_id, region, domains[domain_name])
+                if shortlist_instance is not None:
+                    opensearch_extended_support_instances.append(shortlist_instance)
+    except ClientError as e:
+        if not skip_region_on_error(e, account_id, region, SCANNER.fail_on_api_errors):
             raise e
+    except Exception as e:
+        LOGGER.info("Account: {} | Received Exception: {}".format(account_id, e))
+        raise e
 
-    LOGGER.debug(f'OpenSearch Extended Support Eligible Instances: \n {opensearch_extended_support_instances}')
-    
-    with lock:
-        save_to_csv(opensearch_extended_support_instances)
-        processed_accounts.append(account_id)
-        with open('.tmp_accounts_cache.json', 'w', encoding="utf-8") as f:
-            json.dump(processed_accounts, f)
-        
-        LOGGER.info(f'Saved eligible Opensearch domains in all regions from {account_id} to csv file, and added account to cache file')
-
-
-def save_to_csv(opensearch_extended_support_instances):
-    if len(opensearch_extended_support_instances) == 0:
-        LOGGER.info('No Opensearch domains are eligible for extended support. Not writing anything to CSV for this account')
-        return
+    return opensearch_extended_support_instances
 
-    df = pd.DataFrame.from_dict(opensearch_extended_support_instances)
-    df['Yearly Extended Support Cost'] = df['Yearly Extended Support Cost'].apply(lambda x: "${0:,.2f}".format(x))
-    
-    #print(df.head())
 
-    df.to_csv(outfile, mode='a', index=False, header=False)
+def scan_unit(account_id, caller_account, region):
+    """
+    Worker of the thread engine: scan an (account, region) unit, measured in the scan metrics
+    """
+    with METRICS.measure('scan_unit', account_id, region):
+        return get_opensearch_extended_support_instances(account_id, caller_account, region)
 
-def main():
-    global REGIONS
-    global AOS_INSTANCE_MAPPING
-    global AOS_EXTENDED_SUPPORT_VERSIONS
 
+def save_unit_results(account_id, region, opensearch_extended_support_instances):
+    """
+    Hand over the eligible domains found in an (account, region) unit to the result writer
+    """
+    LOGGER.debug('OpenSearch Extended Support Eligible Instances: \n %s', opensearch_extended_support_instances)
+    SCANNER.writer.submit(account_id, region, opensearch_extended_support_instances)
+
+
+def record_saved_units(units, output_size):
+    """
+    Called by the result writer once the rows of these units are flushed to the output file, of `output_size` bytes
+    """
+    for account_id, region, row_count in units:
+        SCANNER.checkpoint.record(account_id, region)
+        if row_count == 0:
+            LOGGER.info('No Opensearch domains are eligible for extended support in account %s in region %s, added unit to checkpoint file', account_id, region)
+        else:
+            LOGGER.info('Saved %d eligible Opensearch domains from account %s in region %s to output file, and added unit to checkpoint file', row_count, account_id, region)
+    # Before the next batch of rows is written, so that the units of every row in the output file are on disk
+    SCANNER.checkpoint.sync(output_size)
+
+def log_merged_totals(infiles, totals):
+    LOGGER.info(f'Merged {len(infiles)} shard outputs into {SCANNER.outfile}: {totals["rows"]} eligible domains in {totals["accounts"]} accounts '
+                f'and {totals["regions"]} regions, yearly extended support cost: {CSV_FORMATTERS[COST_COLUMN](totals["yearly_cost"])}')
+
+
+def merge_shard_outputs(infiles, output_format):
+    """
+    --merge-shards: merge the output files of shards scanned on several hosts (--shard i/N) into one output file
+    """
+    for infile in infiles:
+        if not infile.endswith(f'.{output_format}'):
+            raise ValidationException(f'Invalid input: {infile} is not a {output_format} file, use the --output-format of the shard scans')
+    log_merged_totals(infiles, merge_outputs(infiles, SCANNER.outfile, output_format, COST_COLUMN))
+
+
+def validate_sharded_scan(args):
+    if args.shard or args.generate_accounts_file:
+        raise ValidationException('Invalid input: cannot use --shards with --shard or --generate-accounts-file')
+    if args.shards < 1:
+        raise ValidationException('Invalid input: --shards must be at least 1')
+    # The shards would each write their own database, metrics and archive, which are not merged
+    if args.sqlite or args.metrics_dir or args.record:
+        raise ValidationException('Invalid input: cannot use --shards with --sqlite, --metrics-dir or --record, '
+                                  'use them with --shard i/N on each shard instead')
+
+
+def run_sharded_scan(args, account_pool):
+    """
+    --shards N: scan the account pool with N processes, one per shard (see sharding.py), and merge their outputs
+    into one output file. A Python process is bound to a single CPU, this spreads parsing and costing over N.
+    The account pool is listed once, here, and handed to every shard, so that the shards partition the same pool
+    even if the accounts of the organization change during the scan. It is None when retrying failed units, each
+    shard then retries the units of its own dead letter file.
+    """
+    # The shards run with the same arguments, except --shards
+    argv = sys.argv[1:]
+    for i, arg in enumerate(argv):
+        if arg == '--shards':
+            argv = argv[:i] + argv[i + 2:]
+            break
+        if arg.startswith('--shards='):
+            argv = argv[:i] + argv[i + 1:]
+            break
+    if not args.replay:
+        # Refresh the pricing snapshot once, and have the shards read it offline, so that they do not each fetch the
+        # pricing page (e.g. with --pricing-ttl 0)
+        pricing = SCANNER.pricing
+        LOGGER.debug('Extended support pricing available for %d regions', len(pricing))
+        if not args.offline:
+            argv += ['--offline']
+
+    if account_pool is None:
+        manifests = run_shards(args.shards, os.path.abspath(__file__), argv)
+    else:
+        write_accounts_to_file(account_pool, SHARD_ACCOUNTS_FILE)
+        try:
+            manifests = run_shards(args.shards, os.path.abspath(__file__), argv + ['--shard-accounts-file', SHARD_ACCOUNTS_FILE])
+        finally:
+            # Listed again by the next run, even if a shard failed
+            os.remove(SHARD_ACCOUNTS_FILE)
+
+    infiles = [manifest['outfile'] for manifest in manifests]
+    log_merged_totals(infiles, merge_outputs(infiles, SCANNER.outfile, args.output_format, COST_COLUMN))
+    for infile in infiles:
+        os.remove(infile)
+    remove_shard_manifests(args.shards)
+
+
+def main():
+    args = parse_args()
+    # Before anything is logged, so that every record goes through the configured handler
+    configure_logging(args.log_level, args.log_format, args.log_queue, args.shard)
     LOGGER.info("="*25)
     LOGGER.info("Script Execution Started!")
 
-    args = parse_args()
-    sts_client = boto3.client('sts')
-    org_client = boto3.client('organizations')
+    SCANNER.pricing_snapshot_file = args.pricing_snapshot
+    SCANNER.pricing_ttl_hours = args.pricing_ttl
+    SCANNER.offline = args.offline
+    SCANNER.output_format = args.output_format
+    SCANNER.regions = get_aos_regions(args.regions_file)
+    if args.generate_regions_file:
+        write_regions_to_file(SCANNER.regions)
+        LOGGER.info(f'Saved Opensearch regions to file: regions.csv. Script will ignore any other inputs and exit.')
+        sys.exit(0)
+
+    if args.describe_batch_size < 1 or args.describe_concurrency < 1:
+        raise ValidationException('Invalid input: --describe-batch-size and --describe-concurrency must be at least 1')
+    SCANNER.describe_batch_size = args.describe_batch_size
+    SCANNER.describe_concurrency = args.describe_concurrency
+    SCANNER.fail_on_api_errors = args.strict or bool(args.dead_letter_file)
+
+    if args.merge_shards:
+        merge_shard_outputs(args.merge_shards, args.output_format)
+        return
+    if args.shards is not None:
+        validate_sharded_scan(args)
+
+    # Each shard has its own output file, checkpoint journal, caches and other files, so shards can run side by side
+    regions_cache_file, domain_cache_file = ENABLED_REGIONS_CACHE_FILE, DOMAIN_CACHE_FILE
+    shard = parse_shard(args.shard) if args.shard else None
+    if shard is not None:
+        SCANNER.outfile = shard_path(SCANNER.outfile, *shard)
+        SCANNER.checkpoint_file = shard_path(SCANNER.checkpoint_file, *shard)
+        regions_cache_file, domain_cache_file = shard_path(regions_cache_file, *shard), shard_path(domain_cache_file, *shard)
+        # Only the files a shard writes, a single --replay archive is replayed by every shard
+        for option in ('dead_letter_file', 'record', 'metrics_dir', 'sqlite'):
+            if getattr(args, option):
+                setattr(args, option, shard_path(getattr(args, option), *shard))
+
+    if args.record and args.replay:
+        raise ValidationException('Invalid input: cannot use --record with --replay')
+    if (args.record or args.replay) and args.incremental:
+        raise ValidationException('Invalid input: cannot use --incremental with --record or --replay, every domain must be described')
+    # Before any client is built, so that the calls of every client are recorded or replayed
+    if args.replay:
+        API_ARCHIVE.replay(args.replay)
+    elif args.record:
+        API_ARCHIVE.record(args.record)
+
+    # Concurrent calls per (service, region) are bounded by --max-per-region (and --describe-concurrency), so are the connections they need
+    max_per_region = args.max_per_region or args.max_workers
+    CLIENT_FACTORY.max_pool_connections = max_per_region * args.describe_concurrency
+    sts_client = CLIENT_FACTORY.get_client('sts')
+    org_client = CLIENT_FACTORY.get_client('organizations')
     LOGGER.info("Running with boto client region = %s", sts_client.meta.region_name)
     
     caller_account = sts_client.get_caller_identity()['Account']
@@ -281,19 +420,33 @@ def main():
     validate_if_being_run_by_payer_account(org_client, caller_account)
     LOGGER.info(f'Caller account: {caller_account}')
 
-    REGIONS = get_aos_regions(args.regions_file)
-    if args.generate_regions_file:
-        write_regions_to_file(REGIONS)
-        LOGGER.info(f'Saved Opensearch regions to file: regions.csv. Script will ignore any other inputs and exit.')
-        sys.exit(0)
-
     if args.generate_accounts_file:
         account_pool = get_all_org_accounts(org_client)
         write_accounts_to_file(account_pool)
+        API_ARCHIVE.close()
         LOGGER.info(f'Saved AWS Accounts in Organization to file: accounts.csv. Script will ignore any other inputs and exit.')
         sys.exit(0) 
 
-    if args.all:
+    failed_units = None
+    if args.shard_accounts_file:
+        # Account pool listed once by the `--shards` process, for all the shards
+        account_pool = read_accounts_from_file(args.shard_accounts_file)
+    elif args.retry_failed and args.shards is not None:
+        # Each shard retries the failed units of its own dead letter file
+        account_pool = None
+    elif args.retry_failed:
+        if not args.dead_letter_file:
+            raise ValidationException('Invalid input: --retry-failed needs the --dead-letter-file of the failed units')
+        if args.all or args.accounts or args.accounts_file:
+            raise ValidationException('Invalid input: cannot use --retry-failed with --all, --accounts or --accounts-file, '
+                                      'the units to scan come from the dead letter file')
+        failed_units, failed_outfile = read_failed_units(args.dead_letter_file)
+        if failed_outfile:
+            # Write the results of the retried units next to the results of the scan they failed in
+            SCANNER.outfile = f'{os.path.splitext(failed_outfile)[0]}-retry.{args.output_format}'
+        account_pool = list(dict.fromkeys(account for account, _ in failed_units))
+        LOGGER.info(f'Running in RETRY mode for the {len(failed_units)} failed (account, region) units in {args.dead_letter_file}')
+    elif args.all:
         LOGGER.info(f'Running in ORG mode for payer account: {caller_account}')
         account_pool = get_all_org_accounts(org_client)
         if args.exclude_accounts:
@@ -320,61 +473,146 @@ def main():
         LOGGER.info(f'Running in PAYER ACCOUNT mode for payer account: {caller_account}')
         account_pool = [caller_account]
 
-    LOGGER.info(f'Running in specific regions: {REGIONS}')
-
-    df = pd.DataFrame(columns=['AccountId', 'Region', 'RegionName', 
-                               'DomainName', 'ARN', 'EngineVersion', 
-                               'DedicatedMasterType', 'DedicatedMasterCount', 'Normalization Factor (Master Nodes)',
-                               'InstanceType', 'InstanceCount', 'Normalization Factor (Data Nodes)', 
-                               'WarmType', 'WarmCount', 'Normalization Factor (Ultrawarm Nodes)',
-                               'CoordinatorNodeType', 'CoordinatorNodeCount', 'Normalization Factor (Coordinator Nodes)',
-                               'Regional Price Per NIH', 'End of Standard Support', 'End of Extended Support', 
-                               'Yearly Extended Support Cost'])
-    df.to_csv(outfile, index=False)
-    
-    # Check if the mapping file exists, if it does, read from it
-    try:
-        # Try to load AOS instane mapping json file
-        with open('utils/aos_instance_mapping.json', encoding="utf-8") as f:
-            AOS_INSTANCE_MAPPING = json.load(f)
-            LOGGER.debug(f'Read AOS instance mapping from file aos_instance_mapping.json')
-    except:
-        LOGGER.debug("No AOS instance mapping file found, getting mapping from AWS Pricing page")
-        AOS_INSTANCE_MAPPING = get_aos_instance_mapping()
-
-    # Check if the extended support file exists, if it does, read from it
+    if args.shards is not None:
+        run_sharded_scan(args, account_pool)
+        return
+    if shard is not None:
+        account_pool = shard_accounts(account_pool, *shard)
+        LOGGER.info(f'Running shard {args.shard} with {len(account_pool)} accounts: {account_pool}')
+
+    LOGGER.info(f'Running in specific regions: {SCANNER.regions}')
+
+    if API_ARCHIVE.pricing is not None:
+        # Cost the replayed domains with the prices of the recorded scan
+        SCANNER.pricing = API_ARCHIVE.pricing
+    # Build the local caches (pricing, instance mapping, extended support versions) before scanning
+    pricing = SCANNER.pricing
+    instance_mapping = SCANNER.instance_mapping
+    LOGGER.debug('Extended support pricing available for %d regions', len(pricing))
+    API_ARCHIVE.record_pricing(pricing)
+    LOGGER.debug('Normalization factors available for %d instance sizes', len(instance_mapping))
+    # Report invalid extended support versions, or versions that drifted from the built-in mapping, up front
+    SCANNER.eligibility.report(get_aos_extended_support_mapping())
+
+    checkpoint = SCANNER.checkpoint
+    resume = bool(checkpoint.outfile) and os.path.exists(stream_path(checkpoint.outfile, args.output_format))
+    if resume:
+        # Resuming an interrupted run - keep appending to its output file
+        if not checkpoint.outfile.endswith(f'.{args.output_format}'):
+            raise ValidationException(f'The interrupted run being resumed writes to {checkpoint.outfile}, '
+                                      f'run it again with the same --output-format')
+        SCANNER.outfile = checkpoint.outfile
+        LOGGER.info(f'Resuming previous run, appending results to {SCANNER.outfile}')
+        resume = checkpoint.restore_output(stream_path(SCANNER.outfile, args.output_format))
+        if args.record:
+            LOGGER.warning(f'The API archive {args.record} only records the units that were not scanned before the interruption')
+    else:
+        checkpoint.set_outfile(SCANNER.outfile, new_scan_id())
+
+    store = None
+    if args.sqlite:
+        store = ResultsStore(args.sqlite)
+        store.start_scan(checkpoint.scan_id or new_scan_id(), SCANNER.outfile)
+    # Scanning only collects the inventory of the eligible domains, the writer costs them in batches
+    SCANNER.writer = ResultWriter(SCANNER.outfile, OUTPUT_COLUMNS, args.output_format, resume=resume,
+                                  on_flush=record_saved_units, transform=get_cost_model().price_rows, csv_formatters=CSV_FORMATTERS,
+                                  column_types=OUTPUT_COLUMN_TYPES, store=store)
+
+    if args.incremental:
+        SCANNER.domain_cache = DomainCache(cache_file=domain_cache_file, ttl_hours=args.domain_cache_ttl)
+
+    # Fan out (account, region) units, skipping the ones already in the checkpoint journal
+    if failed_units is not None:
+        units = [unit for unit in failed_units if unit not in checkpoint]
+    else:
+        # The enabled regions of a recorded or replayed scan are looked up (or replayed), never read from the on-disk cache
+        enabled_regions = get_enabled_regions(account_pool, caller_account, args.max_workers, 
+                                              check_regions=not args.skip_region_check,
+                                              cache_file=None if API_ARCHIVE.mode else regions_cache_file)
+        units = [(account, region) for account in account_pool for region in enabled_regions[account]
+                 if (account, region) not in checkpoint]
+
+    # With a dead letter file, failed units are recorded there and the scan carries on, otherwise the first failure aborts the scan
+    dead_letters = DeadLetterFile(args.dead_letter_file, SCANNER.outfile) if args.dead_letter_file else None
+    on_error = dead_letters.record if dead_letters is not None else None
+
+    # Catch a thread's exceptions, if any, in the main thread
     try:
-        # Try to load AOS extended support dates json file
-        with open('utils/extended_support_versions.json', encoding="utf-8") as f:
-            AOS_EXTENDED_SUPPORT_VERSIONS = json.load(f)
-            LOGGER.debug(f'Read AOS extended support versions mapping from file extended_support_versions.json')
-    except:
-        LOGGER.debug("No AOS extended support versions mapping file found, getting mapping from AWS documentation")
-        AOS_EXTENDED_SUPPORT_VERSIONS = get_aos_extended_support_mapping()
-
-    with ThreadPoolExecutor(max_workers=100) as executor:
-        futures = { executor.submit(get_opensearch_extended_support_instances, account, caller_account) 
-                   for account in account_pool 
-                   if account not in processed_accounts }
-        # Catch a thread's exceptions, if any, in the main thread
-        # https://docs.python.org/3.7/library/concurrent.futures.html#concurrent.futures.as_completed
-        for future in as_completed(futures):
-            try:
-                future.result()
-            except Exception as e:
-                LOGGER.error(f"Error in processing account. Exception: {e}")
-                raise
-
+        if args.engine == 'async':
+            run_async_scan(units,
+                           lambda account: get_client_credentials(account, caller_account),
+                           get_extended_support_instance,
+                           save_unit_results,
+                           max_in_flight=args.max_workers,
+                           max_per_account=args.max_per_account,
+                           max_per_region=max_per_region,
+                           domain_cache=SCANNER.domain_cache,
+                           describe_batch_size=args.describe_batch_size,
+                           describe_concurrency=args.describe_concurrency,
+                           fail_on_api_errors=SCANNER.fail_on_api_errors,
+                           on_error=on_error)
+        else:
+            if args.describe_concurrency > 1:
+                SCANNER.describe_executor = ThreadPoolExecutor(max_workers=args.max_workers, thread_name_prefix='describe')
+            scheduler = ScanScheduler(max_workers=args.max_workers,
+                                      max_per_account=args.max_per_account,
+                                      max_per_region=max_per_region)
+            scheduler.run(units,
+                          lambda account, region: scan_unit(account, caller_account, region),
+                          save_unit_results,
+                          on_error=on_error)
+    except Exception as e:
+        LOGGER.error(f"Error in processing account. Exception: {e}")
+        # Keep the results of the units already scanned, the next run resumes from the checkpoint
+        SCANNER.writer.close(finalize=False)
+        if store is not None:
+            store.close()
+        if SCANNER.domain_cache is not None:
+            SCANNER.domain_cache.save()
+        if dead_letters is not None:
+            dead_letters.discard()
+        if args.metrics_dir:
+            METRICS.write(args.metrics_dir)
+        API_ARCHIVE.close()
+        raise
+    finally:
+        if SCANNER.describe_executor is not None:
+            SCANNER.describe_executor.shutdown(cancel_futures=True)
+    SCANNER.writer.close()
+    if dead_letters is not None:
+        dead_letters.close()
+    if store is not None:
+        store.complete_scan()
+        store.close()
+
+    CREDENTIAL_CACHE.log_stats()
+    CLIENT_FACTORY.log_stats()
+    CLIENT_FACTORY.close()
+    RATE_LIMITER.log_stats()
+    API_ARCHIVE.close()
+    API_ARCHIVE.log_stats()
+    SCANNER.normalization.log_unresolved()
+    METRICS.log_stats()
+    if args.metrics_dir:
+        METRICS.write(args.metrics_dir)
+    if SCANNER.domain_cache is not None:
+        SCANNER.domain_cache.log_stats()
+        SCANNER.domain_cache.save()
 
     LOGGER.info("="*25)
-    LOGGER.info(f'Saved Final results to CSV file: {outfile} and deleting cached data')
+    LOGGER.info(f'Saved Final results ({SCANNER.writer.rows_written} rows) to file: {SCANNER.outfile} and deleting cached data')
+    if dead_letters is not None and dead_letters.failed:
+        LOGGER.warning(f'{dead_letters.failed} (account, region) units failed and are not in the results, they are recorded in '
+                       f'{dead_letters.path}. Scan them with: --dead-letter-file {dead_letters.path} --retry-failed')
     LOGGER.info("Script Execution Completed Successfully!")
     LOGGER.info("="*25)
     
     # If we have reached this point, script has been successfully executed for all accounts & regions. 
-    # So, delete the .tmp_accounts_cache.json file.
-    if os.path.exists('.tmp_accounts_cache.json'):
-        os.remove('.tmp_accounts_cache.json')
+    # So, delete the checkpoint file.
+    checkpoint.remove()
+    if args.shard_manifest:
+        # Tells `--shards` that this shard completed, and where its results are
+        write_shard_manifest(*shard, SCANNER.outfile, SCANNER.writer.rows_written)
 
 def parse_args():
     arg_parser = argparse.ArgumentParser()
@@ -387,6 +625,40 @@ def parse_args():
     arg_parser.add_argument('--regions-file', help='Absolute path of the CSV file containing specific AWS regions to run the script against', type=str)
     arg_parser.add_argument('--exclude-accounts', help='comma separated list of AWS account IDs to be excluded, only applies when --all flag is used', type=str)
 
+    arg_parser.add_argument('--engine', help='Scan engine: a thread pool (default), or a single asyncio event loop (requires aiobotocore)', choices=['thread', 'async'], default='thread')
+    arg_parser.add_argument('--max-workers', help='Maximum number of (account, region) units scanned concurrently', type=int, default=100)
+    arg_parser.add_argument('--max-per-account', help='Maximum number of regions scanned concurrently in a single account', type=int, default=8)
+    arg_parser.add_argument('--max-per-region', help='Maximum number of accounts scanned concurrently in a single region (default: --max-workers, i.e. no cap)', type=int)
+    arg_parser.add_argument('--describe-batch-size', help='Domain names per DescribeDomains call (the API accepts at most 5)', type=int, default=DESCRIBE_BATCH_SIZE)
+    arg_parser.add_argument('--describe-concurrency', help='Maximum number of DescribeDomains calls in flight for a single (account, region)', type=int, default=DESCRIBE_CONCURRENCY)
+
+    arg_parser.add_argument('--output-format', help='Format of the output file: csv (default), jsonl, or parquet (requires pyarrow)', choices=OUTPUT_FORMATS, default='csv')
+
+    arg_parser.add_argument('--sqlite', help='Also save the results to this SQLite database, which keeps the results of every scan (see query_results.py)', type=str)
+
+    arg_parser.add_argument('--incremental', help='Only describe the domains that are new or whose cached description is older than --domain-cache-ttl', action='store_true')
+    arg_parser.add_argument('--domain-cache-ttl', help='Hours before a cached domain description is refreshed in incremental scans', type=float, default=DOMAIN_CACHE_TTL_HOURS)
+
+    arg_parser.add_argument('--dead-letter-file', help='Record the (account, region) units that fail, including on API errors such as AccessDenied, in this JSONL file and carry on scanning, instead of aborting the scan', type=str)
+    arg_parser.add_argument('--strict', help='Fail the scan on API errors such as AccessDenied in a region, instead of skipping the region', action='store_true')
+    arg_parser.add_argument('--retry-failed', help='Only scan the failed units recorded in --dead-letter-file', action='store_true')
+    arg_parser.add_argument('--metrics-dir', help='Write the call counts, latency histograms, throttles and errors of the scan to metrics.json and metrics.prom (Prometheus textfile) in this directory', type=str)
+    arg_parser.add_argument('--record', help='Record the responses of every AWS API call of the scan to this gzip compressed archive', type=str)
+    arg_parser.add_argument('--replay', help='Replay the scan recorded in this archive (--record), without calling AWS', type=str)
+    arg_parser.add_argument('--shards', help='Scan the account pool with this many processes, one per shard of the accounts, and merge their outputs', type=int)
+    arg_parser.add_argument('--shard', help='Only scan the accounts of shard i of N (i/N, e.g. 0/4), to scan an organization from several hosts', type=str)
+    arg_parser.add_argument('--shard-manifest', help=argparse.SUPPRESS, action='store_true')
+    arg_parser.add_argument('--shard-accounts-file', help=argparse.SUPPRESS, type=str)
+    arg_parser.add_argument('--merge-shards', help='Merge the output files of the shards scanned with --shard into one output file, and exit', nargs='+')
+    arg_parser.add_argument('--log-level', help='Lowest level of the messages logged', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'], default='INFO')
+    arg_parser.add_argument('--log-format', help='Format of the log messages: text (default), or one JSON object per line', choices=LOG_FORMATS, default='text')
+    arg_parser.add_argument('--log-queue', help='Log through a queue written to stdout by a background thread, so that worker threads never wait on logging', action='store_true')
+    arg_parser.add_argument('--skip-region-check', help='Scan all regions, without first checking which opt-in regions are enabled in each account', action='store_true')
+
+    arg_parser.add_argument('--pricing-snapshot', help='Path of the local snapshot of the Opensearch extended support pricing', type=str, default=PRICING_SNAPSHOT_FILE)
+    arg_parser.add_argument('--pricing-ttl', help='Hours before the pricing snapshot is checked against the Opensearch pricing page again', type=float, default=PRICING_SNAPSHOT_TTL_HOURS)
+    arg_parser.add_argument('--offline', help='Use the pricing snapshot only, never fetch the Opensearch pricing page', action='store_true')
+
     arg_parser.add_argument('--generate-accounts-file', help='Creates a `accounts.csv` CSV file containing all AWS accounts in the AWS Organization', action='store_true')
     arg_parser.add_argument('--generate-regions-file', help='Creates a `regions.csv` CSV file containing all AWS regions', action='store_true')
 
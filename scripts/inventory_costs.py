@@ -0,0 +1,282 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Work on a saved inventory of eligible domains, without scanning again or calling any AWS API.
+
+The inventory is read from a previous output file of `find_aos_extended_support_instances.py` (CSV, JSONL or
+Parquet), or from the domain cache of incremental scans (`.domain_cache.json`).
+
+    python inventory_costs.py reprice "output/aos_extended_support_instances-2025-01-06 09-00.csv"
+    python inventory_costs.py reprice .domain_cache.json --output-format parquet
+    python inventory_costs.py project .domain_cache.json --from 2025-01
+    python inventory_costs.py simulate .domain_cache.json --scenario "upgrade version=Elasticsearch_6.* region=eu-west-1 by=2025-03"
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import logging
+import argparse
+
+import find_aos_extended_support_instances as scanner
+from utils.utils import ValidationException
+from utils.log import configure_logging
+from utils.aos_mappings import get_aos_regions
+from utils.cost_model import INVENTORY_COLUMNS, NODE_COLUMNS, to_records
+from utils.result_writer import ResultWriter, OUTPUT_FORMATS
+from utils.pricing_snapshot import PRICING_SNAPSHOT_FILE
+from utils.projection import project_monthly_costs
+from utils.simulator import Scenario, UpgradeSimulator
+
+INPUT_FORMATS = OUTPUT_FORMATS + ['domain-cache']
+COST_COLUMN = 'Yearly Extended Support Cost'
+
+
+def format_cost(cost):
+    # Rounded to cents first, so that float noise around zero is not shown as -$0.00
+    cost = round(cost, 2)
+    return ('-' if cost < 0 else '') + "${0:,.2f}".format(abs(cost))
+
+
+def detect_input_format(path):
+    extension = os.path.splitext(path)[1].lstrip('.')
+    if extension in OUTPUT_FORMATS:
+        return extension
+    if extension == 'json':
+        return 'domain-cache'
+    raise ValidationException(f'Cannot tell the format of {path} from its extension, use --input-format')
+
+
+def read_saved_output(path, input_format):
+    """
+    Return the inventory of a previous output file, with its yearly cost column (as numbers) when it has one
+    """
+    import pandas as pd
+
+    if input_format == 'csv':
+        # Keep every value as a string, e.g. account ids with leading zeros, and the N/A node types
+        frame = pd.read_csv(path, dtype=str, keep_default_na=False)
+    elif input_format == 'jsonl':
+        with open(path, encoding="utf-8") as f:
+            frame = pd.DataFrame.from_records([json.loads(line) for line in f if line.strip()])
+    else:
+        try:
+            frame = pd.read_parquet(path)
+        except ImportError as err:
+            raise ValidationException('Reading Parquet needs the pyarrow package. Install it with `pip install pyarrow`') from err
+
+    missing = [column for column in INVENTORY_COLUMNS if column not in frame.columns]
+    if missing:
+        raise ValidationException(f'{path} is not an output file of the scanner, it has no columns {missing}')
+
+    inventory = frame[INVENTORY_COLUMNS].copy()
+    for _, count_column, _ in NODE_COLUMNS:
+        inventory[count_column] = pd.to_numeric(inventory[count_column], errors='coerce').fillna(0).astype('int64')
+    if COST_COLUMN in frame.columns:
+        # CSV output has formatted costs, e.g. "$1,234.56"
+        inventory[COST_COLUMN] = pd.to_numeric(frame[COST_COLUMN].astype(str).str.replace(r'[$,]', '', regex=True), errors='coerce')
+    return inventory
+
+
+def read_domain_cache(path):
+    """
+    Return the inventory of the domains in the domain cache whose version is eligible for extended support
+    """
+    import pandas as pd
+
+    try:
+        with open(path, encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError) as err:
+        raise ValidationException(f'Cannot read the domain cache {path}: {err}') from err
+
+    scanner.SCANNER.regions = get_aos_regions(None)
+    rows = []
+    for arn, entry in cache.items():
+        _, _, _, region, account_id, _ = arn.split(':', 5)
+        row = scanner.get_extended_support_instance(account_id, region, entry['domain'])
+        if row is not None:
+            rows.append(row)
+    return pd.DataFrame.from_records(rows, columns=INVENTORY_COLUMNS)
+
+
+def load_inventory(args):
+    input_format = args.input_format or detect_input_format(args.inventory)
+    if not os.path.exists(args.inventory):
+        raise ValidationException(f'Inventory {args.inventory} not found')
+    if input_format == 'domain-cache':
+        return read_domain_cache(args.inventory), input_format
+    return read_saved_output(args.inventory, input_format), input_format
+
+
+def use_local_pricing(args):
+    """
+    Cost with the local pricing snapshot only, the pricing page is never fetched
+    """
+    scanner.SCANNER.pricing_snapshot_file = args.pricing_snapshot
+    scanner.SCANNER.offline = True
+
+
+def load_priced_inventory(args):
+    """
+    Return the inventory as read, the inventory costed with the local files and pricing snapshot, and the input format
+    """
+    inventory, input_format = load_inventory(args)
+    use_local_pricing(args)
+    priced = scanner.get_cost_model().price(inventory[INVENTORY_COLUMNS])
+    scanner.SCANNER.normalization.log_unresolved()
+    return inventory, priced, input_format
+
+
+def default_outfile(args, input_format, suffix, output_format):
+    """
+    Output files are written next to the inventory, or in the output directory for the domain cache
+    """
+    if input_format == 'domain-cache':
+        scanner.SCANNER.output_format = output_format
+        base = os.path.splitext(scanner.SCANNER.outfile)[0]
+    else:
+        base = os.path.splitext(args.inventory)[0]
+    return f'{base}-{suffix}.{output_format}'
+
+
+def reprice(args):
+    inventory, priced, input_format = load_priced_inventory(args)
+
+    output_format = args.output_format or (input_format if input_format in OUTPUT_FORMATS else 'csv')
+    outfile = args.output or default_outfile(args, input_format, 'repriced', output_format)
+    writer = ResultWriter(outfile, scanner.OUTPUT_COLUMNS, output_format, csv_formatters=scanner.CSV_FORMATTERS,
+                          column_types=scanner.OUTPUT_COLUMN_TYPES)
+    writer.submit(None, None, to_records(priced))
+    writer.close()
+
+    new_total = priced[COST_COLUMN].sum()
+    print(f'Repriced {len(priced)} domains from {args.inventory} to {outfile}')
+    if COST_COLUMN in inventory.columns:
+        old_total = inventory[COST_COLUMN].sum()
+        changed = int(((priced[COST_COLUMN] - inventory[COST_COLUMN]).abs() >= 0.005).sum())
+        print(f'{changed} domains changed cost')
+        print(f'Yearly extended support cost: {format_cost(old_total)} -> {format_cost(new_total)} ({format_cost(new_total - old_total)})')
+    else:
+        print(f'Yearly extended support cost: {format_cost(new_total)}')
+
+
+def print_totals(title, totals, top):
+    print(f"{title:<24} {'projected cost':>16}")
+    for key, cost in totals.sort_values(ascending=False).head(top).items():
+        print(f"{str(key):<24} {format_cost(cost):>16}")
+    if len(totals) > top:
+        print(f'... {len(totals) - top} more, see the output file')
+    print()
+
+
+def project(args):
+    _, priced, input_format = load_priced_inventory(args)
+    spend = project_monthly_costs(priced, args.from_month, args.months)
+
+    # Time series of the spend per (account, region) and month
+    outfile = args.output or default_outfile(args, input_format, 'projection', 'csv')
+    series = spend.stack().rename('Projected Extended Support Cost').round(2).reset_index()
+    series = series.rename(columns={series.columns[2]: 'Month'})
+    series[series['Projected Extended Support Cost'] > 0].to_csv(outfile, index=False)
+
+    print(f'Projected {len(priced)} domains from {spend.columns[0]} to {spend.columns[-1]}, saved monthly costs per account and region to {outfile}')
+    print()
+    monthly = spend.sum()
+    print(f"{'month':<24} {'projected cost':>16}")
+    for month, cost in monthly.items():
+        print(f"{month:<24} {format_cost(cost):>16}")
+    print()
+    print_totals('account', spend.sum(axis=1).groupby(level='AccountId').sum(), args.top)
+    print_totals('region', spend.sum(axis=1).groupby(level='Region').sum(), args.top)
+    print(f'Total projected extended support cost: {format_cost(monthly.sum())}')
+
+
+def read_scenarios(args):
+    lines = list(args.scenario or [])
+    if args.scenarios_file:
+        try:
+            with open(args.scenarios_file, encoding="utf-8") as f:
+                lines.extend(line for line in f if line.strip() and not line.lstrip().startswith('#'))
+        except OSError as err:
+            raise ValidationException(f'Cannot read the scenarios file {args.scenarios_file}: {err}') from err
+    if not lines:
+        raise ValidationException('No scenario given, use --scenario or --scenarios-file')
+    return [Scenario(line) for line in lines]
+
+
+def simulate(args):
+    scenarios = read_scenarios(args)
+    _, priced, _ = load_priced_inventory(args)
+    simulator = UpgradeSimulator(priced, scanner.SCANNER.normalization, scanner.SCANNER.eligibility, args.from_month)
+
+    start = time.perf_counter()
+    results = [(scenario, *simulator.evaluate(scenario)) for scenario in scenarios]
+    elapsed = time.perf_counter() - start
+
+    print(f'Extended support cost of {len(priced)} domains until the end of extended support: {format_cost(simulator.baseline)}')
+    print()
+    print(f"{'scenario':<60} {'domains':>8} {'avoided cost':>16} {'share':>7}")
+    for scenario, changed, avoided in results:
+        share = avoided / simulator.baseline if simulator.baseline else 0
+        print(f"{scenario.name[:60]:<60} {changed:>8} {format_cost(avoided):>16} {share:>7.1%}")
+    print()
+    print(f'Evaluated {len(scenarios)} scenarios in {elapsed:.2f}s')
+
+    if args.output:
+        with open(args.output, 'w', encoding="utf-8", newline='') as f:
+            writer = csv.writer(f, lineterminator='\n')
+            writer.writerow(['Scenario', 'Domains', 'Avoided Extended Support Cost'])
+            writer.writerows([scenario.name, changed, round(avoided, 2)] for scenario, changed, avoided in results)
+        print(f'Saved scenario results to {args.output}')
+
+
+def add_inventory_args(parser):
+    parser.add_argument('inventory', help='Previous output file (CSV, JSONL or Parquet), or the domain cache (.domain_cache.json)', type=str)
+    parser.add_argument('--input-format', help='Format of the inventory, by default from its file extension', choices=INPUT_FORMATS)
+    parser.add_argument('--pricing-snapshot', help='Path of the local snapshot of the Opensearch extended support pricing', type=str, default=PRICING_SNAPSHOT_FILE)
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description='Work on a saved inventory of the extended support cost estimator, without calling AWS')
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    reprice_parser = subparsers.add_parser('reprice', help='Cost the inventory again with the current instance mapping, support dates and pricing snapshot')
+    add_inventory_args(reprice_parser)
+    reprice_parser.add_argument('--output', help='Output file, by default next to the inventory with a -repriced suffix', type=str)
+    reprice_parser.add_argument('--output-format', help='Format of the output file, by default the format of the inventory', choices=OUTPUT_FORMATS)
+
+    project_parser = subparsers.add_parser('project', help='Project the extended support cost month by month, until the end of extended support')
+    add_inventory_args(project_parser)
+    project_parser.add_argument('--from', dest='from_month', help='First projected month (YYYY-MM), defaults to the current month from today', type=str)
+    project_parser.add_argument('--months', help='Number of projected months, defaults to the last end of extended support of the inventory', type=int)
+    project_parser.add_argument('--output', help='CSV file of the monthly costs per account and region, by default next to the inventory with a -projection suffix', type=str)
+    project_parser.add_argument('--top', help='Number of accounts and regions printed', type=int, default=10)
+
+    simulate_parser = subparsers.add_parser('simulate', help='Extended support cost avoided by upgrade and right-sizing scenarios')
+    add_inventory_args(simulate_parser)
+    simulate_parser.add_argument('--scenario', help='Scenario, e.g. "upgrade version=Elasticsearch_6.* region=eu-west-1 by=2025-03", can be repeated', action='append')
+    simulate_parser.add_argument('--scenarios-file', help='File with one scenario per line', type=str)
+    simulate_parser.add_argument('--from', dest='from_month', help='First month (YYYY-MM) of the avoided cost, defaults to the current month from today', type=str)
+    simulate_parser.add_argument('--output', help='Also save the scenario results to this CSV file', type=str)
+
+    return arg_parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    # Keep the per domain messages of the scanner and the pricing snapshot out of the command output
+    configure_logging(logging.WARNING)
+    commands = {'reprice': reprice, 'project': project, 'simulate': simulate}
+    try:
+        commands[args.command](args)
+    except ValidationException as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+"""
+Query the SQLite results store written by `find_aos_extended_support_instances.py --sqlite`.
+
+    python query_results.py --db results.db scans
+    python query_results.py --db results.db rollup --by account
+    python query_results.py --db results.db diff --from 2025-01-06T09:00:00Z
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+
+from utils.utils import ValidationException
+
+ROLLUP_COLUMNS = {
+    'account': 'account_id',
+    'region': 'region',
+    'engine-version': 'engine_version',
+    'end-of-standard-support': 'end_of_standard_support',
+}
+
+# Columns compared between two scans, to report the domains that changed
+DIFF_COLUMNS = ['engine_version', 'master_type', 'master_count', 'instance_type', 'instance_count',
+                'warm_type', 'warm_count', 'coordinator_type', 'coordinator_count', 'yearly_cost']
+
+
+def format_cost(cost):
+    # Rounded to cents first, so that float noise around zero is not shown as -$0.00
+    cost = round(cost or 0, 2)
+    return ('-' if cost < 0 else '') + "${0:,.2f}".format(abs(cost))
+
+
+def resolve_scan(conn, scan_id, before=None):
+    """
+    Return the given scan id, or if it is not given, the id of the latest completed scan (that started before `before`)
+    """
+    if scan_id:
+        if conn.execute('SELECT 1 FROM scans WHERE scan_id = ?', (scan_id,)).fetchone() is None:
+            raise ValidationException(f'Scan {scan_id} not found, run the `scans` command to list the scans')
+        return scan_id
+    if before is None:
+        row = conn.execute('SELECT MAX(scan_id) FROM scans WHERE completed_at IS NOT NULL').fetchone()
+    else:
+        row = conn.execute('SELECT MAX(scan_id) FROM scans WHERE completed_at IS NOT NULL AND scan_id < ?', (before,)).fetchone()
+    if row[0] is None:
+        raise ValidationException('Not enough completed scans in the results store')
+    return row[0]
+
+
+def list_scans(conn, args):
+    rows = conn.execute('''
+        SELECT s.scan_id, s.completed_at IS NOT NULL, COUNT(d.arn), SUM(d.yearly_cost)
+        FROM scans s LEFT JOIN domains d ON d.scan_id = s.scan_id
+        GROUP BY s.scan_id ORDER BY s.scan_id''').fetchall()
+    print(f"{'scan id':<22} {'completed':<10} {'domains':>8} {'yearly cost':>16}")
+    for scan_id, completed, domains, cost in rows:
+        print(f"{scan_id:<22} {'yes' if completed else 'no':<10} {domains:>8} {format_cost(cost):>16}")
+
+
+def rollup(conn, args):
+    scan_id = resolve_scan(conn, args.scan)
+    column = ROLLUP_COLUMNS[args.by]
+    # Domains of unresolved instance types have no cost (NULL), they are counted as 0
+    rows = conn.execute(f'''
+        SELECT COALESCE({column}, '-'), COUNT(*), COALESCE(SUM(yearly_cost), 0) FROM domains WHERE scan_id = ?
+        GROUP BY {column} ORDER BY SUM(yearly_cost) DESC''', (scan_id,)).fetchall()
+
+    print(f'Scan {scan_id}')
+    print(f"{args.by:<24} {'domains':>8} {'yearly cost':>16}")
+    for value, domains, cost in rows:
+        print(f"{value:<24} {domains:>8} {format_cost(cost):>16}")
+    print(f"{'total':<24} {sum(row[1] for row in rows):>8} {format_cost(sum(row[2] for row in rows)):>16}")
+
+
+def diff(conn, args):
+    to_scan = resolve_scan(conn, args.to_scan)
+    from_scan = resolve_scan(conn, args.from_scan, before=to_scan)
+
+    columns = ', '.join(['arn', 'account_id', 'region', 'domain_name'] + DIFF_COLUMNS)
+    query = f'SELECT {columns} FROM domains WHERE scan_id = ?'
+    old = {row['arn']: row for row in conn.execute(query, (from_scan,))}
+    new = {row['arn']: row for row in conn.execute(query, (to_scan,))}
+
+    print(f'Changes from scan {from_scan} to scan {to_scan}')
+    print(f"{'change':<8} {'account':<13} {'region':<15} {'domain':<28} {'yearly cost delta':>18}  details")
+    for arn in sorted(new.keys() | old.keys()):
+        before, after = old.get(arn), new.get(arn)
+        if before is None:
+            change, details = 'added', after['engine_version']
+        elif after is None:
+            change, details = 'removed', before['engine_version']
+        else:
+            changed = [column for column in DIFF_COLUMNS if before[column] != after[column]]
+            if not changed:
+                continue
+            change = 'changed'
+            details = ', '.join(f'{column}: {before[column]} -> {after[column]}' for column in changed if column != 'yearly_cost')
+        row = after or before
+        delta = ((after['yearly_cost'] or 0) if after else 0) - ((before['yearly_cost'] or 0) if before else 0)
+        print(f"{change:<8} {row['account_id']:<13} {row['region']:<15} {row['domain_name']:<28} {format_cost(delta):>18}  {details}")
+
+    old_total = sum(row['yearly_cost'] or 0 for row in old.values())
+    new_total = sum(row['yearly_cost'] or 0 for row in new.values())
+    print(f'Yearly extended support cost: {format_cost(old_total)} -> {format_cost(new_total)} ({format_cost(new_total - old_total)})')
+
+
+def parse_args():
+    arg_parser = argparse.ArgumentParser(description='Query the SQLite results store of the extended support cost estimator')
+    arg_parser.add_argument('--db', help='Path of the SQLite results store', type=str, required=True)
+    subparsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    subparsers.add_parser('scans', help='List the scans in the results store')
+
+    rollup_parser = subparsers.add_parser('rollup', help='Yearly extended support cost of a scan, grouped by a column')
+    rollup_parser.add_argument('--scan', help='Scan id, defaults to the latest completed scan', type=str)
+    rollup_parser.add_argument('--by', help='Column to group by', choices=list(ROLLUP_COLUMNS), default='account')
+
+    diff_parser = subparsers.add_parser('diff', help='Domains added, removed or changed between two scans')
+    diff_parser.add_argument('--from', dest='from_scan', help='Scan id to compare from, defaults to the completed scan before --to', type=str)
+    diff_parser.add_argument('--to', dest='to_scan', help='Scan id to compare to, defaults to the latest completed scan', type=str)
+
+    return arg_parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.db):
+        print(f'SQLite results store {args.db} not found', file=sys.stderr)
+        sys.exit(1)
+
+    conn = sqlite3.connect(args.db)
+    conn.row_factory = sqlite3.Row
+    commands = {'scans': list_scans, 'rollup': rollup, 'diff': diff}
+    try:
+        commands[args.command](conn, args)
+    except ValidationException as e:
+        print(e, file=sys.stderr)
+        sys.exit(1)
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    main()
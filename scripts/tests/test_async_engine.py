@@ -0,0 +1,101 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+import asyncio
+from types import SimpleNamespace
+from collections import defaultdict
+
+import pytest
+from botocore.hooks import HierarchicalEmitter
+from botocore.exceptions import ClientError
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils import async_engine
+
+
+class FakeSession:
+    """
+    aiobotocore session of OpenSearch clients whose ListDomainNames holds the unit for a while, and records the
+    most units ever running per account and per region
+    """
+
+    def __init__(self, denied_regions=()):
+        self.denied_regions = denied_regions
+        self.running = defaultdict(int)
+        self.max_running = defaultdict(int)
+
+    def create_client(self, service_name, region_name, config, account_id='payer', **credentials):
+        session = self
+
+        class Client:
+            meta = SimpleNamespace(events=HierarchicalEmitter(), region_name=region_name,
+                                   service_model=SimpleNamespace(service_name=service_name))
+
+            async def __aenter__(self):
+                return self
+
+            async def __aexit__(self, *exc_info):
+                return False
+
+            async def list_domain_names(self):
+                if region_name in session.denied_regions:
+                    raise ClientError({'Error': {'Code': 'AccessDeniedException', 'Message': 'Denied by SCP'}}, 'ListDomainNames')
+                keys = [('all', None), ('account', account_id), ('region', region_name)]
+                for key in keys:
+                    session.running[key] += 1
+                    session.max_running[key] = max(session.max_running[key], session.running[key])
+                await asyncio.sleep(0.005)
+                for key in keys:
+                    session.running[key] -= 1
+                return {'DomainNames': []}
+
+        return Client()
+
+
+def test_async_engine_honours_the_per_account_and_per_region_caps(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(async_engine, '_get_aiobotocore_session', lambda: (session, None))
+    units = [(f'{account:012d}', f'region-{region}') for account in range(10) for region in range(6)]
+    completed = []
+
+    async_engine.run_async_scan(units, lambda account: {'account_id': account}, lambda *args: None,
+                                lambda account, region, instances: completed.append((account, region)),
+                                max_in_flight=12, max_per_account=2, max_per_region=3)
+
+    assert sorted(completed) == sorted(units)
+    assert session.max_running[('all', None)] <= 12
+    assert max(count for (kind, _), count in session.max_running.items() if kind == 'account') == 2
+    assert max(count for (kind, _), count in session.max_running.items() if kind == 'region') == 3
+
+
+def scan_with_denied_region(monkeypatch, **kwargs):
+    session = FakeSession(denied_regions=['region-1'])
+    monkeypatch.setattr(async_engine, '_get_aiobotocore_session', lambda: (session, None))
+    units = [(f'{account:012d}', f'region-{region}') for account in range(3) for region in range(3)]
+    completed = []
+    async_engine.run_async_scan(units, lambda account: {'account_id': account}, lambda *args: None,
+                                lambda account, region, instances: completed.append((account, region)), **kwargs)
+    return units, completed
+
+
+def test_async_engine_skips_the_regions_with_api_errors_by_default(monkeypatch):
+    units, completed = scan_with_denied_region(monkeypatch)
+
+    # The units of the denied region complete without domains
+    assert sorted(completed) == sorted(units)
+
+
+def test_async_engine_fails_the_units_with_api_errors_when_asked_to(monkeypatch):
+    failed = []
+    units, completed = scan_with_denied_region(monkeypatch, fail_on_api_errors=True,
+                                               on_error=lambda account, region, error: failed.append((account, region)))
+
+    assert sorted(failed) == [unit for unit in units if unit[1] == 'region-1']
+    assert sorted(completed) == [unit for unit in units if unit[1] != 'region-1']
+
+    with pytest.raises(ClientError, match='AccessDeniedException'):
+        scan_with_denied_region(monkeypatch, fail_on_api_errors=True)
@@ -0,0 +1,92 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+import json
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils.checkpoint import CheckpointJournal
+from utils.result_writer import ResultWriter
+
+COLUMNS = ['AccountId', 'Region', 'DomainName']
+
+
+def unit_rows(account, region, domains):
+    return [{'AccountId': account, 'Region': region, 'DomainName': f'domain-{i}'} for i in range(domains)]
+
+
+def record_units(journal):
+    def on_flush(units, output_size):
+        for account, region, _ in units:
+            journal.record(account, region)
+        journal.sync(output_size)
+    return on_flush
+
+
+def scan(journal, outfile, units, resume, on_flush=None):
+    """
+    Write the rows of the units that are not in the journal, one writer flush per unit
+    """
+    writer = ResultWriter(outfile, COLUMNS, 'jsonl', resume=resume, on_flush=on_flush or record_units(journal), batch_size=1)
+    for account, region, domains in units:
+        if (account, region) not in journal:
+            writer.submit(account, region, unit_rows(account, region, domains))
+    writer.close()
+
+
+def read_rows(outfile):
+    with open(outfile, encoding="utf-8") as f:
+        return [tuple(json.loads(line).values()) for line in f]
+
+
+def test_resume_after_a_crash_between_the_output_fsync_and_the_journal_has_no_duplicate_or_missing_rows(tmp_path):
+    journal_file, outfile = str(tmp_path / 'checkpoint.jsonl'), str(tmp_path / 'output.jsonl')
+    units = [('111111111111', 'us-east-1', 3), ('111111111111', 'eu-west-1', 0), ('222222222222', 'us-east-1', 2),
+             ('222222222222', 'eu-west-1', 4)]
+
+    # First run: the first two units are saved and checkpointed
+    journal = CheckpointJournal(journal_file)
+    journal.set_outfile(outfile)
+    scan(journal, outfile, units[:2], resume=False)
+
+    # The rows of the third unit reach the output file, then the run is killed before its unit is in the journal,
+    # leaving a partially written journal line
+    scan(journal, outfile, units[2:3], resume=True, on_flush=lambda units, output_size: None)
+    journal.close()
+    with open(journal_file, 'a', encoding="utf-8") as f:
+        f.write('{"account": "2222222')
+    assert len(read_rows(outfile)) == 5
+
+    # Resumed run
+    journal = CheckpointJournal(journal_file)
+    assert journal.outfile == outfile
+    assert ('111111111111', 'us-east-1') in journal and ('111111111111', 'eu-west-1') in journal
+    assert ('222222222222', 'us-east-1') not in journal
+    assert journal.restore_output(outfile)
+    scan(journal, outfile, units, resume=True)
+    journal.close()
+
+    expected = [row for account, region, domains in units for row in (tuple(r.values()) for r in unit_rows(account, region, domains))]
+    assert sorted(read_rows(outfile)) == sorted(expected)
+    # The torn line was cut off, every journal line is a complete record
+    with open(journal_file, encoding="utf-8") as f:
+        assert all(json.loads(line) for line in f)
+
+
+def test_resume_before_any_unit_was_checkpointed_rewrites_the_output(tmp_path):
+    journal_file, outfile = str(tmp_path / 'checkpoint.jsonl'), str(tmp_path / 'output.jsonl')
+    journal = CheckpointJournal(journal_file)
+    journal.set_outfile(outfile)
+    scan(journal, outfile, [('111111111111', 'us-east-1', 2)], resume=False, on_flush=lambda units, output_size: None)
+    journal.close()
+
+    journal = CheckpointJournal(journal_file)
+    assert len(journal) == 0
+    assert not journal.restore_output(outfile)
+    scan(journal, outfile, [('111111111111', 'us-east-1', 2)], resume=False)
+    journal.close()
+
+    assert len(read_rows(outfile)) == 2
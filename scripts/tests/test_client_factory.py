@@ -0,0 +1,33 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils.client_factory import ClientFactory
+
+CREDENTIALS = {'aws_access_key_id': 'AKIDEXAMPLE', 'aws_secret_access_key': 'secret'}
+
+
+def test_botocore_clients_still_expose_the_endpoint_http_session():
+    # The connection pools are shared by swapping this private botocore attribute. If a botocore release renames
+    # it, the scan silently falls back to one connection pool per client: update the pin in requirements.txt
+    client = ClientFactory().get_client('opensearch', 'us-east-1', '111111111111', CREDENTIALS)
+
+    assert hasattr(client, '_endpoint')
+    assert hasattr(client._endpoint, 'http_session')
+
+
+def test_clients_of_the_same_service_and_region_share_one_connection_pool():
+    factory = ClientFactory()
+    clients = [factory.get_client('opensearch', region, account, CREDENTIALS)
+               for account in ('111111111111', '222222222222') for region in ('us-east-1', 'eu-west-1')]
+    factory.close()
+
+    assert clients[0]._endpoint.http_session is clients[2]._endpoint.http_session
+    assert clients[1]._endpoint.http_session is clients[3]._endpoint.http_session
+    assert clients[0]._endpoint.http_session is not clients[1]._endpoint.http_session
+    assert factory.clients_created == 4
@@ -0,0 +1,98 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+
+import pytest
+import pandas as pd
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils.utils import ValidationException
+from utils.eligibility import ExtendedSupportIndex
+from utils.normalization import NormalizationResolver, NO_NODE_TYPE
+from utils.cost_model import CostModel, INVENTORY_COLUMNS, _factorize, _take
+
+INSTANCE_MAPPING = {'medium': 2, 'large': 4, 'xlarge': 8, '2xlarge': 16}
+VERSIONS = {
+    'Elasticsearch_7.10': {'end_of_standard_support': '2025-11-07', 'end_of_extended_support': '2028-11-07'},
+    'OpenSearch_1.3': {'end_of_standard_support': '2025-11-07', 'end_of_extended_support': '2026-11-07'},
+}
+PRICING = {
+    'US East (N. Virginia)': {'price_per_nih': 0.0065},
+    'Europe (Ireland)': {'price_per_nih': 0.0072},
+}
+
+
+def make_model():
+    return CostModel(NormalizationResolver(dict(INSTANCE_MAPPING)), ExtendedSupportIndex(VERSIONS), PRICING)
+
+
+def domain(name, version='Elasticsearch_7.10', region_name='US East (N. Virginia)', data=('r6g.large.search', 3),
+           master=(NO_NODE_TYPE, None), warm=(NO_NODE_TYPE, None), coordinator=(NO_NODE_TYPE, None)):
+    return {'AccountId': '111111111111', 'Region': 'us-east-1', 'RegionName': region_name,
+            'DomainName': name, 'ARN': f'arn:{name}', 'EngineVersion': version,
+            'InstanceType': data[0], 'InstanceCount': data[1],
+            'DedicatedMasterType': master[0], 'DedicatedMasterCount': master[1],
+            'WarmType': warm[0], 'WarmCount': warm[1],
+            'CoordinatorNodeType': coordinator[0], 'CoordinatorNodeCount': coordinator[1]}
+
+
+def baseline_cost(price_per_nih, *nodes):
+    # price per normalized instance hour * 24 hours * 365 days * sum(node count * normalization factor)
+    return price_per_nih * 24 * 365 * sum(count * INSTANCE_MAPPING[size] for count, size in nodes)
+
+
+def test_factorize_and_take_round_trip_with_missing_values():
+    codes, uniques = _factorize(pd.Series(['r6g.large.search', None, 'm5.xlarge.search', 'r6g.large.search']))
+
+    assert uniques == ['r6g.large.search', 'm5.xlarge.search']
+    assert list(codes) == [0, -1, 1, 0]
+    values = _take(codes, [4, 8], missing_value=0)
+    assert list(values) == [4, 0, 8, 4]
+    # Values keep their Python type
+    assert all(type(value) is int for value in values)
+
+
+def test_price_matches_the_baseline_formula_for_every_node_role():
+    frame = make_model().price(pd.DataFrame.from_records([
+        domain('data-only'),
+        domain('all-roles', region_name='Europe (Ireland)', data=('r6g.2xlarge.search', 6),
+               master=('m6g.large.search', 3), warm=('ultrawarm1.medium.search', 2),
+               coordinator=('r6g.xlarge.search', 2)),
+    ], columns=INVENTORY_COLUMNS))
+
+    data_only, all_roles = frame.to_dict('records')
+    assert data_only['Yearly Extended Support Cost'] == pytest.approx(baseline_cost(0.0065, (3, 'large')))
+    assert all_roles['Yearly Extended Support Cost'] == pytest.approx(
+        baseline_cost(0.0072, (6, '2xlarge'), (3, 'large'), (2, 'medium'), (2, 'xlarge')))
+    assert (all_roles['Normalization Factor (Data Nodes)'], all_roles['Normalization Factor (Master Nodes)'],
+            all_roles['Normalization Factor (Ultrawarm Nodes)'], all_roles['Normalization Factor (Coordinator Nodes)']) == (16, 4, 2, 8)
+    assert data_only['Normalization Factor (Master Nodes)'] == 0 and data_only['DedicatedMasterCount'] == 0
+    assert all_roles['Regional Price Per NIH'] == 0.0072
+    assert all_roles['End of Extended Support'] == '2028-11-07'
+
+
+def test_unresolved_normalization_factor_gives_no_cost():
+    model = make_model()
+    rows = model.price_rows([domain('known'), domain('unknown', data=('r9z.48xlarge.search', 2)),
+                             domain('unknown-master', master=('r9z.48xlarge.search', 3))])
+
+    known, unknown, unknown_master = rows
+    assert known['Yearly Extended Support Cost'] == pytest.approx(baseline_cost(0.0065, (3, 'large')))
+    # NaN in the DataFrame, written as None
+    assert unknown['Yearly Extended Support Cost'] is None
+    assert unknown_master['Yearly Extended Support Cost'] is None
+    assert unknown['Normalization Factor (Data Nodes)'] is None
+    assert model.normalization.unresolved == {'r9z.48xlarge.search': 2}
+
+
+def test_versions_and_regions_without_a_price_fail_the_batch():
+    model = make_model()
+
+    with pytest.raises(ValidationException, match='Elasticsearch_5.6'):
+        model.price_rows([domain('old', version='Elasticsearch_5.6')])
+    with pytest.raises(ValidationException, match='Mars'):
+        model.price_rows([domain('far', region_name='Mars (Olympus Mons)')])
@@ -0,0 +1,43 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+import sqlite3
+import argparse
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import query_results
+from utils.results_store import ResultsStore
+
+SCAN_ID = '2026-01-05T09:00:00Z'
+
+
+def make_store(path, rows):
+    store = ResultsStore(str(path))
+    store.start_scan(SCAN_ID, 'output.csv')
+    store.write_rows(rows)
+    store.complete_scan()
+    store.close()
+    conn = sqlite3.connect(str(path))
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def test_rollup_counts_null_costs_and_keys_as_zero_and_dash(tmp_path, capsys):
+    conn = make_store(tmp_path / 'results.db', [
+        {'AccountId': '111111111111', 'Region': 'us-east-1', 'ARN': 'arn:1', 'EngineVersion': 'Elasticsearch_7.10',
+         'Yearly Extended Support Cost': 100.0},
+        # Unresolved instance type: no cost, and a domain without engine version
+        {'AccountId': '111111111111', 'Region': 'us-east-1', 'ARN': 'arn:2', 'EngineVersion': None,
+         'Yearly Extended Support Cost': None},
+    ])
+
+    query_results.rollup(conn, argparse.Namespace(scan=None, by='engine-version'))
+
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[2].split() == ['Elasticsearch_7.10', '1', '$100.00']
+    assert lines[3].split() == ['-', '1', '$0.00']
+    assert lines[4].split() == ['total', '2', '$100.00']
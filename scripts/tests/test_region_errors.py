@@ -0,0 +1,46 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+import logging
+
+import pytest
+from botocore.exceptions import ClientError
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+import find_aos_extended_support_instances as scanner
+
+
+def fail_listing(monkeypatch, code):
+    def get_aos_domains(aos_client):
+        raise ClientError({'Error': {'Code': code, 'Message': f'{code} message'}}, 'ListDomainNames')
+    monkeypatch.setattr(scanner, 'get_aos_client', lambda *args: None)
+    monkeypatch.setattr(scanner, 'get_aos_domains', get_aos_domains)
+
+
+def test_access_denied_skips_the_region_with_a_warning_by_default(monkeypatch, caplog):
+    # e.g. a region denied by a service control policy
+    fail_listing(monkeypatch, 'AccessDeniedException')
+
+    with caplog.at_level(logging.WARNING):
+        assert scanner.get_opensearch_extended_support_instances('111111111111', 'payer', 'ap-east-1') == []
+    assert 'AccessDeniedException' in caplog.text and 'Skipping region ap-east-1' in caplog.text
+
+
+def test_access_denied_fails_the_unit_with_strict_or_a_dead_letter_file(monkeypatch):
+    fail_listing(monkeypatch, 'AccessDeniedException')
+    monkeypatch.setattr(scanner.SCANNER, 'fail_on_api_errors', True)
+
+    with pytest.raises(ClientError, match='AccessDeniedException'):
+        scanner.get_opensearch_extended_support_instances('111111111111', 'payer', 'ap-east-1')
+
+
+def test_region_not_enabled_always_skips_the_region(monkeypatch):
+    fail_listing(monkeypatch, 'UnrecognizedClientException')
+    monkeypatch.setattr(scanner.SCANNER, 'fail_on_api_errors', True)
+
+    assert scanner.get_opensearch_extended_support_instances('111111111111', 'payer', 'af-south-1') == []
+
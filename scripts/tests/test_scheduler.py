@@ -0,0 +1,109 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+import time
+import threading
+from collections import defaultdict
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils.scheduler import ScanScheduler
+
+
+class BlockingWorker:
+    """
+    Worker that holds each unit for a while, and records the most units ever running per account and per region
+    """
+
+    def __init__(self, hold=0.02, fail=None):
+        self.hold = hold
+        self.fail = fail
+        self.started = []
+        self.max_per_account = 0
+        self.max_per_region = 0
+        self.max_running = 0
+        self._running = 0
+        self._per_account = defaultdict(int)
+        self._per_region = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def __call__(self, account, region):
+        with self._lock:
+            self.started.append((account, region))
+            self._running += 1
+            self._per_account[account] += 1
+            self._per_region[region] += 1
+            self.max_running = max(self.max_running, self._running)
+            self.max_per_account = max(self.max_per_account, self._per_account[account])
+            self.max_per_region = max(self.max_per_region, self._per_region[region])
+        try:
+            if (account, region) == self.fail:
+                raise RuntimeError(f'{account} {region} failed')
+            time.sleep(self.hold)
+            return [account, region]
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._per_account[account] -= 1
+                self._per_region[region] -= 1
+
+
+def make_units(accounts, regions):
+    return [(f'{account:012d}', f'region-{region}') for account in range(accounts) for region in range(regions)]
+
+
+def test_caps_are_never_exceeded_and_every_unit_completes():
+    units = make_units(12, 6)
+    worker = BlockingWorker()
+    completed = []
+
+    ScanScheduler(max_workers=10, max_per_account=2, max_per_region=3).run(
+        units, worker, lambda account, region, result: completed.append((account, region)))
+
+    assert sorted(completed) == sorted(units)
+    assert worker.max_running <= 10
+    assert worker.max_per_account <= 2
+    assert worker.max_per_region <= 3
+
+
+def test_max_per_region_defaults_to_max_workers():
+    units = make_units(20, 1)
+    worker = BlockingWorker()
+
+    scheduler = ScanScheduler(max_workers=8, max_per_account=8)
+    scheduler.run(units, worker, lambda *args: None)
+
+    assert scheduler.max_per_region == 8
+    # A single region can use every worker
+    assert worker.max_per_region == 8
+
+
+def test_first_error_cancels_queued_units():
+    units = make_units(50, 2)
+    worker = BlockingWorker(fail=units[0])
+    completed = []
+
+    with pytest.raises(RuntimeError, match='failed'):
+        ScanScheduler(max_workers=4, max_per_account=2).run(
+            units, worker, lambda account, region, result: completed.append((account, region)))
+
+    # Only the units started before the error ran, the queued units were never started
+    assert len(worker.started) < len(units) / 2
+    assert units[0] not in completed
+
+
+def test_errors_go_to_on_error_and_the_other_units_complete():
+    units = make_units(5, 2)
+    worker = BlockingWorker(hold=0, fail=units[3])
+    completed, failed = [], []
+
+    ScanScheduler(max_workers=4).run(units, worker, lambda account, region, result: completed.append((account, region)),
+                                     on_error=lambda account, region, error: failed.append((account, region)))
+
+    assert failed == [units[3]]
+    assert sorted(completed) == sorted(units[:3] + units[4:])
@@ -0,0 +1,83 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+import csv
+import json
+
+import pytest
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils.sharding import shard_of, shard_accounts, merge_outputs
+
+COST_COLUMN = 'Yearly Extended Support Cost'
+SHARD_ROWS = [
+    [{'AccountId': '111111111111', 'Region': 'us-east-1', 'DomainName': 'a', COST_COLUMN: 1234.5},
+     {'AccountId': '111111111111', 'Region': 'eu-west-1', 'DomainName': 'b', COST_COLUMN: None}],
+    [],
+    [{'AccountId': '222222222222', 'Region': 'us-east-1', 'DomainName': 'c', COST_COLUMN: 100.25}],
+]
+TOTALS = {'rows': 3, 'accounts': 2, 'regions': 2, 'yearly_cost': pytest.approx(1334.75)}
+
+
+def csv_cost(cost):
+    return '' if cost is None else f'${cost:,.2f}'
+
+
+def write_shards(tmp_path, output_format):
+    infiles = []
+    for index, rows in enumerate(SHARD_ROWS):
+        infile = str(tmp_path / f'output-shard-{index}-of-{len(SHARD_ROWS)}.{output_format}')
+        if output_format == 'csv':
+            with open(infile, 'w', encoding="utf-8", newline='') as f:
+                writer = csv.DictWriter(f, ['AccountId', 'Region', 'DomainName', COST_COLUMN], lineterminator='\n')
+                writer.writeheader()
+                writer.writerows({**row, COST_COLUMN: csv_cost(row[COST_COLUMN])} for row in rows)
+        elif output_format == 'jsonl':
+            with open(infile, 'w', encoding="utf-8") as f:
+                f.writelines(json.dumps(row) + '\n' for row in rows)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            schema = pa.schema([('AccountId', pa.string()), ('Region', pa.string()), ('DomainName', pa.string()), (COST_COLUMN, pa.float64())])
+            pq.write_table(pa.Table.from_pylist(rows, schema=schema), infile)
+        infiles.append(infile)
+    return infiles
+
+
+def read_domains(outfile, output_format):
+    if output_format == 'csv':
+        with open(outfile, encoding="utf-8", newline='') as f:
+            return [row['DomainName'] for row in csv.DictReader(f)]
+    if output_format == 'jsonl':
+        with open(outfile, encoding="utf-8") as f:
+            return [json.loads(line)['DomainName'] for line in f]
+    import pyarrow.parquet as pq
+    return pq.read_table(outfile).column('DomainName').to_pylist()
+
+
+@pytest.mark.parametrize('output_format', ['csv', 'jsonl', 'parquet'])
+def test_merge_outputs_concatenates_the_shards_and_returns_the_totals(tmp_path, output_format):
+    if output_format == 'parquet':
+        pytest.importorskip('pyarrow')
+    outfile = str(tmp_path / f'output.{output_format}')
+
+    totals = merge_outputs(write_shards(tmp_path, output_format), outfile, output_format, COST_COLUMN)
+
+    assert totals == TOTALS
+    assert read_domains(outfile, output_format) == ['a', 'b', 'c']
+
+
+def test_shard_of_is_stable_whatever_the_other_accounts():
+    accounts = [f'{account:012d}' for account in range(1000, 1400)]
+    # crc32 of the account ID: the same on every host, run and Python version
+    assert [shard_of('111111111111', 4), shard_of('222222222222', 4), shard_of('123456789012', 8)] == [3, 2, 6]
+
+    shards = [shard_accounts(accounts, index, 4) for index in range(4)]
+    assert sorted(account for shard in shards for account in shard) == accounts
+    # Adding accounts to the organization does not move the existing ones
+    more_shards = [shard_accounts(accounts + ['999999999999', '888888888888'], index, 4) for index in range(4)]
+    assert all(set(shard) <= set(more) for shard, more in zip(shards, more_shards))
@@ -0,0 +1,133 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import sys
+import json
+import logging
+from datetime import date
+
+import pytest
+import pandas as pd
+
+SCRIPTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SCRIPTS_DIR)
+
+from utils.utils import ValidationException
+from utils.eligibility import ExtendedSupportIndex
+from utils.normalization import NormalizationResolver, NO_NODE_TYPE
+from utils.cost_model import CostModel, INVENTORY_COLUMNS
+from utils.simulator import Scenario, UpgradeSimulator
+
+with open(os.path.join(SCRIPTS_DIR, 'utils', 'aos_instance_mapping.json'), encoding="utf-8") as f:
+    INSTANCE_MAPPING = json.load(f)
+VERSIONS = {
+    'Elasticsearch_6.8': {'end_of_standard_support': '2025-11-07', 'end_of_extended_support': '2028-11-07'},
+    'Elasticsearch_7.10': {'end_of_standard_support': '2025-11-07', 'end_of_extended_support': '2028-11-07'},
+}
+PRICE_PER_NIH = 0.0065
+PRICING = {'US East (N. Virginia)': {'price_per_nih': PRICE_PER_NIH}, 'Europe (Ireland)': {'price_per_nih': PRICE_PER_NIH}}
+INSTANCE_SIZES = {
+    'c5': ['large', 'xlarge', '2xlarge', '4xlarge', '9xlarge', '18xlarge'],
+    'r6g': ['large', 'xlarge', '2xlarge', '4xlarge', '8xlarge', '12xlarge'],
+}
+# Charged days of every domain from the first simulated day to the end of extended support
+CHARGED_DAYS = (date(2028, 11, 7) - date(2026, 1, 1)).days
+
+
+def domain(name, data_type, count=2, version='Elasticsearch_7.10', region='us-east-1', master_type=NO_NODE_TYPE):
+    region_name = 'US East (N. Virginia)' if region == 'us-east-1' else 'Europe (Ireland)'
+    return {'AccountId': '111111111111', 'Region': region, 'RegionName': region_name, 'DomainName': name,
+            'ARN': f'arn:{name}', 'EngineVersion': version, 'InstanceType': data_type, 'InstanceCount': count,
+            'DedicatedMasterType': master_type, 'DedicatedMasterCount': 3 if master_type != NO_NODE_TYPE else None,
+            'WarmType': NO_NODE_TYPE, 'WarmCount': None, 'CoordinatorNodeType': NO_NODE_TYPE, 'CoordinatorNodeCount': None}
+
+
+def make_simulator(domains):
+    normalization = NormalizationResolver(dict(INSTANCE_MAPPING))
+    eligibility = ExtendedSupportIndex(VERSIONS)
+    priced = CostModel(normalization, eligibility, PRICING).price(pd.DataFrame.from_records(domains, columns=INVENTORY_COLUMNS))
+    return UpgradeSimulator(priced, normalization, eligibility, '2026-01', instance_sizes=INSTANCE_SIZES)
+
+
+def rightsize_cost(count, saved_factor):
+    return count * saved_factor * PRICE_PER_NIH * 24 * CHARGED_DAYS
+
+
+def test_scenario_parsing():
+    scenario = Scenario('upgrade version=OpenSearch_1.* to=OpenSearch_2.5 by=2025-06-30 name="OpenSearch 1.x to 2.5"')
+    assert (scenario.action, scenario.name, scenario.to_version, scenario.by) == ('upgrade', 'OpenSearch 1.x to 2.5', 'OpenSearch_2.5', '2025-06-30')
+    assert scenario.filters == {'version': 'OpenSearch_1.*'}
+
+    scenario = Scenario('rightsize size=2xlarge region=us-*')
+    assert (scenario.action, scenario.role, scenario.size, scenario.name) == ('rightsize', 'data', '2xlarge', 'rightsize size=2xlarge region=us-*')
+    assert scenario.filters == {'region': 'us-*'}
+
+
+@pytest.mark.parametrize('line, error', [
+    ('downsize role=data', 'must start with'),
+    ('upgrade version', 'expected key=value'),
+    ('rightsize to=OpenSearch_2.5', 'unknown options'),
+    ('upgrade role=data', 'unknown options'),
+    ('rightsize role=ingest', 'role must be one of'),
+    ('upgrade name="unbalanced', 'Invalid scenario'),
+])
+def test_invalid_scenarios(line, error):
+    with pytest.raises(ValidationException, match=error):
+        Scenario(line)
+
+
+def test_filters_select_the_matching_domains_through_the_indexes():
+    simulator = make_simulator([
+        domain('es6-us', 'r6g.large.search', version='Elasticsearch_6.8'),
+        domain('es6-eu', 'r6g.2xlarge.search', version='Elasticsearch_6.8', region='eu-west-1'),
+        domain('es7-eu', 'r6g.2xlarge.search', region='eu-west-1'),
+    ])
+
+    selected = simulator._select(Scenario('upgrade version=Elasticsearch_6.*'))
+    assert list(selected) == [True, True, False]
+    selected = simulator._select(Scenario('upgrade region=eu-* size=2xlarge'))
+    assert list(selected) == [False, True, True]
+    selected = simulator._select(Scenario('upgrade account=222222222222'))
+    assert not selected.any()
+
+    changed, avoided = simulator.evaluate(Scenario('upgrade version=Elasticsearch_6.*'))
+    assert changed == 2
+    assert avoided == pytest.approx(simulator.baseline * (2 + 8) / (2 + 8 + 8))
+
+
+def test_rightsize_moves_to_the_next_size_that_exists_in_the_family():
+    simulator = make_simulator([
+        # r6g has no 10xlarge, the next smaller size is 8xlarge
+        domain('r6g-12xlarge', 'r6g.12xlarge.search'),
+        # c5 has no 16xlarge or 12xlarge, the next smaller size is 9xlarge
+        domain('c5-18xlarge', 'c5.18xlarge.search', count=3),
+        # A family without known sizes uses the sizes found in the inventory
+        domain('x1-2xlarge', 'x1.2xlarge.search'),
+        domain('x1-large', 'x1.large.search'),
+    ])
+
+    changed, avoided = simulator.evaluate(Scenario('rightsize'))
+
+    assert changed == 3
+    expected = rightsize_cost(2, 96 - 64) + rightsize_cost(3, 144 - 72) + rightsize_cost(2, 16 - 4)
+    assert avoided == pytest.approx(expected)
+
+
+def test_rightsize_skips_and_reports_types_without_a_smaller_size(caplog):
+    simulator = make_simulator([
+        domain('smallest', 'r6g.large.search'),
+        domain('unknown-family', 'z9.4xlarge.search'),
+        domain('master', 'r6g.xlarge.search', master_type='c5.large.search'),
+    ])
+
+    with caplog.at_level(logging.WARNING):
+        changed, avoided = simulator.evaluate(Scenario('rightsize'))
+    assert changed == 1
+    assert avoided == pytest.approx(rightsize_cost(2, 8 - 4))
+    assert "without a smaller size ['r6g.large.search', 'z9.4xlarge.search']" in caplog.text
+
+    caplog.clear()
+    with caplog.at_level(logging.WARNING):
+        assert simulator.evaluate(Scenario('rightsize role=master')) == (0, 0.0)
+    assert "['c5.large.search']" in caplog.text
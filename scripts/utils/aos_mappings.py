@@ -2,8 +2,6 @@
 # SPDX-License-Identifier: MIT-0
 
 import json
-import requests
-from bs4 import BeautifulSoup
 from utils.log import get_logger
 from utils.utils import read_regions_from_file
 from utils.utils import ValidationException
@@ -236,14 +234,15 @@ def get_aos_extended_support_mapping():
         }
     }
 
-def get_opensearch_extended_support_cost():
-    ''' Scrape the Opensearch pricing page to extract Extended Support charges
-        However, this might break if the HTML code of that page changes, which happens frequently.
-        The alternatives are:
-          1/ hard code the current regional proce for extended support in a file, which will/can get outdated 
-          2/ dynamically get the Opensearch Extended Support costs using the AWS Pricing API - however,
-          the Pricing API doesn't yet return extended support costs for Opensearch. 
+OPENSEARCH_PRICING_URL = "https://aws.amazon.com/opensearch-service/pricing/"
+
+def parse_opensearch_extended_support_cost(html):
+    ''' Parse the Extended Support charges out of the Opensearch pricing page HTML
+        Returns a map of region name to {"price_per_nih": <price>}
     '''
+    # Only needed when parsing the pricing page, so keep it out of module import time
+    from bs4 import BeautifulSoup
+
     def get_price_map(table):
         rows = table.find_all("tr")[1:]
         price_map = {}
@@ -256,12 +255,8 @@ def get_opensearch_extended_support_cost():
                 "price_per_nih": price_per_nih
             }
         return price_map
-    
-    LOGGER.debug("Extracting the Opensearch Extended Support pricing")
-    url = "https://aws.amazon.com/opensearch-service/pricing/"
-    response = requests.get(url, timeout=10)    # 10 seconds
-    response.raise_for_status()
-    soup = BeautifulSoup(response.content, "html.parser")
+
+    soup = BeautifulSoup(html, "html.parser")
     extended_support_section = soup.find("h2", {"id": "Extended_support_costs"})
     LOGGER.debug(f'Extended support section: {extended_support_section}')
 
@@ -270,42 +265,22 @@ def get_opensearch_extended_support_cost():
     LOGGER.debug(f'opensearch extended support price map: {extended_support_price_map}')
     return extended_support_price_map
 
-"""
-    Check if the given OpenSearch/Elasticsearch version falls within specified ranges,
-    per https://docs.aws.amazon.com/opensearch-service/latest/developerguide/what-is.html
-    
-    Args:
-        opensearch_version: Version string in format "OpenSearch_X.Y" or "Elasticsearch_X.Y"
-        
-    Returns:
-        bool: True if version is in specified ranges, False otherwise
-"""
-def is_extended_support_eligible(aos_version):
-    try:
-        engine,version = aos_version.split('_')
-        major, minor = map(int, version.split('.'))
-        # check if version matches any of the following: OpenSearch versions 1.0 to 1.2, OpenSearch versions 2.3 to 2.9
+def get_opensearch_extended_support_cost():
+    ''' Scrape the Opensearch pricing page to extract Extended Support charges
+        However, this might break if the HTML code of that page changes, which happens frequently.
+        The alternatives are:
+          1/ hard code the current regional proce for extended support in a file, which will/can get outdated 
+          2/ dynamically get the Opensearch Extended Support costs using the AWS Pricing API - however,
+          the Pricing API doesn't yet return extended support costs for Opensearch. 
+        See utils/pricing_snapshot.py for a locally cached copy of this map.
+    '''
+    # Only needed when scraping the pricing page, so keep it out of module import time
+    import requests
 
-        if engine == 'OpenSearch':
-            if major==1 and 0<=minor<=2:
-                return True
-            if major==2 and 3<=minor<=9:
-                return True
-            
-        elif engine == 'Elasticsearch':
-            if version in ["1.5", "2.3"]:
-                return True
-            if major==5 and 1<=minor<=6:
-                return True
-            if major==6 and 0<=minor<=7:
-                return True
-            if major==7 and 1<=minor<=8:
-                return True
-        return False
-        
-    except (ValueError, AttributeError):
-        # Handle invalid version string format
-        return False
+    LOGGER.debug("Extracting the Opensearch Extended Support pricing")
+    response = requests.get(OPENSEARCH_PRICING_URL, timeout=10)    # 10 seconds
+    response.raise_for_status()
+    return parse_opensearch_extended_support_cost(response.content)
 
 def main():
     get_opensearch_extended_support_cost()
@@ -0,0 +1,185 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import gzip
+import json
+import threading
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+
+import botocore.session
+from botocore.awsrequest import AWSResponse
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+
+LOGGER = get_logger(__name__)
+
+# Version of the archive format, archives of another version are not replayed
+API_ARCHIVE_VERSION = 1
+# Request parameters that change on every run, left out when matching a call with its recorded response
+IGNORED_PARAMS = {'AssumeRole': ('RoleSessionName',)}
+# Assumed role credentials are never written to the archive, a replay gets these (never expiring) ones instead
+REPLAYED_CREDENTIALS = {'SecretAccessKey': 'replayed', 'SessionToken': 'replayed',
+                        'Expiration': datetime(9999, 12, 31, tzinfo=timezone.utc)}
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return {'__datetime__': value.isoformat()}
+    return str(value)
+
+
+def _decode(value):
+    if '__datetime__' in value:
+        return datetime.fromisoformat(value['__datetime__'])
+    return value
+
+
+class ApiArchive:
+    """
+    Record the AWS API calls of a scan to a gzip compressed JSONL archive, or replay a scan from one.
+
+    Every client of the scan is instrumented with `instrument` (see client_factory.py, credentials.py and
+    async_engine.py); the archive does nothing until `record` or `replay` is called.
+        1. record - the response of every call (STS, Organizations, account ListRegions, OpenSearch ListDomainNames
+           and DescribeDomains) is written with its service, operation, account, region and parameters. Errors
+           returned by AWS (e.g. AccessDenied in a region) are recorded too, as they change what is scanned.
+           The credentials of AssumeRole responses are never recorded.
+        2. replay - each call is answered with its recorded response before it is signed or sent, so the scan needs
+           no network and no credentials, and the rate limiter never waits. A call that is not in the archive (e.g.
+           a region or an account that was not part of the recorded scan) fails with a ValidationException.
+    The archive also holds the extended support pricing of the recorded scan, so that a replay costs the domains
+    with the same prices, while the instance mapping and extended support versions are the local ones.
+
+    The archive is written as the scan goes, so a scan that is interrupted leaves an archive of the calls made so
+    far, which can still be replayed up to that point.
+    """
+
+    def __init__(self):
+        self.mode = None
+        self.path = None
+        self.region = None
+        self.pricing = None
+        self.calls = 0
+        self.misses = 0
+        self._file = None
+        self._responses = defaultdict(deque)
+        self._lock = threading.Lock()
+
+    def record(self, path):
+        """
+        Record the API calls of the scan to the archive
+        """
+        # Calls are matched by region, a replay builds the clients of the default region in this one
+        region = botocore.session.Session().get_config_variable('region')
+        self.mode, self.path, self.region = 'record', path, region
+        self._file = gzip.open(path, 'wt', encoding="utf-8")
+        self._write({'version': API_ARCHIVE_VERSION, 'region': region, 'recorded_at': datetime.now(timezone.utc).isoformat()})
+        LOGGER.info(f'Recording the AWS API calls of the scan to {path}')
+
+    def replay(self, path):
+        """
+        Answer the API calls of the scan from the archive
+        """
+        records = []
+        try:
+            with gzip.open(path, 'rt', encoding="utf-8") as f:
+                for line in f:
+                    records.append(json.loads(line, object_hook=_decode))
+        except EOFError:
+            LOGGER.warning(f'The API archive {path} is truncated (the recorded scan was interrupted), replaying the {len(records)} records it has')
+        except (OSError, ValueError) as err:
+            raise ValidationException(f'Cannot read the API archive {path}: {err}') from err
+        if not records or records[0].get('version') != API_ARCHIVE_VERSION:
+            raise ValidationException(f'{path} is not an API archive of version {API_ARCHIVE_VERSION}')
+
+        self.mode, self.path, self.region = 'replay', path, records[0]['region']
+        for record in records[1:]:
+            if 'pricing' in record:
+                self.pricing = record['pricing']
+            else:
+                self._responses[self._key(record['service'], record['operation'], record['account'], record['region'],
+                                          record['params'])].append((record['status'], record['response']))
+        if self.region is not None:
+            os.environ['AWS_DEFAULT_REGION'] = self.region
+        # Replayed calls are never signed, but botocore still looks up credentials when it builds a client
+        os.environ.setdefault('AWS_ACCESS_KEY_ID', 'replayed')
+        os.environ.setdefault('AWS_SECRET_ACCESS_KEY', 'replayed')
+        LOGGER.info(f'Replaying {sum(map(len, self._responses.values()))} recorded AWS API calls from {path}, recorded at {records[0]["recorded_at"]}')
+
+    def record_pricing(self, pricing):
+        if self.mode == 'record':
+            with self._lock:
+                self._write({'pricing': pricing})
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, default=_encode) + '\n')
+
+    @staticmethod
+    def _key(service, operation, account_id, region, params):
+        params = {name: value for name, value in params.items() if name not in IGNORED_PARAMS.get(operation, ())}
+        return service, operation, account_id, region, json.dumps(params, sort_keys=True, default=_encode)
+
+    def instrument(self, client, account_id=None):
+        """
+        Record or replay every API call of a boto3 (or aiobotocore) client of the account
+        """
+        if self.mode is None:
+            return client
+        service = client.meta.service_model.service_name
+        region = client.meta.region_name
+
+        def before_parameter_build(params, context, **kwargs):
+            context['archive_params'] = dict(params)
+
+        def record(event_name, http_response, parsed, context, **kwargs):
+            operation = event_name.rsplit('.', 1)[-1]
+            params = context.get('archive_params', {})
+            response = {key: value for key, value in parsed.items() if key != 'ResponseMetadata'}
+            if operation == 'AssumeRole' and 'Credentials' in response:
+                account = params['RoleArn'].split(':')[4]
+                response['Credentials'] = dict(REPLAYED_CREDENTIALS, AccessKeyId=f'REPLAYED{account}')
+            with self._lock:
+                self.calls += 1
+                self._write({'service': service, 'operation': operation, 'account': account_id, 'region': region,
+                             'params': params, 'status': http_response.status_code, 'response': response})
+
+        def replay(event_name, context, **kwargs):
+            operation = event_name.rsplit('.', 1)[-1]
+            key = self._key(service, operation, account_id, region, context.get('archive_params', {}))
+            with self._lock:
+                responses = self._responses.get(key)
+                if not responses:
+                    self.misses += 1
+                    raise ValidationException(f'No recorded response in {self.path} for {service} {operation} in account {account_id} '
+                                              f'in region {region}, replay the scan with the same arguments it was recorded with')
+                # Calls made more than once are answered in the recorded order, the last response is kept for any further call
+                status, response = responses.popleft() if len(responses) > 1 else responses[0]
+                self.calls += 1
+            parsed = dict(response, ResponseMetadata={'HTTPStatusCode': status, 'HTTPHeaders': {}, 'RetryAttempts': 0})
+            return AWSResponse(None, status, {}, None), parsed
+
+        client.meta.events.register('before-parameter-build', before_parameter_build)
+        if self.mode == 'record':
+            client.meta.events.register('after-call', record)
+        else:
+            client.meta.events.register('before-call', replay)
+        return client
+
+    def close(self):
+        if self._file is not None:
+            with self._lock:
+                self._file.close()
+                self._file = None
+
+    def log_stats(self):
+        if self.mode == 'record':
+            LOGGER.info(f'API archive: recorded {self.calls} AWS API calls to {self.path} ({os.path.getsize(self.path) / 1024:.0f} KB)')
+        elif self.mode == 'replay':
+            LOGGER.info(f'API archive: replayed {self.calls} AWS API calls from {self.path}, {self.misses} calls not found in the archive')
+
+
+# Shared by all clients and threads of the run
+API_ARCHIVE = ApiArchive()
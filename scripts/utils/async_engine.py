@@ -0,0 +1,159 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+import threading
+from collections import defaultdict
+
+from botocore.exceptions import ClientError
+
+from utils.log import get_logger
+from utils.utils import ValidationException, skip_region_on_error
+from utils.rate_limiter import RATE_LIMITER, RETRY_CONFIG
+from utils.metrics import METRICS
+from utils.api_archive import API_ARCHIVE
+from utils.describe_batches import describe_domains_async
+from utils.constants import DESCRIBE_BATCH_SIZE, DESCRIBE_CONCURRENCY
+
+LOGGER = get_logger(__name__)
+
+
+def _get_aiobotocore_session():
+    """
+    Return an aiobotocore session, and the client config that all clients of the scan share
+    """
+    try:
+        from aiobotocore.session import get_session
+        from aiobotocore.config import AioConfig
+        from aiobotocore.httpsession import AIOHTTPSession
+    except ImportError as err:
+        raise ValidationException('The async engine needs the aiobotocore package. '
+                                  'Install it with `pip install aiobotocore` or use `--engine thread`') from err
+
+    class SharedSSLContextHTTPSession(AIOHTTPSession):
+        """
+        aiobotocore builds a new SSL context, loading the whole CA bundle, for every client. The scan
+        creates a client per (account, region), so build the context once and share it between all clients.
+        """
+        _ssl_contexts = None
+        _ssl_contexts_lock = threading.Lock()
+
+        def _build_ssl_contexts(self, proxy_url):
+            if proxy_url or self._cert_file:
+                return super()._build_ssl_contexts(proxy_url)
+            with self._ssl_contexts_lock:
+                if SharedSSLContextHTTPSession._ssl_contexts is None:
+                    SharedSSLContextHTTPSession._ssl_contexts = super()._build_ssl_contexts(proxy_url)
+                return SharedSSLContextHTTPSession._ssl_contexts
+
+    return get_session(), AioConfig(http_session_cls=SharedSSLContextHTTPSession, retries=RETRY_CONFIG)
+
+
+async def _scan_unit(session, config, slots, account_id, region, get_client_credentials, build_instance, domain_cache,
+                     describe_batch_size, describe_concurrency, fail_on_api_errors):
+    """
+    Async version of `get_opensearch_extended_support_instances` for a single (account, region) unit. The unit
+    runs once it holds a slot of its account, of its region and of the whole scan, taken in that order.
+    """
+    opensearch_extended_support_instances = []
+    account_slots, region_slots, in_flight = slots
+    async with account_slots[account_id], region_slots[region], in_flight:
+        with METRICS.measure('scan_unit', account_id, region):
+            LOGGER.info('Running for account %s in region %s', account_id, region)
+            # Credentials come from the shared (thread safe, blocking) credential cache, so fetch them off the event loop
+            credentials = await asyncio.to_thread(get_client_credentials, account_id)
+            async with session.create_client('opensearch', region_name=region, config=config, **credentials) as aos_client:
+                RATE_LIMITER.instrument_async(aos_client)
+                METRICS.instrument(aos_client, account_id)
+                API_ARCHIVE.instrument(aos_client, account_id)
+                try:
+                    response = await aos_client.list_domain_names()
+                    aos_domains = response['DomainNames']
+                    LOGGER.info('Found %d OpenSearch domains in account %s in region %s', len(aos_domains), account_id, region)
+
+                    listed_names = [domain['DomainName'] for domain in aos_domains]
+                    domain_names = listed_names
+                    domains = {}
+                    if domain_cache is not None:
+                        cached_domains, domain_names = domain_cache.split(account_id, region, listed_names)
+                        domains.update((domain['DomainName'], domain) for domain in cached_domains)
+
+                    # Need to chunk in groups of 5 (--describe-batch-size) otherwise describe_domains API throws an error -
+                    # 'Please provide a maximum of 5 domain names to describe.'
+                    for domain_status_list in await describe_domains_async(aos_client, domain_names, describe_batch_size, describe_concurrency):
+                        if domain_cache is not None:
+                            domain_cache.put(account_id, region, domain_status_list)
+                        domains.update((domain['DomainName'], domain) for domain in domain_status_list)
+
+                    for domain_name in listed_names:
+                        if domain_name in domains:
+                            shortlist_instance = build_instance(account_id, region, domains[domain_name])
+                            if shortlist_instance is not None:
+                                opensearch_extended_support_instances.append(shortlist_instance)
+                except ClientError as e:
+                    if not skip_region_on_error(e, account_id, region, fail_on_api_errors):
+                        raise e
+                except Exception as e:
+                    LOGGER.info("Account: {} | Received Exception: {}".format(account_id, e))
+                    raise e
+    return account_id, region, opensearch_extended_support_instances
+
+
+async def _isolate_unit(scan_unit, account_id, region, on_error):
+    """
+    Hand the exception of a unit to `on_error` instead of raising it, the unit then has no results (None)
+    """
+    try:
+        return await scan_unit
+    except Exception as e:
+        on_error(account_id, region, e)
+        return account_id, region, None
+
+
+async def _run(units, get_client_credentials, build_instance, on_complete, max_in_flight, max_per_account, max_per_region,
+               domain_cache, describe_batch_size, describe_concurrency, fail_on_api_errors, on_error):
+    session, config = _get_aiobotocore_session()
+    slots = (defaultdict(lambda: asyncio.Semaphore(max_per_account)),
+             defaultdict(lambda: asyncio.Semaphore(max_per_region)),
+             asyncio.Semaphore(max_in_flight))
+    tasks = []
+    for account, region in units:
+        scan_unit = _scan_unit(session, config, slots, account, region, get_client_credentials, build_instance,
+                               domain_cache, describe_batch_size, describe_concurrency, fail_on_api_errors)
+        if on_error is not None:
+            scan_unit = _isolate_unit(scan_unit, account, region, on_error)
+        tasks.append(asyncio.ensure_future(scan_unit))
+    try:
+        for task in asyncio.as_completed(tasks):
+            account, region, instances = await task
+            if instances is not None:
+                on_complete(account, region, instances)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def run_async_scan(units, get_client_credentials, build_instance, on_complete, max_in_flight=100, max_per_account=None,
+                   max_per_region=None, domain_cache=None, describe_batch_size=DESCRIBE_BATCH_SIZE,
+                   describe_concurrency=DESCRIBE_CONCURRENCY, fail_on_api_errors=False, on_error=None):
+    """
+    Scan all (account, region) units on a single event loop using aiobotocore, with at most
+    `max_in_flight` units (and so OpenSearch API requests) in flight at any time, at most `max_per_account` of
+    them in the same account and at most `max_per_region` in the same region (no cap when None), like the
+    thread engine's scheduler.
+
+    `get_client_credentials(account_id)` returns the keyword arguments used to create a client for the account,
+    `build_instance(account_id, region, domain)` returns the CSV row for an eligible domain (or None), and
+    `on_complete(account_id, region, instances)` is called on the event loop thread as each unit finishes.
+    With a `domain_cache` (incremental scans), only new or stale domains are described. The domains of a unit are
+    described in batches of `describe_batch_size` names, with up to `describe_concurrency` batches in flight.
+    An API error of a unit (e.g. AccessDenied) skips its region, unless `fail_on_api_errors`, then the unit fails.
+    If `on_error(account_id, region, exception)` is given, it is called with the exception of a failed unit and
+    the other units keep running, otherwise the first exception cancels all the units and is re-raised.
+    """
+    max_per_account = max_per_account or max_in_flight
+    max_per_region = max_per_region or max_in_flight
+    LOGGER.info(f'Scanning {len(units)} (account, region) units with the async engine, max {max_in_flight} in flight '
+                f'(max {max_per_account} per account, max {max_per_region} per region)')
+    asyncio.run(_run(units, get_client_credentials, build_instance, on_complete, max_in_flight, max_per_account,
+                     max_per_region, domain_cache, describe_batch_size, describe_concurrency, fail_on_api_errors, on_error))
@@ -0,0 +1,124 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import json
+import threading
+
+from utils.log import get_logger
+
+LOGGER = get_logger(__name__)
+
+CHECKPOINT_FILE = '.tmp_scan_checkpoint.jsonl'
+
+
+class CheckpointJournal:
+    """
+    Append-only journal of the (account, region) units that have been fully scanned and saved.
+
+    Each line is a JSON record. The journal is read into a set when it is opened, so checking whether a unit
+    is done is O(1), and recording a unit appends one line instead of rewriting the whole file. Units are
+    recorded in batches, once their rows are in the output file, and each batch ends with `sync`, which records
+    the size of the output file and writes the journal to disk. A resumed run cuts the output file back to
+    that size (see `restore_output`), so rows written after the last sync, whose units are scanned again, are
+    never in the output file twice.
+    The first record holds the output file and scan id of the run, so a resumed run keeps appending to the same file.
+    """
+
+    def __init__(self, path=CHECKPOINT_FILE):
+        self.path = path
+        self.outfile = None
+        self.scan_id = None
+        # Size of the output file when the journal was last synced, None if no unit was recorded
+        self.output_size = None
+        self._done = set()
+        self._lock = threading.Lock()
+
+        self._load()
+        self._file = open(self.path, 'a', encoding="utf-8")
+
+    def _load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return
+        # A crash can leave the last line partially written. It is cut off, so that the next record starts on
+        # its own line, and that unit is simply scanned again
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            with open(self.path, 'r+b') as f:
+                f.truncate(complete)
+        for line in data[:complete].decode("utf-8").splitlines():
+            record = json.loads(line)
+            if 'outfile' in record:
+                self.outfile = record['outfile']
+                self.scan_id = record.get('scan_id')
+            elif 'output_size' in record:
+                self.output_size = record['output_size']
+            else:
+                self._done.add((record['account'], record['region']))
+        LOGGER.info(f'Found a previous checkpoint file with {len(self._done)} (account, region) units already processed. Continuing with remaining units...')
+
+    def __contains__(self, unit):
+        return unit in self._done
+
+    def __len__(self):
+        return len(self._done)
+
+    def _append(self, record):
+        self._file.write(json.dumps(record) + '\n')
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def set_outfile(self, outfile, scan_id=None):
+        with self._lock:
+            self.outfile = outfile
+            self.scan_id = scan_id
+            self._append({'outfile': outfile, 'scan_id': scan_id})
+            self._sync()
+
+    def record(self, account_id, region):
+        """
+        Record that a unit has been scanned and its results saved. The record is durable once `sync` returns.
+        """
+        with self._lock:
+            self._done.add((account_id, region))
+            self._append({'account': account_id, 'region': region})
+
+    def sync(self, output_size):
+        """
+        Write the units recorded so far to disk, with the size of the output file that holds their rows
+        """
+        with self._lock:
+            self.output_size = output_size
+            self._append({'output_size': output_size})
+            self._sync()
+
+    def restore_output(self, path):
+        """
+        Prepare the output file of the interrupted run for resuming: drop the rows written after the last sync, as
+        their units are scanned again. Return False if no unit was recorded, the output file is then written
+        again from the start.
+        """
+        if self.output_size is None:
+            return False
+        with open(path, 'r+b') as f:
+            f.truncate(self.output_size)
+        return True
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def remove(self):
+        """
+        Close and delete the journal, once the whole scan has completed
+        """
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,124 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import time
+import threading
+import boto3
+import botocore.session
+from botocore.config import Config
+
+from utils.log import get_logger
+from utils.rate_limiter import RATE_LIMITER, CLIENT_CONFIG
+from utils.metrics import METRICS
+from utils.api_archive import API_ARCHIVE
+from utils.constants import MAX_POOL_CONNECTIONS
+
+LOGGER = get_logger(__name__)
+
+
+class ClientFactory:
+    """
+    Thread safe factory of boto3 clients.
+
+    boto3 sessions are not thread safe, so each worker thread gets its own session. The sessions share a single
+    botocore data loader, so the service models are only loaded and parsed once, which makes a session cheap.
+    Clients are not cached: a scan visits each (account, region) once, so a cached client would almost never be
+    reused, while it keeps its credentials and event handlers in memory.
+
+    Clients of the same service and region share one HTTP connection pool, whatever their account. Request
+    signing is per client, so connections can be reused across accounts: a scan opens a few connections per
+    region instead of a new TLS connection (and a reload of the CA bundle) for every (account, region) unit.
+    botocore has no public way to share a connection pool, so the HTTP session of the client's endpoint is
+    swapped; botocore is pinned in requirements.txt and tests/test_client_factory.py fails if the attribute goes.
+
+    Every client is paced by the rate limiter, and its API calls are measured by the scan metrics (see metrics.py)
+    and recorded or replayed by the API archive (see api_archive.py), when one is used.
+    """
+
+    def __init__(self, max_pool_connections=MAX_POOL_CONNECTIONS, config=CLIENT_CONFIG, rate_limiter=RATE_LIMITER,
+                 metrics=METRICS, archive=API_ARCHIVE):
+        self.rate_limiter = rate_limiter
+        self.metrics = metrics
+        self.archive = archive
+        self._base_config = config
+        self.max_pool_connections = max_pool_connections
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._data_loader = None
+        self._http_sessions = {}
+
+        # Stats reported at the end of the run
+        self.sessions = 0
+        self.clients_created = 0
+        self.create_cpu_time = 0.0
+
+    @property
+    def max_pool_connections(self):
+        return self._config.max_pool_connections
+
+    @max_pool_connections.setter
+    def max_pool_connections(self, max_pool_connections):
+        self._config = self._base_config.merge(Config(max_pool_connections=max_pool_connections))
+
+    def _get_session(self):
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            botocore_session = botocore.session.Session()
+            with self._lock:
+                if self._data_loader is None:
+                    self._data_loader = botocore_session.get_component('data_loader')
+                else:
+                    botocore_session.register_component('data_loader', self._data_loader)
+                self.sessions += 1
+            session = self._local.session = boto3.session.Session(botocore_session=botocore_session)
+        return session
+
+    def _share_http_session(self, client):
+        # If a botocore version has no such attribute, the client keeps its own connection pool
+        endpoint = getattr(client, '_endpoint', None)
+        client_http_session = getattr(endpoint, 'http_session', None)
+        if client_http_session is None:
+            return
+        key = (client.meta.service_model.service_name, client.meta.region_name)
+        with self._lock:
+            http_session = self._http_sessions.setdefault(key, client_http_session)
+        if http_session is not client_http_session:
+            client_http_session.close()
+            endpoint.http_session = http_session
+
+    def get_client(self, service_name, region_name=None, account_id=None, credentials=None):
+        """
+        Return a client of the service in the region, for the account whose `credentials` (client keyword
+        arguments, empty for the default credentials) are given
+        """
+        credentials = credentials or {}
+        session = self._get_session()
+        start = time.thread_time()
+        client = session.client(service_name, region_name=region_name, config=self._config, **credentials)
+        self._share_http_session(client)
+        self.rate_limiter.instrument(client)
+        self.metrics.instrument(client, account_id)
+        self.archive.instrument(client, account_id)
+        elapsed = time.thread_time() - start
+
+        with self._lock:
+            self.clients_created += 1
+            self.create_cpu_time += elapsed
+        return client
+
+    def log_stats(self):
+        LOGGER.info(f'Client factory: {self.clients_created} clients created in {self.sessions} thread sessions '
+                    f'({self.create_cpu_time:.1f}s CPU), {len(self._http_sessions)} shared connection pools')
+
+    def close(self):
+        """
+        Close the shared connection pools
+        """
+        with self._lock:
+            for http_session in self._http_sessions.values():
+                http_session.close()
+            self._http_sessions = {}
+
+
+# Shared by all threads of the run
+CLIENT_FACTORY = ClientFactory()
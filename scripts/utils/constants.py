@@ -2,4 +2,45 @@
 # SPDX-License-Identifier: MIT-0
 
 ACCOUNT_ID_LENGTH = 12
-MEMBER_ACCOUNT_ROLE_NAME = 'AOSExtendedSupportCostEstimatorRole'
\ No newline at end of file
+MEMBER_ACCOUNT_ROLE_NAME = 'AOSExtendedSupportCostEstimatorRole'
+
+# Regions that have to be explicitly enabled (opted in) in an account before they can be used.
+# All other regions are enabled by default, so they never need a region enablement lookup.
+OPT_IN_REGIONS = {
+    'af-south-1', 'ap-east-1', 'ap-south-2', 'ap-southeast-3', 'ap-southeast-4', 'ap-southeast-5',
+    'ca-west-1', 'eu-south-1', 'eu-south-2', 'eu-central-2', 'il-central-1', 'me-south-1', 'me-central-1'
+}
+ENABLED_REGIONS_CACHE_FILE = '.enabled_regions_cache.json'
+# Error codes of a call to a region that is not enabled in the account, the only API errors that skip a region.
+# Any other error (e.g. AccessDenied, or throttling once the retries are exhausted) fails the (account, region) unit
+REGION_NOT_ENABLED_ERROR_CODES = {'UnrecognizedClientException', 'InvalidClientTokenId', 'AuthFailure', 'OptInRequired'}
+ENABLED_REGIONS_CACHE_TTL_HOURS = 24
+
+# Incremental scans (--incremental) reuse the DescribeDomains payload of a domain until it is this old
+DOMAIN_CACHE_FILE = '.domain_cache.json'
+DOMAIN_CACHE_TTL_HOURS = 24 * 30
+
+# Client side rate limits, per (service, operation, region), see rate_limiter.py.
+# Each rate starts at RATE_LIMIT_INITIAL requests per second, grows by RATE_LIMIT_INCREASE requests per second
+# every second without throttling, and is halved (down to RATE_LIMIT_MIN) when the service throttles a request.
+RATE_LIMIT_INITIAL = 50
+RATE_LIMIT_MIN = 1
+RATE_LIMIT_MAX = 500
+RATE_LIMIT_INCREASE = 1
+RATE_LIMIT_DECREASE = 0.5
+# Attempts of an API call (including the first one), retried with jittered exponential backoff
+API_MAX_ATTEMPTS = 8
+
+# Connections kept per (service, region), shared by the clients of all accounts, see client_factory.py
+MAX_POOL_CONNECTIONS = 25
+
+# DescribeDomains accepts at most 5 domain names per call. The batches of an (account, region) are described
+# concurrently, at most DESCRIBE_CONCURRENCY at a time, see describe_batches.py
+DESCRIBE_BATCH_SIZE = 5
+DESCRIBE_CONCURRENCY = 4
+
+# Domains projected at a time by the monthly cost projection, bounds the memory of the (domain x month) matrix
+PROJECTION_CHUNK_SIZE = 20000
+
+# Upper bounds (seconds) of the latency histogram buckets of the scan metrics, see metrics.py
+METRICS_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
@@ -0,0 +1,142 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import math
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+from utils.normalization import NO_NODE_TYPE
+
+LOGGER = get_logger(__name__)
+
+# Columns collected from the OpenSearch API for each eligible domain, see `get_extended_support_instance`
+INVENTORY_COLUMNS = ['AccountId', 'Region', 'RegionName',
+                     'DomainName', 'ARN', 'EngineVersion',
+                     'DedicatedMasterType', 'DedicatedMasterCount',
+                     'InstanceType', 'InstanceCount',
+                     'WarmType', 'WarmCount',
+                     'CoordinatorNodeType', 'CoordinatorNodeCount']
+
+# (node type, node count, normalization factor) columns of each node role, in the order their costs are added
+NODE_COLUMNS = [
+    ('InstanceType', 'InstanceCount', 'Normalization Factor (Data Nodes)'),
+    ('DedicatedMasterType', 'DedicatedMasterCount', 'Normalization Factor (Master Nodes)'),
+    ('CoordinatorNodeType', 'CoordinatorNodeCount', 'Normalization Factor (Coordinator Nodes)'),
+    ('WarmType', 'WarmCount', 'Normalization Factor (Ultrawarm Nodes)'),
+]
+
+
+def _factorize(column):
+    """
+    Return the code of each value of the column, and the distinct values. Lookups are then done once per
+    distinct value (a few instance types, regions and versions) and broadcast back with `_take`.
+    """
+    # Only needed when costing domains, so keep it out of module import time
+    import pandas as pd
+
+    codes, uniques = pd.factorize(column)
+    return codes, list(uniques)
+
+
+def _take(codes, values, missing_value=None):
+    """
+    Return the value of each code as an object array, so that values keep their Python type (e.g. a normalization
+    factor of 4 is not written as 4.0). Missing values (code -1) take `missing_value`.
+    """
+    # Only needed when costing domains, so keep it out of module import time
+    import numpy as np
+
+    return np.array(values + [missing_value], dtype=object)[codes]
+
+
+class CostModel:
+    """
+    Vectorized costing of the collected domains.
+
+    Scanning only collects the inventory of each eligible domain (INVENTORY_COLUMNS: its version, and the type
+    and count of each node role). The cost model then fills in, for a whole table of domains at once, the
+    normalization factor of each node role, the regional price per normalized instance hour, the support dates of
+    the version and the yearly extended support cost. Every lookup is done once per distinct value (instance type,
+    region, version) and the costs are computed column-wise, so costing is cheap enough to run on every batch of
+    the result writer, and to re-price a saved inventory without scanning again.
+
+    `normalization` is the normalization factor resolver of the instance types (see normalization.py), and
+    `eligibility` the extended support index of the versions (see eligibility.py), giving the support dates of each
+    eligible version. Domains with an instance type without a normalization factor get no normalization factor
+    for that node role and no cost (NaN in the DataFrame, empty in the output files), rather than failing the batch.
+    """
+
+    def __init__(self, normalization, eligibility, pricing):
+        self.normalization = normalization
+        self.eligibility = eligibility
+        self.pricing = pricing
+
+    def _normalization_factors(self, column):
+        # Only needed when costing domains, so keep it out of module import time
+        import numpy as np
+
+        codes, instance_types = _factorize(column)
+        factors = self.normalization.resolve(instance_types)
+        unresolved = [code for code, factor in enumerate(factors) if factor is None]
+        if unresolved:
+            domains = np.bincount(codes[codes >= 0], minlength=len(instance_types))
+            self.normalization.mark({instance_types[code]: int(domains[code]) for code in unresolved})
+        return _take(codes, factors, missing_value=0)
+
+    def price(self, inventory):
+        """
+        Return a copy of the inventory DataFrame with the normalization factor, price, support date and cost columns
+        """
+        # Only needed when costing domains, so keep it out of module import time
+        import numpy as np
+
+        frame = inventory.copy()
+        for type_column, count_column, factor_column in NODE_COLUMNS:
+            frame[count_column] = frame[count_column].fillna(0).astype('int64')
+            frame[factor_column] = self._normalization_factors(frame[type_column])
+
+        codes, region_names = _factorize(frame['RegionName'])
+        missing = [name for name in region_names if name not in self.pricing]
+        if missing:
+            raise ValidationException(f'No extended support pricing found for regions {missing}')
+        frame['Regional Price Per NIH'] = _take(codes, [self.pricing[name]['price_per_nih'] for name in region_names])
+
+        codes, versions = _factorize(frame['EngineVersion'])
+        missing = [version for version in versions if version not in self.eligibility]
+        if missing:
+            raise ValidationException(f'No extended support dates found for versions {missing}')
+        for column, key in [('End of Standard Support', 'end_of_standard_support'), ('End of Extended Support', 'end_of_extended_support')]:
+            frame[column] = _take(codes, [self.eligibility[version][key] for version in versions])
+
+        # Calculate the total Extended Support Cost - include Data nodes, Master nodes, Coordinator nodes & Warm nodes
+        # See this for an example of calculating extended support charges
+        # https://docs.aws.amazon.com/opensearch-service/latest/developerguide/what-is.html#calculating-charges
+        normalized_instances = np.zeros(len(frame))
+        for _, count_column, factor_column in NODE_COLUMNS:
+            normalized_instances = normalized_instances + frame[count_column].to_numpy() * frame[factor_column].to_numpy(dtype=float)
+        price_per_nih = frame['Regional Price Per NIH'].to_numpy(dtype=float)
+        frame['Yearly Extended Support Cost'] = normalized_instances * (price_per_nih * 24 * 365)      # 24 hours * 365 days
+        return frame
+
+    def price_rows(self, rows):
+        """
+        Cost a batch of inventory rows (dicts), returns the rows with their cost columns - the result writer's batch transform
+        """
+        if not rows:
+            return rows
+        # Only needed when costing domains, so keep it out of module import time
+        import pandas as pd
+
+        return to_records(self.price(pd.DataFrame.from_records(rows, columns=INVENTORY_COLUMNS)))
+
+
+def to_records(priced):
+    """
+    Return the rows (dicts) of a costed inventory DataFrame, with no cost (None) for the domains that could not be costed
+    """
+    rows = priced.to_dict('records')
+    if priced['Yearly Extended Support Cost'].isna().any():
+        for row in rows:
+            if math.isnan(row['Yearly Extended Support Cost']):
+                row['Yearly Extended Support Cost'] = None
+    return rows
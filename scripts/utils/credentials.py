@@ -0,0 +1,113 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import time
+import uuid
+import threading
+from datetime import datetime, timedelta, timezone
+
+import boto3
+
+from utils.log import get_logger
+from utils.rate_limiter import RATE_LIMITER, CLIENT_CONFIG
+from utils.metrics import METRICS
+from utils.api_archive import API_ARCHIVE
+
+LOGGER = get_logger(__name__)
+
+# Refresh assumed role credentials this long before they actually expire, so that
+# a client built from them does not fail half way through a region on long runs.
+CREDENTIALS_REFRESH_MARGIN = timedelta(minutes=10)
+
+
+class CredentialCache:
+    """
+    Thread safe cache of assumed role credentials, keyed by (account ID, role name).
+
+    The role in a member account is assumed once and the credentials are re-used for every
+    region of that account. Credentials are refreshed when they are about to expire.
+    """
+
+    def __init__(self, refresh_margin=CREDENTIALS_REFRESH_MARGIN):
+        self.refresh_margin = refresh_margin
+        self._credentials = {}
+        self._key_locks = {}
+        self._lock = threading.Lock()
+        self._sts_client = None
+
+        # Stats reported at the end of the run
+        self.sts_calls = 0
+        self.cache_hits = 0
+        self.refreshes = 0
+        self.sts_time = 0.0
+
+    def _get_sts_client(self):
+        with self._lock:
+            if self._sts_client is None:
+                sts_client = METRICS.instrument(RATE_LIMITER.instrument(boto3.client('sts', config=CLIENT_CONFIG)))
+                self._sts_client = API_ARCHIVE.instrument(sts_client)
+            return self._sts_client
+
+    def _get_key_lock(self, key):
+        # One lock per (account, role) so that concurrent regions of the same account
+        # wait for a single AssumeRole call instead of all calling STS at the same time.
+        with self._lock:
+            if key not in self._key_locks:
+                self._key_locks[key] = threading.Lock()
+            return self._key_locks[key]
+
+    def _is_fresh(self, credentials):
+        expiration = credentials['Expiration']
+        if expiration.tzinfo is None:
+            expiration = expiration.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) + self.refresh_margin < expiration
+
+    def _assume_role(self, account_id, role_name):
+        sts_client = self._get_sts_client()
+        partition = sts_client.meta.partition
+        start = time.perf_counter()
+        # The STS client is shared by all accounts, the stage gives the latency and errors per account
+        with METRICS.measure('assume_role', account_id):
+            assumed_role_object = sts_client.assume_role(
+                RoleArn=f'arn:{partition}:iam::{account_id}:role/{role_name}',
+                RoleSessionName=f'AssumeRoleSession{uuid.uuid4()}'
+            )
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.sts_calls += 1
+            self.sts_time += elapsed
+        return assumed_role_object['Credentials']
+
+    def get_credentials(self, account_id, role_name):
+        """
+        Return credentials for the role in the given account, assuming the role only if there
+        are no cached credentials or the cached ones are about to expire
+        """
+        key = (account_id, role_name)
+        with self._get_key_lock(key):
+            credentials = self._credentials.get(key)
+            if credentials is not None and self._is_fresh(credentials):
+                with self._lock:
+                    self.cache_hits += 1
+                return credentials
+
+            if credentials is not None:
+                LOGGER.debug('Credentials for role %s in account %s are about to expire, refreshing them', role_name, account_id)
+                with self._lock:
+                    self.refreshes += 1
+            credentials = self._assume_role(account_id, role_name)
+            self._credentials[key] = credentials
+            return credentials
+
+    def log_stats(self):
+        """
+        Log the number of STS AssumeRole calls made, and an estimate of the time saved by re-using credentials
+        """
+        average_call_time = self.sts_time / self.sts_calls if self.sts_calls else 0.0
+        time_saved = average_call_time * self.cache_hits
+        LOGGER.info(f'STS AssumeRole calls: {self.sts_calls} (refreshes: {self.refreshes}), '
+                    f'calls avoided by credential cache: {self.cache_hits}, '
+                    f'estimated STS time saved: {time_saved:.2f}s')
+
+
+CREDENTIAL_CACHE = CredentialCache()
@@ -0,0 +1,81 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import json
+import threading
+from datetime import datetime, timezone
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+
+LOGGER = get_logger(__name__)
+
+
+class DeadLetterFile:
+    """
+    JSONL file of the (account, region) units that failed, one record per unit with the error class and message.
+    The first record holds the output file of the scan, so that the results of a retry are written next to it.
+
+    With a dead letter file a unit that fails is recorded here instead of aborting the scan, and the other units
+    keep running. Without a dead letter file (or --strict), API errors such as AccessDenied or throttling once the
+    retries are exhausted skip the region with a warning; with one they fail the unit and are recorded here. The
+    errors of a region that is not enabled in the account always skip the region (see skip_region_on_error).
+    The failed units are not recorded in the checkpoint journal, and `--retry-failed` scans only the units of
+    the file.
+
+    Failures are written to `<path>.tmp`, which replaces the file once the scan completes (the file is deleted if
+    no unit failed). A scan that is interrupted leaves the file as it was, so retrying again still finds all the
+    failed units, and the units scanned in the meantime are skipped thanks to the checkpoint journal.
+    """
+
+    def __init__(self, path, outfile):
+        self.path = path
+        self.failed = 0
+        self._lock = threading.Lock()
+        self._file = open(f'{path}.tmp', 'w', encoding="utf-8")
+        self._file.write(json.dumps({'outfile': outfile}) + '\n')
+
+    def record(self, account_id, region, error):
+        with self._lock:
+            self.failed += 1
+            self._file.write(json.dumps({'account': account_id, 'region': region, 'error': type(error).__name__,
+                                         'message': str(error), 'time': datetime.now(timezone.utc).isoformat()}) + '\n')
+            self._file.flush()
+        LOGGER.error(f'Account: {account_id} | Region: {region} | Failed with {type(error).__name__}: {error}, recorded in {self.path}')
+
+    def close(self):
+        """
+        Replace the file with the units that failed in this scan, or delete it if no unit failed
+        """
+        with self._lock:
+            self._file.close()
+        if self.failed:
+            os.replace(self._file.name, self.path)
+        else:
+            os.remove(self._file.name)
+            if os.path.exists(self.path):
+                os.remove(self.path)
+
+    def discard(self):
+        """
+        Leave the file as it was, the scan did not complete
+        """
+        with self._lock:
+            self._file.close()
+        os.remove(self._file.name)
+
+
+def read_failed_units(path):
+    """
+    Return the (account, region) units of a dead letter file, in the order they failed, and the output file of the
+    scan they failed in
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f if line.strip()]
+    except (OSError, ValueError) as err:
+        raise ValidationException(f'Cannot read the dead letter file {path}: {err}') from err
+    outfile = next((record['outfile'] for record in records if 'outfile' in record), None)
+    units = list(dict.fromkeys((record['account'], record['region']) for record in records if 'outfile' not in record))
+    return units, outfile
@@ -0,0 +1,58 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import asyncio
+from collections import deque
+
+from utils.constants import DESCRIBE_BATCH_SIZE, DESCRIBE_CONCURRENCY
+
+
+def make_batches(domain_names, batch_size=DESCRIBE_BATCH_SIZE):
+    return [domain_names[i:i+batch_size] for i in range(0, len(domain_names), batch_size)]
+
+
+def describe_domains(aos_client, domain_names, batch_size=DESCRIBE_BATCH_SIZE, max_concurrency=DESCRIBE_CONCURRENCY, executor=None):
+    """
+    Describe the domains in batches of `batch_size` names (the DescribeDomains API limit), and yield the
+    DomainStatusList of each batch, in the order of `domain_names`.
+
+    With an `executor`, up to `max_concurrency` batches of the (account, region) are in flight at a time, so
+    regions with hundreds of domains take a few round trips instead of one per batch. Without one, or with a
+    single batch, the batches are described one after another from the calling thread.
+    """
+    batches = make_batches(domain_names, batch_size)
+    if executor is None or max_concurrency <= 1 or len(batches) <= 1:
+        for batch in batches:
+            yield aos_client.describe_domains(DomainNames=batch)['DomainStatusList']
+        return
+
+    futures = deque()
+    try:
+        for batch in batches:
+            if len(futures) >= max_concurrency:
+                yield futures.popleft().result()['DomainStatusList']
+            futures.append(executor.submit(aos_client.describe_domains, DomainNames=batch))
+        while futures:
+            yield futures.popleft().result()['DomainStatusList']
+    finally:
+        # Stop describing the remaining batches if one of them failed
+        for future in futures:
+            future.cancel()
+
+
+async def describe_domains_async(aos_client, domain_names, batch_size=DESCRIBE_BATCH_SIZE, max_concurrency=DESCRIBE_CONCURRENCY):
+    """
+    Async version of `describe_domains`: return the DomainStatusList of each batch, in the order of `domain_names`
+    """
+    in_flight = asyncio.Semaphore(max(max_concurrency, 1))
+
+    async def describe(batch):
+        async with in_flight:
+            return (await aos_client.describe_domains(DomainNames=batch))['DomainStatusList']
+
+    tasks = [asyncio.ensure_future(describe(batch)) for batch in make_batches(domain_names, batch_size)]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,104 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from utils.log import get_logger
+from utils.constants import DOMAIN_CACHE_FILE, DOMAIN_CACHE_TTL_HOURS
+
+LOGGER = get_logger(__name__)
+
+# Parts of the DescribeDomains payload used to build the output rows, the rest is not cached
+CACHED_DOMAIN_KEYS = ['DomainName', 'ARN', 'EngineVersion', 'ClusterConfig']
+
+
+def domain_arn(account_id, region, domain_name):
+    """
+    Return the ARN of a domain, without having to describe it
+    """
+    if region.startswith('cn-'):
+        partition = 'aws-cn'
+    elif region.startswith('us-gov-'):
+        partition = 'aws-us-gov'
+    else:
+        partition = 'aws'
+    return f'arn:{partition}:es:{region}:{account_id}:domain/{domain_name}'
+
+
+class DomainCache:
+    """
+    On-disk cache of the DescribeDomains payloads of the last scans, keyed by domain ARN.
+
+    Incremental scans still list the domains of every (account, region) unit, but only describe the domains that
+    are new or whose cache entry is older than the TTL. Costs are always recomputed from the payloads, so pricing
+    changes are picked up without describing the domains again. Domains that are no longer listed in a unit that
+    was scanned are dropped from the cache when it is saved.
+    """
+
+    def __init__(self, cache_file=DOMAIN_CACHE_FILE, ttl_hours=DOMAIN_CACHE_TTL_HOURS):
+        self.cache_file = cache_file
+        self.ttl = timedelta(hours=ttl_hours)
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._cache = {}
+        self._listed_units = set()
+        self._listed_arns = set()
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                self._cache = json.load(f)
+                LOGGER.info(f'Read {len(self._cache)} cached domain descriptions from file {self.cache_file}')
+        except (OSError, ValueError):
+            pass
+
+    def split(self, account_id, region, domain_names):
+        """
+        Return the cached payloads of the listed domains that are still fresh, and the names of the domains
+        that have to be described
+        """
+        now = datetime.now(timezone.utc)
+        cached_domains = []
+        names_to_describe = []
+        with self._lock:
+            self._listed_units.add((account_id, region))
+            for domain_name in domain_names:
+                arn = domain_arn(account_id, region, domain_name)
+                self._listed_arns.add(arn)
+                entry = self._cache.get(arn)
+                if entry is not None and now - datetime.fromisoformat(entry['described_at']) <= self.ttl:
+                    cached_domains.append(entry['domain'])
+                else:
+                    names_to_describe.append(domain_name)
+            self.hits += len(cached_domains)
+            self.misses += len(names_to_describe)
+        return cached_domains, names_to_describe
+
+    def put(self, account_id, region, domains):
+        """
+        Cache the payloads of freshly described domains
+        """
+        described_at = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            for domain in domains:
+                self._cache[domain_arn(account_id, region, domain['DomainName'])] = {
+                    'described_at': described_at,
+                    'domain': {key: domain[key] for key in CACHED_DOMAIN_KEYS if key in domain}
+                }
+
+    def log_stats(self):
+        total = self.hits + self.misses
+        LOGGER.info(f'Domain cache: reused {self.hits} of {total} domain descriptions, described {self.misses} domains')
+
+    def save(self):
+        """
+        Drop the domains that were not listed in the units scanned by this run, and write the cache to disk
+        """
+        with self._lock:
+            for arn in list(self._cache):
+                _, _, _, region, account_id, _ = arn.split(':', 5)
+                if (account_id, region) in self._listed_units and arn not in self._listed_arns:
+                    del self._cache[arn]
+            with open(self.cache_file, 'w', encoding="utf-8") as f:
+                json.dump(self._cache, f, default=str)
@@ -0,0 +1,89 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import re
+from datetime import date
+
+from utils.log import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Versions are of the format OpenSearch_X.Y or Elasticsearch_X.Y
+VERSION_PATTERN = re.compile(r'^(OpenSearch|Elasticsearch)_\d+\.\d+$')
+DATE_KEYS = ('end_of_standard_support', 'end_of_extended_support')
+
+
+class ExtendedSupportIndex:
+    """
+    Extended support eligibility and support dates of each engine version, built once from the extended support
+    versions data (extended_support_versions.json, or the built-in mapping of aos_mappings.py).
+
+    A version is eligible for extended support if and only if it has valid support dates, so eligibility and dates
+    come from the same data and cannot drift apart. Checking a version is a single dict lookup, and the index can be
+    used wherever the versions dict was (`version in index`, `index[version]['end_of_standard_support']`).
+
+    Entries that are not valid (version name, missing or invalid dates, extended support ending before standard
+    support) are left out of the index and listed in `issues`, to be reported before scanning.
+    """
+
+    def __init__(self, extended_support_versions):
+        self.issues = []
+        self._dates = {}
+        for version, dates in extended_support_versions.items():
+            issue = self._validate(version, dates)
+            if issue:
+                self.issues.append(f'{version}: {issue}')
+            else:
+                self._dates[version] = {key: dates[key] for key in DATE_KEYS}
+
+    @staticmethod
+    def _validate(version, dates):
+        if not VERSION_PATTERN.match(version):
+            return 'version is not of the format OpenSearch_X.Y or Elasticsearch_X.Y'
+        if not isinstance(dates, dict) or any(key not in dates for key in DATE_KEYS):
+            return f'expected the dates {list(DATE_KEYS)}, found {dates}'
+        try:
+            end_of_standard, end_of_extended = (date.fromisoformat(dates[key]) for key in DATE_KEYS)
+        except (TypeError, ValueError):
+            return f'dates are not of the format YYYY-MM-DD: {dates}'
+        if end_of_extended <= end_of_standard:
+            return f'end of extended support {end_of_extended} is not after end of standard support {end_of_standard}'
+        return None
+
+    def __contains__(self, version):
+        return version in self._dates
+
+    def __getitem__(self, version):
+        return self._dates[version]
+
+    def __len__(self):
+        return len(self._dates)
+
+    def is_eligible(self, version):
+        """
+        Return True if the version is eligible for extended support
+        """
+        return version in self._dates
+
+    def compare(self, other_versions, other_name):
+        """
+        Return the differences between the index and other extended support versions data (e.g. the built-in
+        mapping), as a list of messages
+        """
+        other = ExtendedSupportIndex(other_versions)
+        differences = [f'{version} is in {other_name} only' for version in sorted(set(other._dates) - set(self._dates))]
+        differences += [f'{version} is not in {other_name}' for version in sorted(set(self._dates) - set(other._dates))]
+        differences += [f'{version} has dates {self._dates[version]}, {other_name} has {other._dates[version]}'
+                        for version in sorted(set(self._dates) & set(other._dates)) if self._dates[version] != other._dates[version]]
+        return differences
+
+    def report(self, other_versions=None, other_name='the built-in mapping'):
+        """
+        Log the invalid entries of the index, and its differences with other extended support versions data
+        """
+        for issue in self.issues:
+            LOGGER.warning(f'Ignoring invalid extended support version {issue}')
+        if other_versions is not None:
+            for difference in self.compare(other_versions, other_name):
+                LOGGER.warning(f'Extended support versions differ from {other_name}: {difference}')
+        LOGGER.debug(f'Extended support dates available for {len(self)} versions')
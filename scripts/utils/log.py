@@ -1,21 +1,112 @@
 # Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
 # SPDX-License-Identifier: MIT-0
 
-import logging
 import sys
+import json
+import queue
+import atexit
+import logging
+import logging.handlers
+from datetime import datetime, timezone
 
+# Parent of the loggers of every module, the only one with a handler
+ROOT_LOGGER_NAME = 'aos_extended_support'
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(threadName)s - %(message)s'
+LOG_FORMATS = ['text', 'json']
 
-def get_logger(name):
+_listener = None
+
+
+def _stop_listener():
     """
-    Setup and return a logger that writes to stdout with logging level set to INFO
+    Write the records still on the queue, if any, when the script exits
     """
-    logger = logging.getLogger(name)
-    logger.setLevel(logging.INFO)
+    if _listener is not None:
+        _listener.stop()
+
+
+atexit.register(_stop_listener)
+
 
+class JsonFormatter(logging.Formatter):
+    """
+    Format each record as a JSON object on a single line, for log pipelines
+    """
+
+    def __init__(self, shard=None):
+        super().__init__()
+        self.shard = shard
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'logger': record.name[len(ROOT_LOGGER_NAME) + 1:],
+            'message': record.getMessage(),
+        }
+        if self.shard is not None:
+            entry['shard'] = self.shard
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _UnformattedQueueHandler(logging.handlers.QueueHandler):
+    """
+    Queue the record as it is: the message is formatted by the listener thread, not by the thread that logs it
+    """
+
+    def prepare(self, record):
+        return record
+
+
+def _stdout_handler(log_format, shard):
     handler = logging.StreamHandler(sys.stdout)
-    handler.setLevel(logging.INFO)
-    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(threadName)s - %(message)s')
-    handler.setFormatter(formatter)
+    if log_format == 'json':
+        handler.setFormatter(JsonFormatter(shard))
+    else:
+        handler.setFormatter(logging.Formatter(LOG_FORMAT if shard is None else LOG_FORMAT.replace(' - %(threadName)s', f' - shard {shard} - %(threadName)s')))
+    return handler
+
+
+def configure_logging(level=logging.INFO, log_format='text', use_queue=False, shard=None):
+    """
+    Configure the handler of every logger of the script: records of `level` and above are written to stdout, as text
+    or JSON (`log_format`). The records of a shard process are labelled with its `shard` (i/N), as the processes of
+    all the shards write to the same stdout.
 
-    logger.addHandler(handler)
-    return logger
\ No newline at end of file
+    With `use_queue`, the threads that log only put the record on a queue, and a single background thread formats
+    and writes it. Worker threads then never wait for each other on the lock of the handler or on stdout, and
+    messages logged with arguments (LOGGER.debug('Domain: %s', domain)) are formatted by that thread, or not at
+    all if their level is disabled. The queue is drained when the script exits.
+    """
+    global _listener
+    root_logger = logging.getLogger(ROOT_LOGGER_NAME)
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+    for handler in list(root_logger.handlers):
+        root_logger.removeHandler(handler)
+
+    handler = _stdout_handler(log_format, shard)
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        _listener = logging.handlers.QueueListener(log_queue, handler)
+        _listener.start()
+        handler = _UnformattedQueueHandler(log_queue)
+    root_logger.addHandler(handler)
+    root_logger.setLevel(level)
+    # Only the handler above writes the records of the script
+    root_logger.propagate = False
+
+
+def get_logger(name):
+    """
+    Return the logger of a module. Every module logger is a child of a single logger that writes to stdout with
+    logging level set to INFO (see `configure_logging`), so each record is written once whatever the number of
+    calls.
+    """
+    if not logging.getLogger(ROOT_LOGGER_NAME).handlers:
+        configure_logging()
+    return logging.getLogger(f'{ROOT_LOGGER_NAME}.{name}')
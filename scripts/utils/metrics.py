@@ -0,0 +1,211 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import json
+import time
+import bisect
+import threading
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+
+from utils.log import get_logger
+from utils.constants import METRICS_LATENCY_BUCKETS
+from utils.rate_limiter import THROTTLING_ERROR_CODES
+
+LOGGER = get_logger(__name__)
+
+METRICS_PREFIX = 'aos_extended_support_scan'
+
+
+class _Series:
+    def __init__(self, bucket_count):
+        self.calls = 0
+        self.seconds = 0.0
+        self.throttles = 0
+        self.errors = Counter()
+        # Observations per latency bucket, the last one is +Inf
+        self.buckets = [0] * (bucket_count + 1)
+
+
+class ScanMetrics:
+    """
+    Thread safe call counts, latency histograms, throttles and errors of a scan, per account and region.
+
+    Two kinds of calls are measured:
+        1. api - every AWS API call made by an instrumented client (STS AssumeRole, Organizations ListAccounts,
+           OpenSearch ListDomainNames and DescribeDomains, ...), from the botocore events of the client. The
+           latency of a call includes its retries and the time spent waiting for the rate limiter.
+        2. stage - the steps of the scan measured with `measure`: getting the client of a unit, scanning a unit,
+           loading the pricing and writing the results
+
+    At the end of the run the metrics are written as a JSON summary and a Prometheus textfile (for the textfile
+    collector of the node exporter). The Prometheus histograms are per (name, region), the counters per
+    (name, account, region); the JSON summary has everything per (name, account, region).
+    """
+
+    def __init__(self, latency_buckets=METRICS_LATENCY_BUCKETS):
+        self.latency_buckets = latency_buckets
+        # (kind, name, account, region) -> _Series
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, kind, name, account_id, region, seconds, error=None):
+        with self._lock:
+            series = self._series.get((kind, name, account_id, region))
+            if series is None:
+                series = self._series[(kind, name, account_id, region)] = _Series(len(self.latency_buckets))
+            series.calls += 1
+            series.seconds += seconds
+            series.buckets[bisect.bisect_left(self.latency_buckets, seconds)] += 1
+            if error is not None:
+                series.errors[error] += 1
+
+    def throttle(self, kind, name, account_id, region):
+        with self._lock:
+            series = self._series.get((kind, name, account_id, region))
+            if series is None:
+                series = self._series[(kind, name, account_id, region)] = _Series(len(self.latency_buckets))
+            series.throttles += 1
+
+    @contextmanager
+    def measure(self, stage, account_id=None, region=None):
+        """
+        Measure a stage of the scan, the class of the exception it raises (if any) is counted as an error
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception as e:
+            self.observe('stage', stage, account_id, region, time.perf_counter() - start, type(e).__name__)
+            raise
+        self.observe('stage', stage, account_id, region, time.perf_counter() - start)
+
+    def instrument(self, client, account_id=None):
+        """
+        Measure every API call of a boto3 (or aiobotocore) client of the account
+        """
+        service = client.meta.service_model.service_name
+        region = client.meta.region_name
+
+        def before_call(context, **kwargs):
+            context['metrics_start'] = time.perf_counter()
+
+        def after_call(event_name, http_response, parsed, context, **kwargs):
+            if 'metrics_start' in context:
+                error = parsed.get('Error', {}).get('Code', str(http_response.status_code)) if http_response.status_code >= 400 else None
+                self.observe('api', f"{service}.{event_name.rsplit('.', 1)[-1]}", account_id, region,
+                             time.perf_counter() - context.pop('metrics_start'), error)
+
+        def after_call_error(event_name, exception, context, **kwargs):
+            if 'metrics_start' in context:
+                self.observe('api', f"{service}.{event_name.rsplit('.', 1)[-1]}", account_id, region,
+                             time.perf_counter() - context.pop('metrics_start'), type(exception).__name__)
+
+        def needs_retry(event_name, response=None, **kwargs):
+            if response is not None:
+                http_response, parsed = response
+                if http_response.status_code == 429 or parsed.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES:
+                    self.throttle('api', f"{service}.{event_name.rsplit('.', 1)[-1]}", account_id, region)
+            # Let the retry handler of the client decide whether and when to retry
+            return None
+
+        client.meta.events.register('before-call', before_call)
+        client.meta.events.register('after-call', after_call)
+        client.meta.events.register('after-call-error', after_call_error)
+        client.meta.events.register('needs-retry', needs_retry)
+        return client
+
+    def summary(self):
+        """
+        Return the metrics as a JSON serializable dict
+        """
+        with self._lock:
+            series = sorted(self._series.items(), key=lambda item: tuple(str(value) for value in item[0]))
+            return {
+                'latency_buckets': list(self.latency_buckets),
+                'series': [{'kind': kind, 'name': name, 'account': account_id, 'region': region,
+                            'calls': values.calls, 'seconds': round(values.seconds, 6), 'throttles': values.throttles,
+                            'errors': dict(values.errors), 'buckets': list(values.buckets)}
+                           for (kind, name, account_id, region), values in series],
+            }
+
+    def to_prometheus(self):
+        """
+        Return the metrics in the Prometheus text exposition format
+        """
+        summary = self.summary()
+        bounds = [str(bound) for bound in summary['latency_buckets']] + ['+Inf']
+        lines = []
+        for kind in ('api', 'stage'):
+            series = [values for values in summary['series'] if values['kind'] == kind]
+            metric = f'{METRICS_PREFIX}_{kind}'
+
+            # Histograms per (name, region)
+            histograms = defaultdict(lambda: {'buckets': [0] * len(bounds), 'seconds': 0.0, 'calls': 0})
+            for values in series:
+                histogram = histograms[(values['name'], values['region'])]
+                histogram['buckets'] = [total + count for total, count in zip(histogram['buckets'], values['buckets'])]
+                histogram['seconds'] += values['seconds']
+                histogram['calls'] += values['calls']
+            lines.append(f'# HELP {metric}_latency_seconds Latency of the {kind} calls of the scan')
+            lines.append(f'# TYPE {metric}_latency_seconds histogram')
+            for (name, region), histogram in histograms.items():
+                labels = _labels(name=name, region=region)
+                cumulative = 0
+                for bound, count in zip(bounds, histogram['buckets']):
+                    cumulative += count
+                    lines.append(f'{metric}_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_latency_seconds_sum{{{labels}}} {histogram["seconds"]:.6f}')
+                lines.append(f'{metric}_latency_seconds_count{{{labels}}} {histogram["calls"]}')
+
+            # Counters per (name, account, region)
+            for counter, description in (('calls', 'Number of'), ('throttles', 'Number of throttled'), ('errors', 'Number of failed')):
+                lines.append(f'# HELP {metric}_{counter}_total {description} {kind} calls of the scan')
+                lines.append(f'# TYPE {metric}_{counter}_total counter')
+                for values in series:
+                    labels = _labels(name=values['name'], account=values['account'], region=values['region'])
+                    if counter == 'errors':
+                        for error, count in sorted(values['errors'].items()):
+                            lines.append(f'{metric}_{counter}_total{{{labels},error="{_escape(error)}"}} {count}')
+                    elif values[counter]:
+                        lines.append(f'{metric}_{counter}_total{{{labels}}} {values[counter]}')
+        return '\n'.join(lines) + '\n'
+
+    def write(self, directory):
+        """
+        Write the JSON summary (metrics.json) and the Prometheus textfile (metrics.prom) to the directory
+        """
+        os.makedirs(directory, exist_ok=True)
+        for filename, content in (('metrics.json', json.dumps(self.summary(), indent=2)), ('metrics.prom', self.to_prometheus())):
+            path = os.path.join(directory, filename)
+            # The textfile collector may read the file at any time, so replace it atomically
+            with open(f'{path}.tmp', 'w', encoding="utf-8") as f:
+                f.write(content)
+            os.replace(f'{path}.tmp', path)
+        LOGGER.info(f'Saved scan metrics to {directory}/metrics.json and {directory}/metrics.prom')
+
+    def log_stats(self):
+        totals = defaultdict(lambda: [0, 0.0, 0, 0])
+        with self._lock:
+            for (kind, name, _, _), series in self._series.items():
+                total = totals[(kind, name)]
+                total[0] += series.calls
+                total[1] += series.seconds
+                total[2] += series.throttles
+                total[3] += sum(series.errors.values())
+        for (kind, name), (calls, seconds, throttles, errors) in sorted(totals.items()):
+            LOGGER.info(f'Metrics: {kind} {name}: {calls} calls, {seconds:.1f}s total, {1000 * seconds / max(calls, 1):.1f} ms average, '
+                        f'{throttles} throttled, {errors} failed')
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels):
+    return ','.join(f'{key}="{_escape(value if value is not None else "")}"' for key, value in labels.items())
+
+
+# Shared by all clients and threads of the run
+METRICS = ScanMetrics()
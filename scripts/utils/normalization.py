@@ -0,0 +1,83 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import threading
+from collections import Counter
+
+from utils.log import get_logger
+
+LOGGER = get_logger(__name__)
+
+# Node type of the roles a domain does not have, e.g. no dedicated master nodes
+NO_NODE_TYPE = 'N/A'
+
+
+def instance_size(instance_type):
+    """
+    Return the size of an instance type of the format <family>.<size>.search, or None if it is not of that format
+    """
+    parts = instance_type.split('.')
+    return parts[1] if len(parts) > 1 else None
+
+
+class NormalizationResolver:
+    """
+    Normalization factor of each instance type, from the instance mapping (size -> normalization factor, see
+    aos_instance_mapping.json).
+
+    Factors are memoized by full instance type, so the type is parsed once per scan rather than once per domain.
+    `resolve` takes all the distinct types of a batch of domains, and the types that are not memoized yet are
+    resolved together in one step: if some of their sizes are missing from the mapping (e.g. a new instance size),
+    the mapping is refreshed with `refresh_instance_mapping` once, for all of them, and never again during the scan.
+    Types that are still unknown after that resolve to None, so that their domains are written without a cost
+    instead of failing the scan; `mark` counts those domains and `log_unresolved` reports them at the end.
+
+    Lookups are thread safe, so one resolver is shared by everything that costs domains.
+    """
+
+    def __init__(self, instance_mapping, refresh_instance_mapping=None):
+        self.instance_mapping = instance_mapping
+        self.refresh_instance_mapping = refresh_instance_mapping
+        # Number of domains of each instance type without a normalization factor
+        self.unresolved = Counter()
+        self._factors = {NO_NODE_TYPE: 0}
+        self._refreshed = False
+        self._lock = threading.Lock()
+
+    def resolve(self, instance_types):
+        """
+        Return the normalization factor of each instance type, None for the types without a normalization factor
+        """
+        with self._lock:
+            unknown = [instance_type for instance_type in set(instance_types) if instance_type not in self._factors]
+            if unknown:
+                self._resolve(sorted(unknown))
+            return [self._factors[instance_type] for instance_type in instance_types]
+
+    def _resolve(self, instance_types):
+        sizes = {instance_type: instance_size(instance_type) for instance_type in instance_types}
+        missing = [instance_type for instance_type, size in sizes.items() if size not in self.instance_mapping]
+        if missing and self.refresh_instance_mapping is not None and not self._refreshed:
+            # Perhaps a new family/size was added, regenerate the mapping once for all the missing types
+            LOGGER.error(f'Instance types {missing} not found in aos_instance_mapping.json. Regenerating the mapping from AWS documentation')
+            self._refreshed = True
+            self.instance_mapping = self.refresh_instance_mapping()
+            LOGGER.info(f'Updated AOS Instance Mapping: {self.instance_mapping}')
+
+        for instance_type, size in sizes.items():
+            self._factors[instance_type] = self.instance_mapping.get(size)
+        unresolved = [instance_type for instance_type in instance_types if self._factors[instance_type] is None]
+        if unresolved:
+            LOGGER.error(f'No normalization factor found for instance types {unresolved}, their domains are written without a cost')
+
+    def mark(self, domain_counts):
+        """
+        Count the domains of instance types without a normalization factor, given as {instance type: domains}
+        """
+        with self._lock:
+            self.unresolved.update(domain_counts)
+
+    def log_unresolved(self):
+        if self.unresolved:
+            LOGGER.error(f'{sum(self.unresolved.values())} domains were written without a cost, as no normalization factor '
+                         f'was found for their instance types (domains per type): {dict(self.unresolved)}')
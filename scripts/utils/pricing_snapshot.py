@@ -0,0 +1,118 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import json
+from datetime import datetime, timedelta, timezone
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+from utils.aos_mappings import OPENSEARCH_PRICING_URL, parse_opensearch_extended_support_cost
+
+LOGGER = get_logger(__name__)
+
+# Bump when the layout of the snapshot file changes, older snapshots are then ignored
+PRICING_SNAPSHOT_VERSION = 1
+PRICING_SNAPSHOT_FILE = '.pricing_snapshot.json'
+PRICING_SNAPSHOT_TTL_HOURS = 24
+
+
+def read_pricing_snapshot(snapshot_file):
+    """
+    Return the pricing snapshot stored in the file, or None if there is no usable snapshot
+    """
+    try:
+        with open(snapshot_file, encoding="utf-8") as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if snapshot.get('version') != PRICING_SNAPSHOT_VERSION or not snapshot.get('price_map'):
+        LOGGER.info(f'Ignoring pricing snapshot {snapshot_file} with unsupported version {snapshot.get("version")}')
+        return None
+    return snapshot
+
+
+def write_pricing_snapshot(snapshot_file, snapshot):
+    """
+    Write the snapshot to a temporary file and rename it, so that a crash never leaves a partial snapshot
+    """
+    tmp_file = f'{snapshot_file}.tmp'
+    with open(tmp_file, 'w', encoding="utf-8") as f:
+        json.dump(snapshot, f, indent=2, sort_keys=True)
+    os.replace(tmp_file, snapshot_file)
+
+
+def _is_fresh(snapshot, ttl):
+    checked_at = datetime.fromisoformat(snapshot['checked_at'])
+    return datetime.now(timezone.utc) - checked_at < ttl
+
+
+def refresh_pricing_snapshot(snapshot):
+    """
+    Fetch the pricing page, sending the ETag/Last-Modified of the snapshot (if any) so that an unchanged
+    page is not downloaded and parsed again. Returns the new snapshot.
+    """
+    # Only needed when refreshing the snapshot, so keep it out of module import time
+    import requests
+
+    headers = {}
+    if snapshot:
+        if snapshot.get('etag'):
+            headers['If-None-Match'] = snapshot['etag']
+        if snapshot.get('last_modified'):
+            headers['If-Modified-Since'] = snapshot['last_modified']
+
+    LOGGER.debug("Extracting the Opensearch Extended Support pricing")
+    response = requests.get(OPENSEARCH_PRICING_URL, headers=headers, timeout=10)    # 10 seconds
+    now = datetime.now(timezone.utc).isoformat()
+
+    if response.status_code == 304 and snapshot:
+        LOGGER.info('Opensearch pricing page has not changed since the last snapshot')
+        return dict(snapshot, checked_at=now)
+
+    response.raise_for_status()
+    return {
+        'version': PRICING_SNAPSHOT_VERSION,
+        'url': OPENSEARCH_PRICING_URL,
+        'fetched_at': now,
+        'checked_at': now,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'price_map': parse_opensearch_extended_support_cost(response.content),
+    }
+
+
+def get_extended_support_pricing(snapshot_file=PRICING_SNAPSHOT_FILE, ttl_hours=PRICING_SNAPSHOT_TTL_HOURS, offline=False):
+    """
+    Return the extended support price map (region name -> {"price_per_nih": <price>}), from the local
+    snapshot while it is younger than `ttl_hours`, otherwise refreshed from the pricing page.
+
+    In offline mode the pricing page is never fetched, and a snapshot must exist.
+    If the pricing page cannot be fetched, a stale snapshot is used rather than failing the run.
+    """
+    snapshot = read_pricing_snapshot(snapshot_file)
+
+    if offline:
+        if snapshot is None:
+            raise ValidationException(f'Offline mode needs a pricing snapshot, but none was found in {snapshot_file}. '
+                                      'Run once without --offline to create it, or copy it from another machine.')
+        LOGGER.info(f'Offline mode: using pricing snapshot from {snapshot["fetched_at"]}')
+        return snapshot['price_map']
+
+    if snapshot and _is_fresh(snapshot, timedelta(hours=ttl_hours)):
+        LOGGER.info(f'Using pricing snapshot from {snapshot["fetched_at"]}, last checked at {snapshot["checked_at"]}')
+        return snapshot['price_map']
+
+    try:
+        snapshot = refresh_pricing_snapshot(snapshot)
+    except Exception as e:
+        if snapshot is None:
+            LOGGER.error("Failed fetching the Opensearch pricing page and no pricing snapshot is available")
+            raise e
+        LOGGER.info(f'Failed refreshing the Opensearch pricing page, using stale pricing snapshot from {snapshot["fetched_at"]}. Exception: {e}')
+        return snapshot['price_map']
+
+    write_pricing_snapshot(snapshot_file, snapshot)
+    LOGGER.debug(f'Saved pricing snapshot to {snapshot_file}')
+    return snapshot['price_map']
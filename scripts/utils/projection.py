@@ -0,0 +1,85 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+from utils.constants import PROJECTION_CHUNK_SIZE
+
+LOGGER = get_logger(__name__)
+
+
+def projection_start(start_month=None):
+    """
+    Return the first projected month, and the first projected day: today when projecting from the current month,
+    otherwise the first day of `start_month` (a 'YYYY-MM' string)
+    """
+    # Only needed when projecting costs, so keep it out of module import time
+    import numpy as np
+
+    if start_month is None:
+        today = np.datetime64('today', 'D')
+        return today.astype('datetime64[M]'), today
+    try:
+        first_month = np.datetime64(start_month, 'M')
+    except ValueError as err:
+        raise ValidationException(f'Invalid month {start_month}, use the YYYY-MM format') from err
+    return first_month, first_month.astype('datetime64[D]')
+
+
+def charged_window(priced):
+    """
+    Return the first charged day, the day after the last charged day and the daily extended support cost of each
+    domain of a costed inventory, as NumPy arrays. Domains that could not be costed (see cost_model.py) cost nothing.
+    """
+    # Only needed when projecting costs, so keep it out of module import time
+    import pandas as pd
+
+    charged_from = pd.to_datetime(priced['End of Standard Support']).to_numpy().astype('datetime64[D]')
+    charged_until = pd.to_datetime(priced['End of Extended Support']).to_numpy().astype('datetime64[D]')
+    return charged_from, charged_until, priced['Yearly Extended Support Cost'].fillna(0).to_numpy(dtype=float) / 365
+
+
+def project_monthly_costs(priced, start_month=None, months=None, group_by=('AccountId', 'Region'), chunk_size=PROJECTION_CHUNK_SIZE):
+    """
+    Project the extended support spend of every domain of a costed inventory (see cost_model.py), month by month.
+
+    A domain is charged from its End of Standard Support date (inclusive) to its End of Extended Support date
+    (exclusive), at its yearly cost / 365 per day. The spend of a month is the number of charged days in that
+    month, from `start_month` (a 'YYYY-MM' string, the current month by default) on, times that daily cost.
+    Months already past are not projected, and the days of `start_month` before today are not either when
+    projecting from the current month. By default the projection runs until the last End of Extended Support
+    of the inventory, or for `months` months.
+
+    All domains are projected at once with NumPy date arithmetic, as a (domain x month) matrix of charged days,
+    `chunk_size` domains at a time. Returns a DataFrame of the spend per `group_by` group (rows) and month
+    (columns, 'YYYY-MM' strings).
+    """
+    # Only needed when projecting costs, so keep it out of module import time
+    import numpy as np
+    import pandas as pd
+
+    first_month, from_day = projection_start(start_month)
+    charged_from, charged_until, daily_cost = charged_window(priced)
+
+    if months is None:
+        last_month = charged_until.max().astype('datetime64[M]') if len(priced) else first_month
+        months = max(int((last_month - first_month).astype(int)) + 1, 1)
+    month_starts = np.arange(first_month, first_month + months, dtype='datetime64[M]')
+    month_first_days = np.maximum(month_starts.astype('datetime64[D]'), from_day)
+    month_end_days = (month_starts + 1).astype('datetime64[D]')
+    columns = [str(month) for month in month_starts]
+
+    codes, groups = pd.MultiIndex.from_frame(priced[list(group_by)]).factorize()
+    groups = groups.set_names(list(group_by))
+    spend = np.zeros((len(groups), len(month_starts)))
+    for chunk in range(0, len(priced), chunk_size):
+        rows = slice(chunk, chunk + chunk_size)
+        # Charged days of each domain (rows) in each month (columns)
+        first_days = np.maximum(charged_from[rows, None], month_first_days[None, :])
+        end_days = np.minimum(charged_until[rows, None], month_end_days[None, :])
+        charged_days = np.clip((end_days - first_days).astype(int), 0, None)
+        # Sum the spend of the domains of each group
+        np.add.at(spend, codes[rows], charged_days * daily_cost[rows, None])
+
+    LOGGER.debug(f'Projected {len(priced)} domains over {len(columns)} months')
+    return pd.DataFrame(spend, index=groups, columns=columns)
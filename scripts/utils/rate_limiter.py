@@ -0,0 +1,168 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import time
+import asyncio
+import threading
+
+from botocore.config import Config
+
+from utils.log import get_logger
+from utils.constants import (
+    RATE_LIMIT_INITIAL,
+    RATE_LIMIT_MIN,
+    RATE_LIMIT_MAX,
+    RATE_LIMIT_INCREASE,
+    RATE_LIMIT_DECREASE,
+    API_MAX_ATTEMPTS
+)
+
+LOGGER = get_logger(__name__)
+
+THROTTLING_ERROR_CODES = {
+    'Throttling', 'ThrottlingException', 'ThrottledException', 'RequestThrottledException',
+    'TooManyRequestsException', 'RequestLimitExceeded', 'RequestThrottled', 'LimitExceededException',
+    'SlowDown', 'PriorRequestNotComplete'
+}
+
+# botocore's standard retry mode retries throttling and transient errors with jittered exponential backoff
+RETRY_CONFIG = {'mode': 'standard', 'max_attempts': API_MAX_ATTEMPTS}
+CLIENT_CONFIG = Config(retries=RETRY_CONFIG)
+
+
+class _Bucket:
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated_at = time.monotonic()
+        self.decreased_at = 0.0
+        self.requests = 0
+        self.throttles = 0
+        self.wait = 0.0
+
+
+class AdaptiveRateLimiter:
+    """
+    Thread safe token buckets shared by all clients, one per (service, operation, region), whose rate adapts
+    to throttling responses: additive increase while requests succeed, multiplicative decrease when the
+    service throttles (AIMD). The request rate of each API settles just below its service limit, instead of
+    the scan bursting into throttling errors.
+
+    The same buckets pace both the thread engine (`acquire`) and the async engine (`acquire_async`).
+    """
+
+    def __init__(self, initial_rate=RATE_LIMIT_INITIAL, min_rate=RATE_LIMIT_MIN, max_rate=RATE_LIMIT_MAX,
+                 increase=RATE_LIMIT_INCREASE, decrease=RATE_LIMIT_DECREASE):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _get_bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.initial_rate)
+        return bucket
+
+    def try_acquire(self, key):
+        """
+        Take a token from the bucket of `key` if one is available and return 0, otherwise return the
+        number of seconds until the next token. Waiting callers try again, so a rate decrease applies at once.
+        """
+        with self._lock:
+            bucket = self._get_bucket(key)
+            now = time.monotonic()
+            # Refill, with a burst of at most one second of requests
+            bucket.tokens = min(bucket.rate, bucket.tokens + (now - bucket.updated_at) * bucket.rate)
+            bucket.updated_at = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                bucket.requests += 1
+                return 0.0
+            wait = (1 - bucket.tokens) / bucket.rate
+            bucket.wait += wait
+            return wait
+
+    def acquire(self, key):
+        """
+        Block until a request for `key` can be sent
+        """
+        while (wait := self.try_acquire(key)) > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self, key):
+        while (wait := self.try_acquire(key)) > 0:
+            await asyncio.sleep(wait)
+
+    def on_success(self, key):
+        with self._lock:
+            bucket = self._get_bucket(key)
+            # `rate` successes per second add up to `increase` requests per second, every second
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase / bucket.rate)
+
+    def on_throttle(self, key):
+        with self._lock:
+            bucket = self._get_bucket(key)
+            bucket.throttles += 1
+            now = time.monotonic()
+            # A burst of throttled requests in flight only counts as one decrease
+            if now - bucket.decreased_at >= 1.0:
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                bucket.tokens = min(bucket.tokens, 0.0)
+                bucket.decreased_at = now
+                LOGGER.debug('Throttled on %s, reducing request rate to %.1f/s', key, bucket.rate)
+
+    def _key(self, client, event_name):
+        # Event names are "<event>.<service>.<operation>"
+        return client.meta.service_model.service_name, event_name.rsplit('.', 1)[-1], client.meta.region_name
+
+    def _on_needs_retry(self, client, event_name, response=None, **kwargs):
+        if response is None:
+            return None
+        http_response, parsed = response
+        if http_response.status_code == 429 or parsed.get('Error', {}).get('Code') in THROTTLING_ERROR_CODES:
+            self.on_throttle(self._key(client, event_name))
+        elif http_response.status_code < 400:
+            self.on_success(self._key(client, event_name))
+        # Let the retry handler of the client decide whether and when to retry
+        return None
+
+    def instrument(self, client):
+        """
+        Pace every request (including retries) sent by a boto3 client, and adapt to its throttling responses
+        """
+        def before_send(event_name, **kwargs):
+            self.acquire(self._key(client, event_name))
+
+        client.meta.events.register('before-send', before_send)
+        client.meta.events.register('needs-retry', lambda event_name, **kwargs: self._on_needs_retry(client, event_name, **kwargs))
+        return client
+
+    def instrument_async(self, client):
+        """
+        Same as `instrument`, for an aiobotocore client, without blocking the event loop
+        """
+        async def before_send(event_name, **kwargs):
+            await self.acquire_async(self._key(client, event_name))
+
+        client.meta.events.register('before-send', before_send)
+        client.meta.events.register('needs-retry', lambda event_name, **kwargs: self._on_needs_retry(client, event_name, **kwargs))
+        return client
+
+    def log_stats(self):
+        with self._lock:
+            requests = sum(bucket.requests for bucket in self._buckets.values())
+            throttled = {key: bucket for key, bucket in self._buckets.items() if bucket.throttles}
+            wait = sum(bucket.wait for bucket in self._buckets.values())
+        LOGGER.info(f'API rate limiter: {requests} requests, {sum(bucket.throttles for bucket in throttled.values())} throttled, '
+                    f'{wait:.1f}s total wait')
+        for (service, operation, region), bucket in sorted(throttled.items()):
+            LOGGER.info(f'API rate limiter: {service} {operation} in {region} throttled {bucket.throttles} times, '
+                        f'settled at {bucket.rate:.1f} requests/s')
+
+
+# Shared by all clients of the run
+RATE_LIMITER = AdaptiveRateLimiter()
@@ -0,0 +1,98 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import json
+import threading
+from datetime import datetime, timedelta, timezone
+
+from utils.log import get_logger
+from utils.constants import (
+    OPT_IN_REGIONS,
+    ENABLED_REGIONS_CACHE_FILE,
+    ENABLED_REGIONS_CACHE_TTL_HOURS
+)
+
+LOGGER = get_logger(__name__)
+
+
+def list_enabled_regions(account_client):
+    """
+    Return the set of regions that are enabled in the account, using the Account ListRegions API
+    """
+    enabled_regions = set()
+    paginator = account_client.get_paginator('list_regions')
+    for page in paginator.paginate(RegionOptStatusContains=['ENABLED', 'ENABLED_BY_DEFAULT']):
+        enabled_regions.update(region['RegionName'] for region in page['Regions'])
+    return enabled_regions
+
+
+class RegionEnablementCache:
+    """
+    On-disk cache of the opt-in regions that are enabled in each account.
+
+    Regions that are enabled by default are always scanned. Opt-in regions are only scanned if the
+    Account ListRegions API says they are enabled in that account. If the lookup fails (for example
+    the member role does not allow `account:ListRegions`), all requested regions are scanned, as before.
+    With no `cache_file`, the cache is kept in memory only, so every account is looked up.
+    """
+
+    def __init__(self, cache_file=ENABLED_REGIONS_CACHE_FILE, ttl_hours=ENABLED_REGIONS_CACHE_TTL_HOURS):
+        self.cache_file = cache_file
+        self.ttl = timedelta(hours=ttl_hours)
+        self._lock = threading.Lock()
+        self._cache = {}
+        if self.cache_file is None:
+            return
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                self._cache = json.load(f)
+                LOGGER.debug(f'Read enabled regions of {len(self._cache)} accounts from file {self.cache_file}')
+        except (OSError, ValueError):
+            pass
+
+    def _get_cached(self, account_id):
+        with self._lock:
+            entry = self._cache.get(account_id)
+        if entry is None:
+            return None
+        if datetime.now(timezone.utc) - datetime.fromisoformat(entry['checked_at']) > self.ttl:
+            return None
+        return set(entry['enabled_opt_in_regions'])
+
+    def get_enabled_regions(self, account_id, regions, get_account_client):
+        """
+        Return the subset of `regions` (in the same order) that are enabled in the account.
+        `get_account_client` is only called if the account has to be looked up.
+        """
+        opt_in_regions = [region for region in regions if region in OPT_IN_REGIONS]
+        if not opt_in_regions:
+            return list(regions)
+
+        enabled_opt_in_regions = self._get_cached(account_id)
+        if enabled_opt_in_regions is None:
+            try:
+                enabled_opt_in_regions = list_enabled_regions(get_account_client()) & OPT_IN_REGIONS
+            except Exception as e:
+                LOGGER.info(f'Account: {account_id} | Could not look up enabled regions, scanning all requested regions. Exception: {e}')
+                return list(regions)
+
+            with self._lock:
+                self._cache[account_id] = {
+                    'checked_at': datetime.now(timezone.utc).isoformat(),
+                    'enabled_opt_in_regions': sorted(enabled_opt_in_regions)
+                }
+
+        skipped_regions = [region for region in opt_in_regions if region not in enabled_opt_in_regions]
+        if skipped_regions:
+            LOGGER.debug(f'Account: {account_id} | Skipping opt-in regions that are not enabled: {skipped_regions}')
+        return [region for region in regions if region not in OPT_IN_REGIONS or region in enabled_opt_in_regions]
+
+    def save(self):
+        """
+        Write the cache to disk
+        """
+        if self.cache_file is None:
+            return
+        with self._lock:
+            with open(self.cache_file, 'w', encoding="utf-8") as f:
+                json.dump(self._cache, f)
@@ -0,0 +1,202 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import csv
+import json
+import time
+import queue
+import threading
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+from utils.metrics import METRICS
+
+LOGGER = get_logger(__name__)
+
+OUTPUT_FORMATS = ['csv', 'jsonl', 'parquet']
+# Flush the output file after this many rows, or this many seconds, whichever comes first
+WRITER_BATCH_SIZE = 500
+WRITER_FLUSH_INTERVAL = 1.0
+
+_STOP = object()
+
+
+def stream_path(outfile, output_format):
+    """
+    Return the file that rows are appended to while scanning. Parquet files cannot be appended to, and are
+    unreadable until their footer is written, so Parquet rows are spooled to a JSONL file next to the output
+    file and converted once the scan completes.
+    """
+    if output_format == 'parquet':
+        return f'{outfile}.spool.jsonl'
+    return outfile
+
+
+class _CsvSink:
+    def __init__(self, path, columns, resume, formatters):
+        self.columns = columns
+        self.formatters = formatters or {}
+        self.file = open(path, 'a' if resume else 'w', encoding="utf-8", newline='')
+        self.writer = csv.writer(self.file, lineterminator='\n')
+        if not resume:
+            self.writer.writerow(columns)
+
+    def _format(self, column, value):
+        if column in self.formatters and value is not None:
+            return self.formatters[column](value)
+        return value
+
+    def write_rows(self, rows):
+        self.writer.writerows([self._format(column, row.get(column)) for column in self.columns] for row in rows)
+
+
+class _JsonlSink:
+    def __init__(self, path, columns, resume):
+        self.columns = columns
+        self.file = open(path, 'a' if resume else 'w', encoding="utf-8")
+
+    def write_rows(self, rows):
+        self.file.writelines(json.dumps({column: row.get(column) for column in self.columns}) + '\n' for row in rows)
+
+
+def _write_parquet(spool_file, outfile, columns, column_types, batch_size):
+    """
+    Convert the JSONL spool to a Parquet file, one row group per `batch_size` rows
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as err:
+        raise ValidationException('Parquet output needs the pyarrow package. Install it with `pip install pyarrow`, '
+                                  f'or use `--output-format jsonl`. The results are kept in {spool_file}') from err
+
+    arrow_types = {int: pa.int64(), float: pa.float64()}
+    schema = pa.schema([(column, arrow_types.get(column_types.get(column), pa.string())) for column in columns])
+
+    with open(spool_file, encoding="utf-8") as f, pq.ParquetWriter(outfile, schema) as parquet_writer:
+        rows = []
+        for line in f:
+            rows.append(json.loads(line))
+            if len(rows) >= batch_size:
+                parquet_writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+                rows = []
+        if rows:
+            parquet_writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+    os.remove(spool_file)
+
+
+class ResultWriter:
+    """
+    Writes the scan results from a single background thread.
+
+    Scan engines hand over the rows of each (account, region) unit with `submit`, which only puts them on a queue.
+    The writer thread keeps the output file open, and appends the rows and flushes the file in batches, every
+    `batch_size` rows or `flush_interval` seconds. After each flush the file is fsync'ed and `on_flush` is called,
+    from the writer thread, with the (account, region, row count) of the units whose rows are now in the file and
+    the size of the file - this is where the units are recorded in the checkpoint journal.
+
+    If a `transform` is given, it is called from the writer thread with the rows of each batch, and returns the
+    rows to write - this is where the collected domains are costed (see cost_model.py).
+
+    If a `store` is given (see results_store.py) the rows are also upserted into it, and committed on each flush.
+
+    `csv_formatters` maps a column to a function formatting its values in CSV output (e.g. currency). JSONL and
+    Parquet output keep the raw values, with the Parquet types given by `column_types` (column -> int or float,
+    all other columns are strings).
+    """
+
+    def __init__(self, outfile, columns, output_format='csv', resume=False, on_flush=None, transform=None, csv_formatters=None,
+                 column_types=None, store=None, batch_size=WRITER_BATCH_SIZE, flush_interval=WRITER_FLUSH_INTERVAL):
+        if output_format not in OUTPUT_FORMATS:
+            raise ValidationException(f'Unsupported output format {output_format}, must be one of {OUTPUT_FORMATS}')
+        self.outfile = outfile
+        self.columns = columns
+        self.output_format = output_format
+        self.column_types = column_types or {}
+        self.on_flush = on_flush
+        self.transform = transform
+        self.store = store
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.rows_written = 0
+        self._queue = queue.Queue()
+        self._error = None
+
+        path = stream_path(outfile, output_format)
+        if output_format == 'csv':
+            self._sink = _CsvSink(path, columns, resume, csv_formatters)
+        else:
+            self._sink = _JsonlSink(path, columns, resume)
+
+        self._thread = threading.Thread(target=self._run, name='ResultWriter', daemon=True)
+        self._thread.start()
+
+    def submit(self, account_id, region, rows):
+        """
+        Queue the rows of a scanned (account, region) unit for writing
+        """
+        if self._error is not None:
+            raise self._error
+        self._queue.put((account_id, region, rows))
+
+    def _flush(self, pending_units, pending_rows):
+        with METRICS.measure('cost_results'):
+            rows = self.transform(pending_rows) if self.transform is not None else pending_rows
+        with METRICS.measure('write_results'):
+            if rows:
+                self._sink.write_rows(rows)
+                if self.store is not None:
+                    self.store.write_rows(rows)
+            self._sink.file.flush()
+            os.fsync(self._sink.file.fileno())
+            if self.store is not None:
+                self.store.commit()
+        if self.on_flush is not None:
+            self.on_flush(pending_units, self._sink.file.tell())
+        self.rows_written += len(rows)
+
+    def _run(self):
+        pending_units = []
+        pending_rows = []
+        next_flush = time.monotonic() + self.flush_interval
+        try:
+            while True:
+                try:
+                    item = self._queue.get(timeout=max(next_flush - time.monotonic(), 0))
+                except queue.Empty:
+                    item = None
+
+                if item is _STOP:
+                    break
+                if item is not None:
+                    account_id, region, rows = item
+                    pending_units.append((account_id, region, len(rows)))
+                    pending_rows.extend(rows)
+
+                if len(pending_rows) >= self.batch_size or time.monotonic() >= next_flush:
+                    if pending_units:
+                        self._flush(pending_units, pending_rows)
+                        pending_units = []
+                        pending_rows = []
+                    next_flush = time.monotonic() + self.flush_interval
+
+            if pending_units:
+                self._flush(pending_units, pending_rows)
+        except Exception as e:
+            LOGGER.error(f'Failed writing results to {self.outfile}. Exception: {e}')
+            self._error = e
+
+    def close(self, finalize=True):
+        """
+        Write the remaining queued rows and close the output file. With `finalize`, i.e. once the whole
+        scan has completed, Parquet output is converted from its spool file.
+        """
+        self._queue.put(_STOP)
+        self._thread.join()
+        self._sink.file.close()
+        if self._error is not None:
+            raise self._error
+
+        if finalize and self.output_format == 'parquet':
+            _write_parquet(stream_path(self.outfile, 'parquet'), self.outfile, self.columns, self.column_types, self.batch_size)
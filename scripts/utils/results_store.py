@@ -0,0 +1,108 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import sqlite3
+from datetime import datetime, timezone
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+
+LOGGER = get_logger(__name__)
+
+# Output column -> (SQL column, SQL type)
+STORE_COLUMNS = {
+    'AccountId': ('account_id', 'TEXT'),
+    'Region': ('region', 'TEXT'),
+    'RegionName': ('region_name', 'TEXT'),
+    'DomainName': ('domain_name', 'TEXT'),
+    'ARN': ('arn', 'TEXT'),
+    'EngineVersion': ('engine_version', 'TEXT'),
+    'DedicatedMasterType': ('master_type', 'TEXT'),
+    'DedicatedMasterCount': ('master_count', 'INTEGER'),
+    'Normalization Factor (Master Nodes)': ('master_nf', 'REAL'),
+    'InstanceType': ('instance_type', 'TEXT'),
+    'InstanceCount': ('instance_count', 'INTEGER'),
+    'Normalization Factor (Data Nodes)': ('instance_nf', 'REAL'),
+    'WarmType': ('warm_type', 'TEXT'),
+    'WarmCount': ('warm_count', 'INTEGER'),
+    'Normalization Factor (Ultrawarm Nodes)': ('warm_nf', 'REAL'),
+    'CoordinatorNodeType': ('coordinator_type', 'TEXT'),
+    'CoordinatorNodeCount': ('coordinator_count', 'INTEGER'),
+    'Normalization Factor (Coordinator Nodes)': ('coordinator_nf', 'REAL'),
+    'Regional Price Per NIH': ('price_per_nih', 'REAL'),
+    'End of Standard Support': ('end_of_standard_support', 'TEXT'),
+    'End of Extended Support': ('end_of_extended_support', 'TEXT'),
+    'Yearly Extended Support Cost': ('yearly_cost', 'REAL'),
+}
+
+_SCHEMA = f'''
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id      TEXT PRIMARY KEY,
+    started_at   TEXT NOT NULL,
+    completed_at TEXT,
+    outfile      TEXT
+);
+CREATE TABLE IF NOT EXISTS domains (
+    scan_id TEXT NOT NULL REFERENCES scans(scan_id),
+    {", ".join(f"{name} {sql_type}" for name, sql_type in STORE_COLUMNS.values())},
+    PRIMARY KEY (scan_id, arn)
+);
+CREATE INDEX IF NOT EXISTS domains_account_idx ON domains (account_id);
+CREATE INDEX IF NOT EXISTS domains_region_idx ON domains (region);
+CREATE INDEX IF NOT EXISTS domains_engine_version_idx ON domains (engine_version);
+'''
+
+_SQL_COLUMNS = [name for name, _ in STORE_COLUMNS.values()]
+_UPSERT = (f'INSERT INTO domains (scan_id, {", ".join(_SQL_COLUMNS)}) VALUES (?, {", ".join("?" * len(_SQL_COLUMNS))}) '
+           f'ON CONFLICT (scan_id, arn) DO UPDATE SET {", ".join(f"{name} = excluded.{name}" for name in _SQL_COLUMNS if name != "arn")}')
+
+
+def new_scan_id():
+    """
+    Return the id of a new scan, its start time in UTC, which also sorts scans in the order they ran
+    """
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class ResultsStore:
+    """
+    SQLite store of the eligible domains found by every scan, keyed by (scan id, domain ARN).
+
+    Rows are upserted, so a unit scanned again after resuming an interrupted run replaces its previous rows.
+    The database is in WAL mode, so it can be queried (see query_results.py) while a scan writes to it.
+    The connection is created by the main thread and then only used by the result writer thread.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self.conn = sqlite3.connect(path, check_same_thread=False)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.executescript(_SCHEMA)
+        except sqlite3.Error as e:
+            raise ValidationException(f'Cannot open the SQLite results store {path}: {e}') from e
+
+    def start_scan(self, scan_id, outfile):
+        """
+        Register a scan, or keep the existing registration when an interrupted scan is resumed
+        """
+        with self.conn:
+            self.conn.execute('INSERT OR IGNORE INTO scans (scan_id, started_at, outfile) VALUES (?, ?, ?)',
+                              (scan_id, datetime.now(timezone.utc).isoformat(), outfile))
+        self.scan_id = scan_id
+        LOGGER.info(f'Saving results of scan {scan_id} to SQLite results store {self.path}')
+
+    def write_rows(self, rows):
+        self.conn.executemany(_UPSERT, [[self.scan_id] + [row.get(column) for column in STORE_COLUMNS] for row in rows])
+
+    def commit(self):
+        self.conn.commit()
+
+    def complete_scan(self):
+        with self.conn:
+            self.conn.execute('UPDATE scans SET completed_at = ? WHERE scan_id = ?',
+                              (datetime.now(timezone.utc).isoformat(), self.scan_id))
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,168 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import json
+import threading
+from datetime import datetime
+
+from utils.log import get_logger
+from utils.aos_mappings import (
+    get_aos_extended_support_mapping,
+    get_aos_instance_mapping
+)
+from utils.constants import DESCRIBE_BATCH_SIZE, DESCRIBE_CONCURRENCY
+from utils.eligibility import ExtendedSupportIndex
+from utils.normalization import NormalizationResolver
+from utils.metrics import METRICS
+from utils.checkpoint import CheckpointJournal, CHECKPOINT_FILE
+from utils.pricing_snapshot import (
+    get_extended_support_pricing,
+    PRICING_SNAPSHOT_FILE,
+    PRICING_SNAPSHOT_TTL_HOURS
+)
+
+LOGGER = get_logger(__name__)
+
+UTILS_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class ScannerContext:
+    """
+    Local caches used by a scan, each built the first time it is used:
+        1. Opensearch Regions
+        2. Opensearch Instance Mapping, and the normalization factor resolver built from it (see normalization.py)
+        3. Opensearch Extended Support Versions, and the eligibility index built from them (see eligibility.py)
+        4. Opensearch Extended Support Pricing (from the local pricing snapshot, see pricing_snapshot.py)
+        5. Checkpoint journal of the (account, region) units already processed
+        6. Output file name, with the extension of the output format (the `output` directory is created on first use)
+
+    Creating a context is cheap and does no network or file I/O, so the scanner module can be imported
+    as a library, and CLI modes that do not scan (e.g. --generate-regions-file) do not pay for any of it.
+    """
+
+    def __init__(self, regions=None, output_dir='./output', output_format='csv', checkpoint_file=CHECKPOINT_FILE,
+                 pricing_snapshot_file=PRICING_SNAPSHOT_FILE, pricing_ttl_hours=PRICING_SNAPSHOT_TTL_HOURS, offline=False):
+        self.regions = regions if regions is not None else {}
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.checkpoint_file = checkpoint_file
+        self.pricing_snapshot_file = pricing_snapshot_file
+        self.pricing_ttl_hours = pricing_ttl_hours
+        self.offline = offline
+        # Result writer of the running scan, see result_writer.py
+        self.writer = None
+        # Cache of domain descriptions, only used by incremental scans, see domain_cache.py
+        self.domain_cache = None
+        # DescribeDomains batching, and the executor describing the batches of a unit concurrently, see describe_batches.py
+        self.describe_batch_size = DESCRIBE_BATCH_SIZE
+        self.describe_concurrency = DESCRIBE_CONCURRENCY
+        self.describe_executor = None
+        # Fail the unit on API errors such as AccessDenied instead of skipping the region (--strict, --dead-letter-file)
+        self.fail_on_api_errors = False
+        self._init_lock = threading.Lock()
+        self._instance_mapping = None
+        self._normalization = None
+        self._extended_support_versions = None
+        self._eligibility = None
+        self._pricing = None
+        self._checkpoint = None
+        self._outfile = None
+
+    @property
+    def instance_mapping(self):
+        with self._init_lock:
+            if self._instance_mapping is None:
+                # Check if the mapping file exists, if it does, read from it
+                try:
+                    with open(os.path.join(UTILS_DIR, 'aos_instance_mapping.json'), encoding="utf-8") as f:
+                        self._instance_mapping = json.load(f)
+                        LOGGER.debug('Read AOS instance mapping from file aos_instance_mapping.json')
+                except (OSError, ValueError):
+                    LOGGER.debug("No AOS instance mapping file found, getting mapping from AWS Pricing page")
+                    self._instance_mapping = get_aos_instance_mapping()
+            return self._instance_mapping
+
+    @instance_mapping.setter
+    def instance_mapping(self, instance_mapping):
+        with self._init_lock:
+            self._instance_mapping = instance_mapping
+            self._normalization = None
+
+    @property
+    def normalization(self):
+        if self._normalization is None:
+            instance_mapping = self.instance_mapping
+            with self._init_lock:
+                if self._normalization is None:
+                    # Instance types missing from the mapping regenerate it once, see NormalizationResolver
+                    self._normalization = NormalizationResolver(instance_mapping, get_aos_instance_mapping)
+        return self._normalization
+
+    @property
+    def extended_support_versions(self):
+        with self._init_lock:
+            if self._extended_support_versions is None:
+                # Check if the extended support file exists, if it does, read from it
+                try:
+                    with open(os.path.join(UTILS_DIR, 'extended_support_versions.json'), encoding="utf-8") as f:
+                        self._extended_support_versions = json.load(f)
+                        LOGGER.debug('Read AOS extended support versions mapping from file extended_support_versions.json')
+                except (OSError, ValueError):
+                    LOGGER.debug("No AOS extended support versions mapping file found, getting mapping from AWS documentation")
+                    self._extended_support_versions = get_aos_extended_support_mapping()
+            return self._extended_support_versions
+
+    @extended_support_versions.setter
+    def extended_support_versions(self, extended_support_versions):
+        with self._init_lock:
+            self._extended_support_versions = extended_support_versions
+            self._eligibility = None
+
+    @property
+    def eligibility(self):
+        if self._eligibility is None:
+            extended_support_versions = self.extended_support_versions
+            with self._init_lock:
+                if self._eligibility is None:
+                    self._eligibility = ExtendedSupportIndex(extended_support_versions)
+        return self._eligibility
+
+    @property
+    def pricing(self):
+        with self._init_lock:
+            if self._pricing is None:
+                with METRICS.measure('pricing'):
+                    self._pricing = get_extended_support_pricing(self.pricing_snapshot_file, self.pricing_ttl_hours, self.offline)
+            return self._pricing
+
+    @pricing.setter
+    def pricing(self, pricing):
+        with self._init_lock:
+            self._pricing = pricing
+
+    @property
+    def checkpoint(self):
+        with self._init_lock:
+            if self._checkpoint is None:
+                self._checkpoint = CheckpointJournal(self.checkpoint_file)
+            return self._checkpoint
+
+    @property
+    def outfile(self):
+        with self._init_lock:
+            if self._outfile is None:
+                # check if `output` directory exists, if not create it.
+                if not os.path.isdir(self.output_dir):
+                    LOGGER.debug(f"'{self.output_dir}' folder does not exist, creating it now")
+                    os.makedirs(self.output_dir)
+
+                # create a filename using today's date time in YY-MM-DD HH-MM format
+                self._outfile = os.path.join(self.output_dir, f'aos_extended_support_instances-{datetime.now().strftime("%Y-%m-%d %H-%M")}.{self.output_format}')
+                LOGGER.info("Outfile name: {}".format(self._outfile))
+            return self._outfile
+
+    @outfile.setter
+    def outfile(self, outfile):
+        with self._init_lock:
+            self._outfile = outfile
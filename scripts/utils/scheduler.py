@@ -0,0 +1,107 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from utils.log import get_logger
+
+LOGGER = get_logger(__name__)
+
+
+class ScanScheduler:
+    """
+    Fan out (account, region) units of work over a thread pool.
+
+    Units are dispatched as soon as a worker is free, subject to a cap on the number of units
+    running concurrently for a single account and for a single region. This keeps the pool busy
+    until the very end of the run, instead of a few large accounts scanning their regions one
+    after another while the rest of the pool sits idle. Without `max_per_region`, a single region
+    can use every worker.
+    """
+
+    def __init__(self, max_workers=100, max_per_account=8, max_per_region=None):
+        self.max_workers = max_workers
+        self.max_per_account = max_per_account
+        self.max_per_region = max_per_region or max_workers
+
+        self._pending = {}
+        self._regions = []
+        self._cursor = 0
+        self._running_per_account = defaultdict(int)
+        self._running_per_region = defaultdict(int)
+
+    def _add_units(self, units):
+        for account, region in units:
+            if region not in self._pending:
+                self._pending[region] = deque()
+                self._regions.append(region)
+            self._pending[region].append(account)
+
+    def _next_unit(self):
+        """
+        Return the next (account, region) unit that can run without exceeding the caps, or None
+        """
+        for _ in range(len(self._regions)):
+            region = self._regions[self._cursor]
+            self._cursor = (self._cursor + 1) % len(self._regions)
+            if self._running_per_region[region] >= self.max_per_region:
+                continue
+
+            accounts = self._pending[region]
+            for _ in range(len(accounts)):
+                account = accounts[0]
+                if self._running_per_account[account] < self.max_per_account:
+                    accounts.popleft()
+                    return account, region
+                # Account is at its cap, move it to the back of this region's queue
+                accounts.rotate(-1)
+        return None
+
+    def run(self, units, worker, on_complete, on_error=None):
+        """
+        Run `worker(account, region)` for every unit and call `on_complete(account, region, result)`
+        in the calling thread as each unit finishes.
+
+        If `on_error` is given, a worker exception is handed to `on_error(account, region, exception)`, in the
+        calling thread, and the other units keep running. Otherwise the first worker exception fails fast: units
+        not started yet are cancelled and the exception is re-raised without waiting for the running units.
+        """
+        self._add_units(units)
+        total = sum(len(accounts) for accounts in self._pending.values())
+        LOGGER.info(f'Scheduling {total} (account, region) units on {self.max_workers} workers '
+                    f'(max {self.max_per_account} per account, max {self.max_per_region} per region)')
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            running = {}
+            while True:
+                while len(running) < self.max_workers:
+                    unit = self._next_unit()
+                    if unit is None:
+                        break
+                    account, region = unit
+                    self._running_per_account[account] += 1
+                    self._running_per_region[region] += 1
+                    running[executor.submit(worker, account, region)] = unit
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    account, region = running.pop(future)
+                    self._running_per_account[account] -= 1
+                    self._running_per_region[region] -= 1
+                    error = future.exception()
+                    if error is None:
+                        on_complete(account, region, future.result())
+                    elif on_error is not None:
+                        on_error(account, region, error)
+                    else:
+                        raise error
+        except BaseException:
+            # The running units are not waited for: their results would be discarded, and they are scanned again on resume
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+        executor.shutdown()
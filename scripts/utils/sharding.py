@@ -0,0 +1,160 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import csv
+import sys
+import json
+import zlib
+import subprocess
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+
+LOGGER = get_logger(__name__)
+
+# Written by each shard once its scan completes, with the output file the shard wrote
+SHARD_MANIFEST_FILE = '.shard_manifest.json'
+# Account pool of a `--shards` scan, listed once by the parent process and read by every shard
+SHARD_ACCOUNTS_FILE = '.shard_accounts.csv'
+
+
+def parse_shard(spec):
+    """
+    Return the (index, count) of a shard given as i/N, with 0 <= i < N
+    """
+    try:
+        index, count = (int(value) for value in spec.split('/'))
+    except ValueError as err:
+        raise ValidationException(f'Invalid input: --shard must be of the format i/N, e.g. 0/4, found {spec}') from err
+    if count < 1 or not 0 <= index < count:
+        raise ValidationException(f'Invalid input: --shard {spec} must have N >= 1 and 0 <= i < N')
+    return index, count
+
+
+def shard_of(account_id, count):
+    """
+    Return the shard of an account. The shard only depends on the account ID, so every host and every run
+    assigns an account to the same shard, whatever the other accounts of the organization.
+    """
+    return zlib.crc32(account_id.encode()) % count
+
+
+def shard_accounts(accounts, index, count):
+    return [account for account in accounts if shard_of(account, count) == index]
+
+
+def shard_path(path, index, count):
+    """
+    Return the path of the shard's own copy of a file or directory, e.g. output.csv -> output-shard-0-of-4.csv
+    """
+    stem, extension = os.path.splitext(path)
+    return f'{stem}-shard-{index}-of-{count}{extension}'
+
+
+def write_shard_manifest(index, count, outfile, rows):
+    with open(shard_path(SHARD_MANIFEST_FILE, index, count), 'w', encoding="utf-8") as f:
+        json.dump({'shard': f'{index}/{count}', 'outfile': outfile, 'rows': rows}, f)
+
+
+def read_shard_manifest(index, count):
+    """
+    Return the manifest of a shard whose scan completed, or None
+    """
+    try:
+        with open(shard_path(SHARD_MANIFEST_FILE, index, count), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def run_shards(count, script, argv):
+    """
+    Scan the `count` shards in parallel, one child process of the script per shard (run with `argv`, --shard i/N and
+    --shard-manifest), and return the manifests of the shards. Shards that already completed in a previous run (their
+    manifest exists) are not scanned again, and the other shards resume from their own checkpoint journal.
+    """
+    processes = {}
+    for index in range(count):
+        if read_shard_manifest(index, count) is not None:
+            LOGGER.info(f'Shard {index}/{count} already completed in a previous run, not scanning it again')
+            continue
+        processes[index] = subprocess.Popen([sys.executable, script] + argv + ['--shard', f'{index}/{count}', '--shard-manifest'])
+    LOGGER.info(f'Started {len(processes)} shard processes: {[process.pid for process in processes.values()]}')
+
+    failed = [index for index, process in processes.items() if process.wait() != 0]
+    if failed:
+        raise ValidationException(f'Shards {failed} of {count} failed, see their logs above. Run the same command again '
+                                  f'to resume them, the shards that completed are not scanned again')
+    return [read_shard_manifest(index, count) for index in range(count)]
+
+
+def remove_shard_manifests(count):
+    for index in range(count):
+        os.remove(shard_path(SHARD_MANIFEST_FILE, index, count))
+
+
+def _cost(value):
+    # CSV output has formatted costs, e.g. "$1,234.56", and no cost is an empty value
+    if value is None or value == '':
+        return 0.0
+    if isinstance(value, str):
+        negative = value.startswith('-')
+        value = float(value.lstrip('-').replace('$', '').replace(',', ''))
+        return -value if negative else value
+    return float(value)
+
+
+def merge_outputs(infiles, outfile, output_format, cost_column):
+    """
+    Merge the output files of the shards (rows are not re-costed) into one output file, and return the global totals:
+    rows, accounts, regions and yearly cost
+    """
+    accounts, regions, cost, rows = set(), set(), 0.0, 0
+
+    def add(row):
+        nonlocal cost, rows
+        accounts.add(row['AccountId'])
+        regions.add(row['Region'])
+        cost += _cost(row.get(cost_column))
+        rows += 1
+
+    if output_format == 'parquet':
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise ValidationException('Merging Parquet output needs the pyarrow package. Install it with `pip install pyarrow`') from err
+        parquet_writer = None
+        try:
+            for infile in infiles:
+                table = pq.read_table(infile)
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(outfile, table.schema)
+                parquet_writer.write_table(table)
+                for row in table.select(['AccountId', 'Region', cost_column]).to_pylist():
+                    add(row)
+        finally:
+            if parquet_writer is not None:
+                parquet_writer.close()
+    elif output_format == 'csv':
+        with open(outfile, 'w', encoding="utf-8", newline='') as out:
+            writer = None
+            for infile in infiles:
+                with open(infile, encoding="utf-8", newline='') as f:
+                    reader = csv.DictReader(f)
+                    if writer is None:
+                        writer = csv.DictWriter(out, reader.fieldnames, lineterminator='\n')
+                        writer.writeheader()
+                    for row in reader:
+                        writer.writerow(row)
+                        add(row)
+    else:
+        with open(outfile, 'w', encoding="utf-8") as out:
+            for infile in infiles:
+                with open(infile, encoding="utf-8") as f:
+                    for line in f:
+                        if line.strip():
+                            out.write(line)
+                            add(json.loads(line))
+
+    return {'rows': rows, 'accounts': len(accounts), 'regions': len(regions), 'yearly_cost': cost}
@@ -0,0 +1,237 @@
+# Copyright Amazon.com, Inc. or its affiliates. All Rights Reserved.
+# SPDX-License-Identifier: MIT-0
+
+import os
+import json
+import shlex
+from fnmatch import fnmatchcase
+
+from utils.log import get_logger
+from utils.utils import ValidationException
+from utils.cost_model import NODE_COLUMNS, NO_NODE_TYPE
+from utils.normalization import instance_size
+from utils.projection import projection_start, charged_window
+
+LOGGER = get_logger(__name__)
+
+ACTIONS = ['upgrade', 'rightsize']
+# Filters of a scenario -> inventory column they match (shell style patterns, e.g. version=Elasticsearch_6.*)
+FILTER_COLUMNS = {'account': 'AccountId', 'region': 'Region', 'version': 'EngineVersion'}
+# Node role of a rightsize scenario -> (node type, node count, normalization factor) columns
+ROLE_COLUMNS = dict(zip(['data', 'master', 'coordinator', 'warm'], NODE_COLUMNS))
+# Instance sizes offered in each OpenSearch instance family, the size ladders of rightsize scenarios
+INSTANCE_SIZES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'aos_instance_sizes.json')
+
+
+class Scenario:
+    """
+    A what-if scenario, parsed from a line like:
+
+        upgrade version=Elasticsearch_6.* region=eu-west-1 by=2025-03
+        upgrade version=OpenSearch_1.* to=OpenSearch_2.5 by=2025-06-30 name="OpenSearch 1.x to 2.5"
+        rightsize role=data size=2xlarge region=us-*
+
+    `upgrade` moves the matching domains to the `to` version (by default a version out of extended support)
+    on the `by` date. `rightsize` moves the `role` nodes (data by default) of the matching domains to the next
+    smaller instance size of their family, e.g. r6g.2xlarge to r6g.xlarge or c5.18xlarge to c5.9xlarge, on the
+    `by` date. `by` is a YYYY-MM-DD date, or YYYY-MM for
+    the first day of that month, and defaults to the first projected day. Filters (`account`, `region`,
+    `version` and `size`) are shell style patterns.
+    """
+
+    def __init__(self, line):
+        try:
+            tokens = shlex.split(line)
+        except ValueError as err:
+            raise ValidationException(f'Invalid scenario "{line}": {err}') from err
+        if not tokens or tokens[0] not in ACTIONS:
+            raise ValidationException(f'Invalid scenario "{line}", it must start with one of {ACTIONS}')
+        self.action = tokens[0]
+        options = {}
+        for token in tokens[1:]:
+            key, separator, value = token.partition('=')
+            if not separator:
+                raise ValidationException(f'Invalid scenario "{line}", expected key=value instead of "{token}"')
+            options[key] = value
+
+        allowed = set(FILTER_COLUMNS) | {'by', 'name', 'size'} | ({'to'} if self.action == 'upgrade' else {'role'})
+        unknown = set(options) - allowed
+        if unknown:
+            raise ValidationException(f'Invalid scenario "{line}", unknown options {sorted(unknown)} for {self.action}')
+
+        self.name = options.pop('name', line.strip())
+        self.by = options.pop('by', None)
+        self.to_version = options.pop('to', None)
+        self.role = options.pop('role', 'data')
+        if self.role not in ROLE_COLUMNS:
+            raise ValidationException(f'Invalid scenario "{line}", role must be one of {list(ROLE_COLUMNS)}')
+        self.size = options.pop('size', None)
+        self.filters = options
+
+    def __repr__(self):
+        return f'Scenario({self.name!r})'
+
+
+def read_instance_sizes(path=INSTANCE_SIZES_FILE):
+    """
+    Return the instance sizes of each instance family, empty if the file cannot be read
+    """
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError) as err:
+        LOGGER.warning(f'Cannot read the instance sizes file {path}: {err}. Only the instance types of the inventory can be rightsized')
+        return {}
+
+
+class UpgradeSimulator:
+    """
+    Evaluates what-if scenarios against a costed inventory (see cost_model.py), returning the extended support
+    cost each scenario avoids from the first projected day until the end of extended support of each domain.
+
+    Everything that does not depend on the scenario is computed once: the charged window and daily cost of each
+    domain (see projection.py), and an index of each filtered column (version, region, account and the instance
+    size of each node role) as integer codes into its distinct values. A scenario then only matches its patterns
+    against the distinct values, selects the domains with a lookup of their codes, and sums the avoided cost of
+    the selected domains, so hundreds of scenarios are evaluated in seconds on 100k domains.
+
+    Rightsizing moves a node to the next smaller size that exists in its family: the size ladder of a family is
+    made of the sizes of `instance_sizes` (family -> sizes, see aos_instance_sizes.json) and the sizes of that
+    family found in the inventory, ordered by normalization factor. Nodes of the smallest size of their family,
+    or of a family without a smaller size, are not rightsized and are reported.
+    """
+
+    def __init__(self, priced, normalization, eligibility, start_month=None, instance_sizes=None):
+        # Only needed when simulating scenarios, so keep it out of module import time
+        import numpy as np
+        import pandas as pd
+
+        self.normalization = normalization
+        self.eligibility = eligibility
+        _, self.from_day = projection_start(start_month)
+        self.charged_from, self.charged_until, self.daily_cost = charged_window(priced)
+        self.baseline = float((self.daily_cost * self._charged_days(self.from_day, self.charged_from, self.charged_until)).sum())
+
+        self._index = {}
+        for name, column in FILTER_COLUMNS.items():
+            self._index[name] = pd.factorize(priced[column])
+
+        # Instance types of each node role, and the normalization factor saved by the next smaller size of each type
+        self._price = priced['Regional Price Per NIH'].to_numpy(dtype=float)
+        role_types = {role: pd.factorize(priced[type_column]) for role, (type_column, _, _) in ROLE_COLUMNS.items()}
+        inventory_types = {instance_type for _, types in role_types.values() for instance_type in types}
+        self._ladders = self._size_ladders(read_instance_sizes() if instance_sizes is None else instance_sizes,
+                                           inventory_types - {NO_NODE_TYPE})
+        self._roles = {}
+        for role, (_, count_column, _) in ROLE_COLUMNS.items():
+            codes, types = role_types[role]
+            types = list(types)
+            sizes = [instance_size(instance_type) if instance_type != NO_NODE_TYPE else None for instance_type in types]
+            saved = self._saved_factors(types)
+            saved_factor = np.array([factor or 0 for factor in saved] + [0], dtype=float)
+            no_smaller_size = np.array([factor is None and instance_type != NO_NODE_TYPE
+                                        for instance_type, factor in zip(types, saved)] + [False])
+            self._roles[role] = {
+                'types': (codes, types),
+                'sizes': (codes, sizes),
+                'count': priced[count_column].to_numpy(dtype=float),
+                'saved_factor': saved_factor[codes],
+                'no_smaller_size': no_smaller_size[codes],
+            }
+
+    def _size_ladders(self, instance_sizes, instance_types):
+        """
+        Return the sizes of each instance family, ordered by normalization factor, from the known sizes of each family
+        and the instance types of the inventory. Sizes without a normalization factor are left out.
+        """
+        ladders = {family: set(sizes) for family, sizes in instance_sizes.items()}
+        for instance_type in instance_types:
+            size = instance_size(instance_type)
+            if size is not None:
+                ladders.setdefault(instance_type.split('.')[0], set()).add(size)
+        # Factors of the mapping of the resolver, refreshed if a size of the inventory was missing
+        mapping = self.normalization.instance_mapping
+        return {family: sorted((size for size in sizes if size in mapping), key=mapping.get) for family, sizes in ladders.items()}
+
+    def _saved_factors(self, instance_types):
+        """
+        Return the normalization factor saved by moving each instance type to the next smaller size of its family,
+        with the factors of the normalization resolver used to cost the inventory. None if the family has no smaller
+        size, or the factor of the type is unknown.
+        """
+        factors = self.normalization.resolve(instance_types)
+        mapping = self.normalization.instance_mapping
+        saved = []
+        for instance_type, factor in zip(instance_types, factors):
+            ladder = self._ladders.get(instance_type.split('.')[0], [])
+            size = instance_size(instance_type)
+            position = ladder.index(size) if size in ladder else 0
+            saved.append(factor - mapping[ladder[position - 1]] if factor is not None and position > 0 else None)
+        return saved
+
+    @staticmethod
+    def _charged_days(from_day, charged_from, charged_until):
+        import numpy as np
+        return np.clip((charged_until - np.maximum(charged_from, from_day)).astype(int), 0, None)
+
+    def _parse_day(self, scenario):
+        import numpy as np
+
+        if scenario.by is None:
+            return self.from_day
+        try:
+            day = np.datetime64(scenario.by, 'D') if len(scenario.by) > 7 else np.datetime64(scenario.by, 'M').astype('datetime64[D]')
+        except ValueError as err:
+            raise ValidationException(f'Invalid date {scenario.by} in scenario "{scenario.name}", use YYYY-MM or YYYY-MM-DD') from err
+        return max(day, self.from_day)
+
+    @staticmethod
+    def _match(index, pattern):
+        import numpy as np
+
+        codes, values = index
+        matches = np.array([value is not None and fnmatchcase(str(value), pattern) for value in values] + [False])
+        return matches[codes]
+
+    def _select(self, scenario):
+        import numpy as np
+
+        selected = np.ones(len(self.daily_cost), dtype=bool)
+        for name, pattern in scenario.filters.items():
+            selected &= self._match(self._index[name], pattern)
+        if scenario.size is not None:
+            selected &= self._match(self._roles[scenario.role if scenario.action == 'rightsize' else 'data']['sizes'], scenario.size)
+        return selected
+
+    def evaluate(self, scenario):
+        """
+        Return the number of domains a scenario changes, and the extended support cost it avoids
+        """
+        import numpy as np
+
+        selected = self._select(scenario)
+        day = self._parse_day(scenario)
+        charged_from, charged_until = self.charged_from[selected], self.charged_until[selected]
+        remaining_days = self._charged_days(day, charged_from, charged_until)
+
+        if scenario.action == 'upgrade':
+            target_days = 0
+            if scenario.to_version is not None and scenario.to_version in self.eligibility:
+                # The target version is in extended support too, the domains keep paying until its end of extended support
+                dates = self.eligibility[scenario.to_version]
+                target_days = self._charged_days(day, np.datetime64(dates['end_of_standard_support'], 'D'),
+                                                 np.datetime64(dates['end_of_extended_support'], 'D'))
+            avoided = self.daily_cost[selected] * (remaining_days - target_days)
+        else:
+            role = self._roles[scenario.role]
+            skipped = selected & role['no_smaller_size'] & (role['count'] > 0)
+            if skipped.any():
+                codes, types = role['types']
+                skipped_types = sorted({types[code] for code in codes[skipped]})
+                LOGGER.warning(f'Scenario "{scenario.name}": {int(skipped.sum())} domains have {scenario.role} nodes of '
+                               f'instance types without a smaller size {skipped_types}, they are not rightsized')
+            # Normalized instance hours saved per day, at the regional price
+            avoided = role['count'][selected] * role['saved_factor'][selected] * self._price[selected] * 24 * remaining_days
+
+        changed = int((avoided != 0).sum())
+        return changed, float(avoided.sum())
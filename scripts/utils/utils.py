@@ -3,7 +3,7 @@
 
 import csv
 from utils.log import get_logger
-from utils.constants import ACCOUNT_ID_LENGTH
+from utils.constants import ACCOUNT_ID_LENGTH, REGION_NOT_ENABLED_ERROR_CODES
 from botocore.exceptions import ClientError
 
 LOGGER = get_logger(__name__)
@@ -14,6 +14,28 @@ class ValidationException(Exception):
     """
     pass
 
+def is_region_not_enabled_error(err):
+    """
+    Return whether a ClientError means that the region of the call is not enabled in the account
+    """
+    return err.response.get("Error", {}).get("Code") in REGION_NOT_ENABLED_ERROR_CODES
+
+def skip_region_on_error(err, account_id, region, fail_on_api_errors=False):
+    """
+    Log a ClientError of an (account, region) unit, and return whether the region is skipped rather than the unit failed.
+    A region that is not enabled in the account is always skipped. Any other API error (e.g. AccessDenied in a region
+    denied by an SCP) skips the region too, unless `fail_on_api_errors` (--strict or --dead-letter-file)
+    """
+    if is_region_not_enabled_error(err):
+        LOGGER.info("Account: {} | Received Exception - message: {}".format(account_id, err))
+        LOGGER.info("Account: {} | Region {} is not enabled for the account. Skipping region ...".format(account_id, region))
+        return True
+    if fail_on_api_errors:
+        LOGGER.info("Account: {} | Received Exception: {}".format(account_id, err))
+        return False
+    LOGGER.warning("Account: {} | Received Exception: {}. Skipping region {} ...".format(account_id, err, region))
+    return True
+
 def read_accounts_from_file(file_path):
     """
     Read CSV file containing AWS Account IDs and return the list of accounts
@@ -38,11 +60,10 @@ def read_accounts_from_file(file_path):
         LOGGER.error(f"Failed when reading accounts from file: {file_path}")
         raise err
 
-def write_accounts_to_file(accounts):
+def write_accounts_to_file(accounts, file_path="accounts.csv"):
     """
     Write the list of AWS Account IDs to the specified file
     """
-    file_path = "accounts.csv"
     try:
         LOGGER.info(f"Writing accounts to file: {file_path}")
         with open(file_path, 'w', encoding="utf-8", newline ='') as fp: